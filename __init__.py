@@ -1,4 +1,5 @@
 import math
+import os
 import bpy
 
 # ImportHelper is a helper class, defines filename and
@@ -68,6 +69,19 @@ class IMPORT_OT_FreeCAD_Preferences(bpy.types.AddonPreferences):
         ),
         default="/usr/lib/python3/dist-packages/",
     )
+    filepath_freecadcmd: bpy.props.StringProperty(
+        subtype="FILE_PATH",
+        name="Path to freecadcmd",
+        description=(
+            "Path to the FreeCAD command line executable \n"
+            "(freecadcmd / FreeCADCmd.exe). \n"
+            "used for the tessellation workers - "
+            "they run with the FreeCAD python version. \n"
+            "the document itself is still opened with the FreeCAD module "
+            "inside of Blender."
+        ),
+        default="",
+    )
 
     def draw(self, context):
         """Draw Preferences."""
@@ -81,6 +95,24 @@ class IMPORT_OT_FreeCAD_Preferences(bpy.types.AddonPreferences):
         )
         layout.prop(self, "filepath_freecad")
         layout.prop(self, "filepath_system_packages")
+        layout.prop(self, "filepath_freecadcmd")
+        layout.operator(IMPORT_OT_FreeCAD_ClearTessellationCache.bl_idname)
+
+
+class IMPORT_OT_FreeCAD_ClearTessellationCache(bpy.types.Operator):
+    """Remove all tessellated shapes from the user cache folder."""
+
+    bl_idname = "io_import_fcstd.clear_tessellation_cache"
+    bl_label = "Clear Tessellation Cache"
+
+    def execute(self, context):
+        """Remove all cache entries."""
+        cache = import_fcstd.tessellation_cache.TessellationCache()
+        removed = cache.clear()
+        self.report(
+            {"INFO"}, "removed {} entries from '{}'".format(removed, cache.cache_dir)
+        )
+        return {"FINISHED"}
 
 
 # class IMPORT_OT_FreeCAD(bpy.types.Operator, ImportHelper):
@@ -144,6 +176,126 @@ class IMPORT_OT_FreeCAD(bpy.types.Operator):
         default=0.10,
         description="The tessellation value to apply when triangulating shapes",
     )
+    option_weld_tolerance: bpy.props.FloatProperty(
+        name="Weld tolerance",
+        precision=6,
+        default=0.0,
+        min=0.0,
+        description=(
+            "Snap vertices to a grid of this size (in FreeCAD units) "
+            "and merge all vertices in the same grid cell. "
+            "0 merges only vertices at exactly the same position"
+        ),
+    )
+    option_use_stored_shapes: bpy.props.BoolProperty(
+        name="Use Stored Shapes",
+        default=False,
+        description=(
+            "skip the full document recompute and use the shapes "
+            "stored in the file. \n"
+            "only touched or invalid objects are recomputed. \n"
+            "much faster for big parametric models - "
+            "but the file has to be saved after its last change."
+            ""
+        ),
+    )
+    option_array_instancing: bpy.props.BoolProperty(
+        name="Array Instancing",
+        default=False,
+        description=(
+            "import Draft link arrays as Geometry Nodes instances "
+            "of their base object. \n"
+            "one mesh plus one point per element - "
+            "instead of one Blender object per element."
+            ""
+        ),
+    )
+    option_use_import_plan: bpy.props.BoolProperty(
+        name="Two Pass Import",
+        default=False,
+        description=(
+            "first collect a flat import plan of the whole document - "
+            "then create the Blender data from it. \n"
+            "every distinct geometry is tessellated and created only once."
+            ""
+        ),
+    )
+    option_plan_directory: bpy.props.StringProperty(
+        name="Plan Directory",
+        default="",
+        subtype="DIR_PATH",
+        description=(
+            "save the import plan (and its mesh data) to this directory. \n"
+            "a saved plan can be imported again without FreeCAD."
+            ""
+        ),
+    )
+    option_share_meshes: bpy.props.BoolProperty(
+        name="Share Identical Meshes",
+        default=True,
+        description=(
+            "objects with identical shape and colors "
+            "(for example copies of one screw) use one shared mesh. \n"
+            "the shape is tessellated only once."
+            ""
+        ),
+    )
+    option_dry_run: bpy.props.BoolProperty(
+        name="Dry Run (Estimate)",
+        default=False,
+        description=(
+            "do not import anything - only report what the import would create: \n"
+            "object counts, link fan-out, instances, triangles and memory."
+            ""
+        ),
+    )
+    option_tessellation_cache: bpy.props.BoolProperty(
+        name="Cache tessellation",
+        default=True,
+        description=(
+            "Store tessellated shapes in the user cache folder "
+            "and reuse them on the next import of unchanged shapes"
+        ),
+    )
+    option_tessellation_cache_max_size: bpy.props.IntProperty(
+        name="Cache size limit (MB)",
+        default=1024,
+        min=0,
+        description=(
+            "Remove the least recently used cache entries "
+            "when the cache folder gets bigger than this. "
+            "0 disables the limit"
+        ),
+    )
+    option_worker_count: bpy.props.IntProperty(
+        name="Tessellation workers",
+        default=0,
+        min=0,
+        soft_max=32,
+        description=(
+            "Number of worker processes that tessellate shapes in parallel. "
+            "0 or 1 tessellates inside of Blender"
+        ),
+    )
+    option_workers_use_freecadcmd: bpy.props.BoolProperty(
+        name="Tessellation workers via freecadcmd",
+        default=False,
+        description=(
+            "Run the tessellation workers with freecadcmd "
+            "(set its path in the addon preferences) "
+            "instead of Blenders python. "
+            "only the tessellation runs there - "
+            "the FreeCAD module still has to be importable inside of Blender"
+        ),
+    )
+    option_keep_workers: bpy.props.BoolProperty(
+        name="Keep workers running",
+        default=True,
+        description=(
+            "Keep the tessellation workers (with FreeCAD loaded) "
+            "running for the next import"
+        ),
+    )
     option_auto_smooth_use: bpy.props.BoolProperty(
         name="Auto Smooth",
         default=True,
@@ -174,6 +326,14 @@ class IMPORT_OT_FreeCAD(bpy.types.Operator):
         default=True,
         description=("Objects with same color/transparency will use the same material"),
     )
+    option_sharemats_across_imports: bpy.props.BoolProperty(
+        name="Share materials across imports",
+        default=False,
+        description=(
+            "Reuse materials with same color/transparency "
+            "created by earlier imports"
+        ),
+    )
     # option_create_tree: bpy.props.BoolProperty(
     #     name="Recreate FreeCAD Object-Tree",
     #     default=True,
@@ -213,6 +373,65 @@ class IMPORT_OT_FreeCAD(bpy.types.Operator):
             ""
         ),
     )
+    option_verbosity: bpy.props.EnumProperty(
+        name="Verbosity",
+        items=(
+            ("ERROR", "Error", "only report errors"),
+            ("WARNING", "Warning", "report errors and warnings"),
+            ("INFO", "Info", "report the import progress"),
+            ("DEBUG", "Debug", "print everything to the system console (slow)"),
+        ),
+        default="WARNING",
+        description=(
+            "amount of messages to report. \n"
+            "messages below this level are not even formatted - "
+            "so lower verbosity gives a faster import."
+            ""
+        ),
+    )
+    option_profile: bpy.props.BoolProperty(
+        name="Profile Import",
+        default=False,
+        description=(
+            "record time, call counts and vertex / face counts "
+            "for every import phase and object type. \n"
+            "a summary is added to the report."
+            ""
+        ),
+    )
+    option_profile_allocations: bpy.props.BoolProperty(
+        name="Profile Allocations",
+        default=False,
+        description=(
+            "additionally track memory allocations (tracemalloc). \n"
+            "this slows down the import considerably."
+            ""
+        ),
+    )
+    option_profile_directory: bpy.props.StringProperty(
+        name="Profile Directory",
+        default="",
+        subtype="DIR_PATH",
+        description=(
+            "save the profile as '<filename>.profile.json' in this directory. \n"
+            "leave empty to only report the summary."
+            ""
+        ),
+    )
+    option_profile_export: bpy.props.EnumProperty(
+        name="Profile Export",
+        items=(
+            ("NONE", "None", "only the json report"),
+            ("CPROFILE", "cProfile", "additionally save python cProfile stats (.prof)"),
+            (
+                "SPEEDSCOPE",
+                "speedscope",
+                "additionally save the phases as speedscope file (.speedscope.json)",
+            ),
+        ),
+        default="NONE",
+        description="additional profile file saved to the profile directory",
+    )
 
     def invoke(self, context, event):
         """Invoke is called when the user picks our Import menu entry."""
@@ -234,6 +453,13 @@ class IMPORT_OT_FreeCAD(bpy.types.Operator):
         print("addon_prefs path_to freecad", path)
         return path
 
+    def get_path_to_freecadcmd(self):
+        """Get freecadcmd path from addon preferences."""
+        addon_prefs = self.get_preferences()
+        path = addon_prefs.filepath_freecadcmd
+        print("addon_prefs path_to freecadcmd", path)
+        return path
+
     def get_path_to_system_packages(self):
         """Get FreeCAD path from addon preferences."""
         # get the FreeCAD path specified in addon preferences
@@ -256,31 +482,66 @@ class IMPORT_OT_FreeCAD(bpy.types.Operator):
         path_to_freecad = self.get_path_to_freecad()
         # path_to_system_packages = self.get_path_to("system_packages")
         path_to_system_packages = self.get_path_to_system_packages()
-        dir = self.directory
-        for file in self.files:
-            filestr = str(file.name)
-            if filestr.lower().endswith(".fcstd"):
-                my_importer = import_fcstd.ImportFcstd(
-                    update=self.option_update,
-                    update_only_modified_meshes=self.option_update_only_modified_meshes,
-                    placement=self.option_placement,
-                    scale=self.option_scale,
-                    tessellation=self.option_tessellation,
-                    auto_smooth_use=self.option_auto_smooth_use,
-                    auto_smooth_angle=self.option_auto_smooth_angle,
-                    skiphidden=self.option_skiphidden,
-                    filter_sketch=self.option_filter_sketch,
-                    sharemats=self.option_sharemats,
-                    update_materials=False,
-                    obj_name_prefix=self.option_obj_name_prefix,
-                    obj_name_prefix_with_filename=self.option_prefix_with_filename,
-                    links_as_collectioninstance=self.option_links_as_col,
-                    path_to_freecad=path_to_freecad,
-                    path_to_system_packages=path_to_system_packages,
-                    report=self.report,
+        worker_freecadcmd = None
+        if self.option_workers_use_freecadcmd:
+            worker_freecadcmd = self.get_path_to_freecadcmd()
+            if not worker_freecadcmd:
+                self.report(
+                    {"WARNING"},
+                    "Tessellation workers via freecadcmd: "
+                    "no path to freecadcmd set in the addon preferences - "
+                    "the workers use Blenders python.",
                 )
-                return my_importer.import_fcstd(filename=dir + filestr)
-        return {"FINISHED"}
+        dir = self.directory
+        filenames = [
+            os.path.join(dir, str(file.name))
+            for file in self.files
+            if str(file.name).lower().endswith(".fcstd")
+        ]
+        if not filenames:
+            return {"FINISHED"}
+        # one importer for all files -
+        # so FreeCAD modules, materials and caches are shared.
+        my_importer = import_fcstd.ImportFcstd(
+            update=self.option_update,
+            update_only_modified_meshes=self.option_update_only_modified_meshes,
+            placement=self.option_placement,
+            scale=self.option_scale,
+            tessellation=self.option_tessellation,
+            weld_tolerance=self.option_weld_tolerance,
+            use_stored_shapes=self.option_use_stored_shapes,
+            array_instancing=self.option_array_instancing,
+            use_import_plan=self.option_use_import_plan,
+            plan_directory=bpy.path.abspath(self.option_plan_directory),
+            dry_run=self.option_dry_run,
+            share_meshes=self.option_share_meshes,
+            use_tessellation_cache=self.option_tessellation_cache,
+            tessellation_cache_max_size=self.option_tessellation_cache_max_size * 2 ** 20,
+            worker_count=self.option_worker_count,
+            worker_freecadcmd=worker_freecadcmd,
+            keep_workers=self.option_keep_workers,
+            auto_smooth_use=self.option_auto_smooth_use,
+            auto_smooth_angle=self.option_auto_smooth_angle,
+            skiphidden=self.option_skiphidden,
+            filter_sketch=self.option_filter_sketch,
+            sharemats=self.option_sharemats,
+            sharemats_across_imports=self.option_sharemats_across_imports,
+            update_materials=False,
+            obj_name_prefix=self.option_obj_name_prefix,
+            obj_name_prefix_with_filename=self.option_prefix_with_filename,
+            links_as_collectioninstance=self.option_links_as_col,
+            path_to_freecad=path_to_freecad,
+            path_to_system_packages=path_to_system_packages,
+            verbosity=self.option_verbosity,
+            profile=self.option_profile,
+            profile_allocations=self.option_profile_allocations,
+            profile_directory=bpy.path.abspath(self.option_profile_directory),
+            profile_export=self.option_profile_export,
+            report=self.report,
+        )
+        if len(filenames) == 1:
+            return my_importer.import_fcstd(filename=filenames[0])
+        return my_importer.import_files(filenames)
 
 
 # ==============================================================================
@@ -289,6 +550,7 @@ class IMPORT_OT_FreeCAD(bpy.types.Operator):
 
 classes = (
     IMPORT_OT_FreeCAD,
+    IMPORT_OT_FreeCAD_ClearTessellationCache,
     IMPORT_OT_FreeCAD_Preferences,
 )
 
@@ -313,6 +575,7 @@ def unregister():
 
     for cls in reversed(classes):
         unregister_class(cls)
+    import_fcstd.tessellation_pool.shutdown_shared_pool()
     bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
 
 
@@ -3,7 +3,7 @@
 
 """Random Helper Functions & Classe for Blender Python Scripting."""
 
-# import re
+import re
 
 try:
     import bpy
@@ -111,12 +111,13 @@ class colors:
         return result
 
 
+# matches all color and control sequences of the colors class
+ASCII_CONTROLLS_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+
 def filter_ASCII_controlls(data):
     """Remove ASCII controll characters."""
-    code_list = colors.get_flat_list()
-    for el in code_list:
-        data = data.replace(el, "")
-    return data
+    return ASCII_CONTROLLS_PATTERN.sub("", data)
 
 
 def test_filtering():
@@ -147,36 +148,66 @@ def print_colored(mode, data, pre_line=""):
     print("{}{}{}{}".format(str(pre_line), printcolor, data, colors.reset))
 
 
+# lines for the blender console area - written by flush_blender_console
+blender_console_buffer = []
+BLENDER_CONSOLE_BUFFER_SIZE = 500
+
+
+def get_blender_console_overrides():
+    """Get context overrides for all console areas."""
+    overrides = []
+    for window in bpy.context.window_manager.windows:
+        screen = window.screen
+        for area in screen.areas:
+            if area.type == 'CONSOLE':
+                overrides.append({
+                    'window': window,
+                    'screen': screen,
+                    'area': area
+                })
+    return overrides
+
+
 # https://blender.stackexchange.com/a/142317/16634
+def flush_blender_console():
+    """Write all buffered lines to blenders console area."""
+    if not blender_console_buffer:
+        return
+    lines = list(blender_console_buffer)
+    del blender_console_buffer[:]
+    if bpy:
+        for override in get_blender_console_overrides():
+            for text, message_type in lines:
+                bpy.ops.console.scrollback_append(
+                    override, text=text, type=message_type)
+
+
 def print_blender_console(mode, data, pre_line=""):
-    """Print to blenders console area."""
+    """
+    Print to blenders console area.
+
+    lines are buffered -
+    call flush_blender_console to write them out.
+    """
     if bpy:
-        message_type = mode.pop()
+        message_type = next(iter(mode))
         if message_type == 'WARNING':
             message_type = 'INFO'
         elif message_type == 'INFO':
             message_type = 'OUTPUT'
         else:
             message_type = 'INFO'
-        data = filter_ASCII_controlls(str(data))
-        data = filter_ASCII_controlls(str(pre_line)) + data
-        for window in bpy.context.window_manager.windows:
-            screen = window.screen
-            for area in screen.areas:
-                if area.type == 'CONSOLE':
-                    override = {
-                        'window': window,
-                        'screen': screen,
-                        'area': area
-                    }
-                    bpy.ops.console.scrollback_append(
-                        override, text=data, type=message_type)
+        data = filter_ASCII_controlls(str(pre_line) + str(data))
+        blender_console_buffer.append((data, message_type))
+        if len(blender_console_buffer) >= BLENDER_CONSOLE_BUFFER_SIZE:
+            flush_blender_console()
 
 
 def print_console(mode, data, pre_line=""):
     """Multi-Print to blenders console area and system console."""
     print_colored(mode, data, pre_line=pre_line)
     print_blender_console(mode, data, pre_line=pre_line)
+    flush_blender_console()
 
 
 def print_multi(*, mode, data, pre_line="", report=None):
@@ -192,6 +223,7 @@ def print_multi(*, mode, data, pre_line="", report=None):
         report(mode, data)
     else:
         print_blender_console(mode, data, pre_line)
+        flush_blender_console()
 
 
 # def print_blender_info(mode, data):
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Import Benchmark.
+
+imports every .FCStd file below dev/
+(including the generated stress documents in dev/benchmark/synthetic/)
+and records import time, peak RSS, datablock counts and per-phase timings.
+the results are compared against a stored baseline.
+
+run headless:
+    blender --background --python dev/benchmark/benchmark.py -- [options]
+
+options (after the `--`):
+    --freecad PATH          path to FreeCAD.so / FreeCAD lib folder
+    --system-packages PATH  path to the system python packages
+    --filter TEXT           only files with TEXT in their path
+    --repeat N              import every file N times - the fastest run counts
+    --output FILE           results file (default dev/benchmark/results.json)
+    --baseline FILE         baseline file (default dev/benchmark/baseline.json)
+    --update-baseline       store the results as new baseline
+    --threshold FACTOR      time regression threshold (default 1.2)
+    --worker-count N        tessellation worker processes (default 0)
+    --cache MODE            tessellation cache (default none):
+                            none - no cache
+                            cold - a new empty cache for every import
+                            warm - a new cache per file -
+                                   filled by an untimed import before the timed runs
+
+the persistent user cache is never used - so the timings do not depend on earlier runs.
+results are only compared with baseline entries of the same cache mode.
+
+exits with code 1 if a regression against the baseline was found
+and with code 2 if results could not be compared because the cache modes differ.
+"""
+
+import argparse
+import datetime
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    # windows
+    resource = None
+
+import bpy
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+dev_dir = os.path.dirname(script_dir)
+base_dir = os.path.dirname(dev_dir)
+outside_package_dir = os.path.dirname(base_dir)
+if outside_package_dir not in sys.path:
+    sys.path.append(outside_package_dir)
+
+# pylama:ignore=E402
+from io_import_fcstd import import_fcstd
+
+
+# fallback path to FreeCAD daily
+PATH_TO_FREECAD = "/usr/lib/freecad-daily-python3/lib/FreeCAD.so"
+PATH_TO_SYSTEM_PACKAGES = "/usr/lib/python3/dist-packages/"
+
+DATABLOCK_TYPES = ("objects", "meshes", "materials", "collections")
+CACHE_MODES = ("none", "cold", "warm")
+
+
+def parse_args():
+    """Parse the arguments after `--`."""
+    argv = sys.argv
+    if "--" in argv:
+        argv = argv[argv.index("--") + 1:]
+    else:
+        argv = []
+    parser = argparse.ArgumentParser(
+        prog="blender --background --python benchmark.py --",
+        description="io_import_fcstd import benchmark",
+    )
+    parser.add_argument("--freecad", default=None)
+    parser.add_argument("--system-packages", default=None)
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--output", default=os.path.join(script_dir, "results.json")
+    )
+    parser.add_argument(
+        "--baseline", default=os.path.join(script_dir, "baseline.json")
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--worker-count", type=int, default=0)
+    parser.add_argument("--cache", choices=CACHE_MODES, default="none")
+    return parser.parse_args(argv)
+
+
+def get_addon_preferences():
+    """Get addon preferences - if the addon is enabled."""
+    addon = bpy.context.preferences.addons.get("io_import_fcstd")
+    if addon:
+        return addon.preferences
+    return None
+
+
+def find_files(name_filter=""):
+    """Find all FCStd files below dev/."""
+    files = glob.glob(os.path.join(dev_dir, "**", "*.FCStd"), recursive=True)
+    files = [f for f in sorted(files) if name_filter in os.path.relpath(f, dev_dir)]
+    return files
+
+
+def clear_blend_data():
+    """Remove everything a previous import created."""
+    for bobj in list(bpy.data.objects):
+        bpy.data.objects.remove(bobj)
+    for collection in list(bpy.data.collections):
+        bpy.data.collections.remove(collection)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+    for material in list(bpy.data.materials):
+        bpy.data.materials.remove(material)
+
+
+def get_peak_rss():
+    """
+    Get peak resident set size in bytes.
+
+    this is the peak of the whole blender process (and its worker children) -
+    so it only grows from file to file.
+    """
+    if resource is None:
+        return None
+    peak = 0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        maxrss = resource.getrusage(who).ru_maxrss
+        # linux reports kilobytes - macOS bytes.
+        if sys.platform != "darwin":
+            maxrss *= 1024
+        peak += maxrss
+    return peak
+
+
+def get_datablock_counts():
+    """Count created datablocks and geometry."""
+    counts = {name: len(getattr(bpy.data, name)) for name in DATABLOCK_TYPES}
+    counts["verts"] = sum(len(mesh.vertices) for mesh in bpy.data.meshes)
+    counts["faces"] = sum(len(mesh.polygons) for mesh in bpy.data.meshes)
+    return counts
+
+
+def import_file(filename, args, paths, cache_dir=None):
+    """Import file and collect the numbers - cache_dir None disables the cache."""
+    clear_blend_data()
+    importer = import_fcstd.ImportFcstd(
+        update=False,
+        use_tessellation_cache=cache_dir is not None,
+        tessellation_cache_dir=cache_dir,
+        worker_count=args.worker_count,
+        links_as_collectioninstance=False,
+        path_to_freecad=paths["freecad"],
+        path_to_system_packages=paths["system_packages"],
+        profile=True,
+    )
+    time_start = time.perf_counter()
+    status = importer.import_fcstd(filename=filename)
+    duration = time.perf_counter() - time_start
+    result = {
+        "status": sorted(status),
+        "cache": args.cache,
+        "time": duration,
+        "peak_rss": get_peak_rss(),
+        "datablocks": get_datablock_counts(),
+        "phases": {},
+    }
+    if importer.profiler.enabled:
+        report = importer.profiler.get_report()
+        result["phases"] = {
+            name: entry["time"] for name, entry in report["phases"].items()
+        }
+    return result
+
+
+def run(args):
+    """Run benchmark for all files."""
+    prefs = get_addon_preferences()
+    paths = {
+        "freecad": args.freecad,
+        "system_packages": args.system_packages,
+    }
+    if not paths["freecad"]:
+        paths["freecad"] = prefs.filepath_freecad if prefs else PATH_TO_FREECAD
+    if not paths["system_packages"]:
+        paths["system_packages"] = (
+            prefs.filepath_system_packages if prefs else PATH_TO_SYSTEM_PACKAGES
+        )
+
+    results = {}
+    for filename in find_files(args.filter):
+        name = os.path.relpath(filename, dev_dir)
+        print("benchmark '{}'".format(name))
+        runs = []
+        cache_dirs = []
+        try:
+            if args.cache == "warm":
+                cache_dirs.append(tempfile.mkdtemp(prefix="fcstd_benchmark_"))
+                import_file(filename, args, paths, cache_dirs[-1])
+            for _ in range(max(1, args.repeat)):
+                if args.cache == "cold":
+                    cache_dirs.append(tempfile.mkdtemp(prefix="fcstd_benchmark_"))
+                cache_dir = cache_dirs[-1] if cache_dirs else None
+                runs.append(import_file(filename, args, paths, cache_dir))
+        except Exception as e:
+            runs.append(
+                {"status": ["ERROR"], "cache": args.cache, "error": str(e), "time": None}
+            )
+        finally:
+            for cache_dir in cache_dirs:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+        timed = [r for r in runs if r.get("time") is not None]
+        if timed:
+            results[name] = min(timed, key=lambda r: r["time"])
+        else:
+            results[name] = runs[-1]
+    clear_blend_data()
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "blender_version": bpy.app.version_string,
+        "platform": sys.platform,
+        "settings": {
+            "repeat": args.repeat,
+            "worker_count": args.worker_count,
+            "cache": args.cache,
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with baseline.
+
+    returns (list of regression messages, list of names not compared).
+    a result is not compared with a baseline entry of an other cache mode -
+    a warm cache run is no measure for a run without cache.
+    """
+    regressions = []
+    incomparable = []
+    for name, result in sorted(results["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            print("  {:<60} new".format(name))
+            continue
+        if base.get("cache") != result.get("cache"):
+            print(
+                "  {:<60} cache mode {} → {} - not compared"
+                "".format(name, base.get("cache"), result.get("cache"))
+            )
+            incomparable.append(name)
+            continue
+        if result.get("time") is None:
+            regressions.append("{}: import failed ({})".format(name, result.get("error")))
+            continue
+        if base.get("time"):
+            ratio = result["time"] / base["time"]
+            line = "  {:<60} {:>8.3f}s  {:>8.3f}s  {:>6.2f}x".format(
+                name, base["time"], result["time"], ratio
+            )
+            print(line)
+            if ratio > threshold:
+                regressions.append(
+                    "{}: time {:.3f}s → {:.3f}s ({:.2f}x)".format(
+                        name, base["time"], result["time"], ratio
+                    )
+                )
+        for key, value in result.get("datablocks", {}).items():
+            base_value = base.get("datablocks", {}).get(key)
+            if base_value is not None and base_value != value:
+                regressions.append(
+                    "{}: {} changed {} → {}".format(name, key, base_value, value)
+                )
+    return regressions, incomparable
+
+
+def main():
+    """Run benchmark, save results and compare with baseline."""
+    args = parse_args()
+    results = run(args)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print("results saved to '{}'".format(args.output))
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=4)
+        print("baseline updated '{}'".format(args.baseline))
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline found - run with --update-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print("compare with baseline from {}:".format(baseline.get("date")))
+    regressions, incomparable = compare(results, baseline, args.threshold)
+    if regressions:
+        print("{} regressions:".format(len(regressions)))
+        for message in regressions:
+            print("  " + message)
+        return 1
+    if incomparable:
+        print(
+            "{} files not compared - the baseline uses an other cache mode. "
+            "run with the same --cache or update the baseline."
+            "".format(len(incomparable))
+        )
+        return 2
+    print("no regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Generate Stress Documents.
+
+FreeCAD side script that creates parametrized .FCStd documents
+to test the importer at production scale.
+every document contains
+    - a chain of nested App::Part levels (one box per level)
+    - App::Link instances of that chain
+    - App::Link arrays (App::LinkElement children)
+    - Draft link arrays with ExpandArray
+    - boxes with per-face DiffuseColor
+    - Arch walls hosting a window
+next to each document a `<name>.expected.json` lists the parameters,
+the created TypeIds and the expected number of imported shape instances.
+
+run with freecadcmd:
+    freecadcmd dev/benchmark/generate_stress_documents.py
+or with a python that can import FreeCAD:
+    python3 generate_stress_documents.py -- --preset large --freecad /usr/lib/freecad/lib
+
+options (after the `--`):
+    --preset NAME   one of small, medium, large (default: all)
+    --output DIR    target directory (default dev/benchmark/synthetic)
+    --freecad PATH  path to the FreeCAD lib folder
+the preset can also be set with the environment variable
+`IO_IMPORT_FCSTD_STRESS_PRESET` (freecadcmd does not pass arguments on).
+
+without GUI FreeCAD does not write a GuiDocument.xml -
+so this script adds a minimal one with the colors the importer reads.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import zipfile
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+
+PRESETS = {
+    # roughly 10^2 objects
+    "small": {
+        "part_depth": 4,
+        "links": 10,
+        "link_arrays": 2,
+        "link_array_size": 10,
+        "draft_arrays": 2,
+        "draft_array_size": 4,
+        "colored_parts": 10,
+        "arch_walls": 2,
+    },
+    # roughly 10^3 - 10^4 objects
+    "medium": {
+        "part_depth": 8,
+        "links": 200,
+        "link_arrays": 20,
+        "link_array_size": 100,
+        "draft_arrays": 10,
+        "draft_array_size": 10,
+        "colored_parts": 200,
+        "arch_walls": 10,
+    },
+    # roughly 10^5 objects
+    "large": {
+        "part_depth": 12,
+        "links": 2000,
+        "link_arrays": 100,
+        "link_array_size": 800,
+        "draft_arrays": 20,
+        "draft_array_size": 20,
+        "colored_parts": 2000,
+        "arch_walls": 50,
+    },
+}
+
+SPACING = 100.0
+
+
+def parse_args():
+    """Parse the arguments after `--`."""
+    argv = sys.argv
+    if "--" in argv:
+        argv = argv[argv.index("--") + 1:]
+    else:
+        argv = []
+    parser = argparse.ArgumentParser(description="generate stress FCStd documents")
+    parser.add_argument(
+        "--preset",
+        choices=sorted(PRESETS),
+        default=os.environ.get("IO_IMPORT_FCSTD_STRESS_PRESET"),
+    )
+    parser.add_argument("--output", default=os.path.join(script_dir, "synthetic"))
+    parser.add_argument("--freecad", default=None)
+    return parser.parse_args(argv)
+
+
+def pack_color(rgb, alpha=0.0):
+    """Pack color like FreeCAD App::Color::getPackedValue."""
+    r, g, b = (int(round(c * 255)) for c in rgb)
+    return (r << 24) | (g << 16) | (b << 8) | int(round(alpha * 255))
+
+
+def get_face_colors(index, face_count):
+    """Some deterministic colors."""
+    colors = []
+    for face in range(face_count):
+        value = (index * 7 + face * 3) % 16 / 15.0
+        colors.append((value, 1.0 - value, (face % 2) * 0.5 + 0.25))
+    return colors
+
+
+class StressDocument(object):
+    """Build one stress document."""
+
+    def __init__(self, name, parameters):
+        """Init."""
+        super(StressDocument, self).__init__()
+        import FreeCAD
+
+        self.name = name
+        self.parameters = parameters
+        self.doc = FreeCAD.newDocument(name)
+        # name → {"ShapeColor": rgb, "DiffuseColor": [rgb, ..], "Visibility": bool}
+        self.view_data = {}
+        self.expected = {
+            "shape_instances": 0,
+            "link_elements": 0,
+            "draft_array_elements": 0,
+            "per_face_colored_objects": 0,
+        }
+        self.warnings = []
+
+    def place(self, obj, x=0.0, y=0.0, z=0.0):
+        """Set placement position."""
+        import FreeCAD
+
+        obj.Placement = FreeCAD.Placement(
+            FreeCAD.Vector(x, y, z), FreeCAD.Rotation()
+        )
+
+    def hide(self, obj):
+        """Hide base object - only its instances should be imported."""
+        obj.Visibility = False
+        self.view_data.setdefault(obj.Name, {})["Visibility"] = False
+
+    def add_box(self, name, size=10.0):
+        """Add Part::Box."""
+        box = self.doc.addObject("Part::Box", name)
+        box.Length = size
+        box.Width = size
+        box.Height = size
+        self.view_data[box.Name] = {"ShapeColor": (0.8, 0.8, 0.8)}
+        return box
+
+    def add_part_chain(self):
+        """Nested App::Part levels with one box each."""
+        depth = self.parameters["part_depth"]
+        top = None
+        parent = None
+        for level in range(depth):
+            part = self.doc.addObject("App::Part", "Level{}".format(level))
+            box = self.add_box("LevelBox{}".format(level))
+            self.place(box, x=level * 15.0)
+            part.addObject(box)
+            if parent:
+                parent.addObject(part)
+                self.place(part, z=15.0)
+            else:
+                top = part
+            parent = part
+        self.expected["shape_instances"] += depth
+        return top
+
+    def add_links(self, target):
+        """App::Link instances of the part chain."""
+        for index in range(self.parameters["links"]):
+            link = self.doc.addObject("App::Link", "ChainLink{}".format(index))
+            link.LinkedObject = target
+            self.place(link, x=(index % 50) * SPACING, y=(1 + index // 50) * SPACING)
+        self.expected["shape_instances"] += (
+            self.parameters["links"] * self.parameters["part_depth"]
+        )
+
+    def add_link_arrays(self):
+        """App::Link arrays - every element is a App::LinkElement."""
+        import FreeCAD
+
+        size = self.parameters["link_array_size"]
+        for index in range(self.parameters["link_arrays"]):
+            base = self.doc.addObject("Part::Cylinder", "ArrayBase{}".format(index))
+            base.Radius = 4.0
+            base.Height = 10.0
+            self.view_data[base.Name] = {"ShapeColor": (0.2, 0.4, 0.8)}
+            self.hide(base)
+            link = self.doc.addObject("App::Link", "LinkArray{}".format(index))
+            link.LinkedObject = base
+            link.ShowElement = True
+            link.ElementCount = size
+            link.PlacementList = [
+                FreeCAD.Placement(
+                    FreeCAD.Vector(i * 10.0, -SPACING * (1 + index), 0),
+                    FreeCAD.Rotation(),
+                )
+                for i in range(size)
+            ]
+        count = self.parameters["link_arrays"] * size
+        self.expected["link_elements"] += count
+        self.expected["shape_instances"] += count
+
+    def add_draft_arrays(self):
+        """Draft ortho arrays as links - expanded to single elements."""
+        import FreeCAD
+
+        try:
+            import Draft
+        except ImportError as e:
+            self.warnings.append("Draft not available: {}".format(e))
+            return
+        size = self.parameters["draft_array_size"]
+        for index in range(self.parameters["draft_arrays"]):
+            base = self.add_box("DraftBase{}".format(index), size=5.0)
+            self.hide(base)
+            offset_x = FreeCAD.Vector(8.0, 0, 0)
+            offset_y = FreeCAD.Vector(0, 8.0, 0)
+            offset_z = FreeCAD.Vector(0, 0, 8.0)
+            if hasattr(Draft, "make_ortho_array"):
+                array = Draft.make_ortho_array(
+                    base, offset_x, offset_y, offset_z, size, size, 1, use_link=True
+                )
+            else:
+                array = Draft.makeArray(
+                    base, offset_x, offset_y, size, size, use_link=True
+                )
+            array.ExpandArray = True
+            self.place(array, x=-SPACING * (1 + index))
+            self.view_data[array.Name] = {"ShapeColor": (0.8, 0.6, 0.2)}
+        count = self.parameters["draft_arrays"] * size * size
+        self.expected["draft_array_elements"] += count
+        self.expected["shape_instances"] += count
+
+    def add_colored_parts(self):
+        """Boxes with one color per face."""
+        for index in range(self.parameters["colored_parts"]):
+            box = self.add_box("ColoredBox{}".format(index))
+            self.place(box, x=(index % 50) * 20.0, y=-(index // 50) * 20.0, z=-SPACING)
+            self.view_data[box.Name]["DiffuseColor"] = get_face_colors(index, 6)
+        self.expected["per_face_colored_objects"] += self.parameters["colored_parts"]
+        self.expected["shape_instances"] += self.parameters["colored_parts"]
+
+    def add_arch_hosts(self):
+        """Arch walls with a hosted window."""
+        import FreeCAD
+
+        try:
+            import Arch
+        except ImportError as e:
+            self.warnings.append("Arch not available: {}".format(e))
+            return
+        created = 0
+        for index in range(self.parameters["arch_walls"]):
+            y = SPACING * 2 * (1 + index)
+            line = self.doc.addObject("Part::Line", "WallLine{}".format(index))
+            line.X1 = 0.0
+            line.Y1 = y
+            line.X2 = 4000.0
+            line.Y2 = y
+            self.hide(line)
+            wall = Arch.makeWall(line, width=200.0, height=3000.0)
+            self.view_data[wall.Name] = {"ShapeColor": (0.9, 0.9, 0.85)}
+            try:
+                window = Arch.makeWindowPreset(
+                    "Fixed",
+                    width=1000.0,
+                    height=1200.0,
+                    h1=50.0,
+                    h2=50.0,
+                    h3=50.0,
+                    w1=100.0,
+                    w2=50.0,
+                    o1=0.0,
+                    o2=50.0,
+                    placement=FreeCAD.Placement(
+                        FreeCAD.Vector(1500.0, y, 900.0),
+                        FreeCAD.Rotation(FreeCAD.Vector(1, 0, 0), 90),
+                    ),
+                )
+            except Exception as e:
+                self.warnings.append("window creation failed: {}".format(e))
+                created += 1
+                continue
+            window.Hosts = [wall]
+            self.view_data[window.Name] = {"ShapeColor": (0.3, 0.6, 0.9)}
+            created += 2
+        self.expected["shape_instances"] += created
+
+    def build(self):
+        """Create all objects."""
+        top = self.add_part_chain()
+        self.add_links(top)
+        self.add_link_arrays()
+        self.add_draft_arrays()
+        self.add_colored_parts()
+        self.add_arch_hosts()
+        self.doc.recompute()
+
+    def get_type_counts(self):
+        """Count objects per TypeId."""
+        types = {}
+        for obj in self.doc.Objects:
+            types[obj.TypeId] = types.get(obj.TypeId, 0) + 1
+        return dict(sorted(types.items()))
+
+    def create_gui_document(self):
+        """
+        Create minimal GuiDocument.xml and DiffuseColor files.
+
+        returns dict member name → bytes
+        """
+        members = {}
+        lines = [
+            "<?xml version='1.0' encoding='utf-8'?>",
+            '<Document SchemaVersion="1">',
+            '    <ViewProviderData Count="{}">'.format(len(self.doc.Objects)),
+        ]
+        for obj in self.doc.Objects:
+            data = self.view_data.get(obj.Name, {})
+            properties = [
+                '<Property name="Visibility" type="App::PropertyBool">'
+                '<Bool value="{}"/></Property>'
+                "".format("true" if data.get("Visibility", obj.Visibility) else "false")
+            ]
+            if "ShapeColor" in data:
+                properties.append(
+                    '<Property name="ShapeColor" type="App::PropertyColor">'
+                    '<PropertyColor value="{}"/></Property>'
+                    "".format(pack_color(data["ShapeColor"]))
+                )
+            if "DiffuseColor" in data:
+                file_name = "DiffuseColor{}".format(len(members) or "")
+                colors = data["DiffuseColor"]
+                members[file_name] = struct.pack(
+                    "<I{}I".format(len(colors)),
+                    len(colors),
+                    *(pack_color(rgb) for rgb in colors)
+                )
+                properties.append(
+                    '<Property name="DiffuseColor" type="App::PropertyColorList">'
+                    '<ColorList file="{}"/></Property>'
+                    "".format(file_name)
+                )
+            lines.append('        <ViewProvider name="{}">'.format(obj.Name))
+            lines.append(
+                '            <Properties Count="{}">'.format(len(properties))
+            )
+            for prop in properties:
+                lines.append("                " + prop)
+            lines.append("            </Properties>")
+            lines.append("        </ViewProvider>")
+        lines.append("    </ViewProviderData>")
+        lines.append("</Document>")
+        members["GuiDocument.xml"] = ("\n".join(lines) + "\n").encode("utf-8")
+        return members
+
+    def set_view_properties(self):
+        """Set colors directly (FreeCAD GUI is running)."""
+        for name, data in self.view_data.items():
+            view = self.doc.getObject(name).ViewObject
+            if view is None:
+                continue
+            if "Visibility" in data:
+                view.Visibility = data["Visibility"]
+            if "ShapeColor" in data:
+                view.ShapeColor = data["ShapeColor"]
+            if "DiffuseColor" in data:
+                view.DiffuseColor = data["DiffuseColor"]
+
+    def add_members(self, filename, members):
+        """Add (or replace) members of the saved archive."""
+        temp_filename = filename + ".tmp"
+        with zipfile.ZipFile(filename) as source, zipfile.ZipFile(
+            temp_filename, "w", zipfile.ZIP_DEFLATED
+        ) as target:
+            for info in source.infolist():
+                if info.filename not in members:
+                    target.writestr(info, source.read(info.filename))
+            for name, data in members.items():
+                target.writestr(name, data)
+        os.replace(temp_filename, filename)
+
+    def save(self, directory):
+        """Save document and expected counts."""
+        import FreeCAD
+
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(directory, self.name + ".FCStd")
+        if FreeCAD.GuiUp:
+            self.set_view_properties()
+        self.doc.saveAs(filename)
+        if not FreeCAD.GuiUp:
+            self.add_members(filename, self.create_gui_document())
+        expected = {
+            "parameters": self.parameters,
+            "objects": len(self.doc.Objects),
+            "types": self.get_type_counts(),
+            "expected": self.expected,
+            "warnings": self.warnings,
+        }
+        with open(os.path.join(directory, self.name + ".expected.json"), "w") as f:
+            json.dump(expected, f, indent=4)
+        return filename, expected
+
+    def close(self):
+        """Close FreeCAD document."""
+        import FreeCAD
+
+        FreeCAD.closeDocument(self.doc.Name)
+
+
+def generate(preset, directory):
+    """Generate document for preset."""
+    document = StressDocument("stress_" + preset, PRESETS[preset])
+    try:
+        document.build()
+        filename, expected = document.save(directory)
+    finally:
+        document.close()
+    print(
+        "'{}': {} objects, {} expected shape instances"
+        "".format(filename, expected["objects"], expected["expected"]["shape_instances"])
+    )
+    for message in expected["warnings"]:
+        print("  warning: " + message)
+    return filename
+
+
+def main():
+    """Generate the requested presets."""
+    args = parse_args()
+    if args.freecad and args.freecad not in sys.path:
+        sys.path.append(args.freecad)
+    presets = [args.preset] if args.preset else sorted(PRESETS)
+    for preset in presets:
+        generate(preset, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,10 @@ import sys
 import bpy
 import os
 import math
+import importlib
+import logging
+import tempfile
+import time
 
 # import pprint
 
@@ -14,13 +18,36 @@ from .. import freecad_helper as fc_helper
 from .. import blender_helper as b_helper
 
 from . import helper
+from . import archive
+from . import array_instancer
+from . import datablock_index
+from . import doc_analysis
+from . import estimate
+from . import import_plan
+from . import log
 from . import guidata
-from .material import MaterialManager
+from . import docdata
+from . import mesh_builder
+from . import profiler
+from . import tessellation
+from . import tessellation_cache
+from . import tessellation_pool
+from .material import MaterialManager, MaterialRegistry
+from .weld import VertexWelder
+from .log import logger
 
 
 # set to True to triangulate all faces (will loose multimaterial info)
 TRIANGULATE = False
 
+# FreeCAD loading state -
+# shared by all imports in this Blender session.
+freecad_state = {
+    "additional_paths": False,
+    # already imported FreeCAD modules
+    "modules": set(),
+}
+
 
 class ImportFcstd(object):
     """Import fcstd files."""
@@ -34,17 +61,37 @@ class ImportFcstd(object):
         placement=True,
         scale=0.001,
         tessellation=0.10,
+        weld_tolerance=0.0,
+        use_stored_shapes=False,
+        array_instancing=False,
+        use_import_plan=False,
+        plan_directory=None,
+        dry_run=False,
+        share_meshes=True,
+        use_tessellation_cache=True,
+        tessellation_cache_dir=None,
+        tessellation_cache_max_size=tessellation_cache.DEFAULT_MAX_SIZE,
+        worker_count=0,
+        worker_freecadcmd=None,
+        keep_workers=True,
         auto_smooth_use=True,
         auto_smooth_angle=math.radians(85),
         skiphidden=True,
         filter_sketch=True,
         sharemats=True,
+        sharemats_across_imports=False,
         update_materials=False,
         obj_name_prefix="",
         obj_name_prefix_with_filename=False,
         links_as_collectioninstance=True,
         path_to_freecad=None,
         path_to_system_packages=None,
+        verbosity="WARNING",
+        profile=False,
+        profile_allocations=False,
+        profile_directory=None,
+        profile_export="NONE",
+        archive_use_mmap=False,
         report=None,
     ):
         """Init."""
@@ -55,32 +102,63 @@ class ImportFcstd(object):
             "update_only_modified_meshes": update_only_modified_meshes,
             "placement": placement,
             "tessellation": tessellation,
+            "weld_tolerance": weld_tolerance,
+            "use_stored_shapes": use_stored_shapes,
+            "array_instancing": array_instancing,
+            "use_import_plan": use_import_plan,
+            "plan_directory": plan_directory,
+            "dry_run": dry_run,
+            "share_meshes": share_meshes,
+            "use_tessellation_cache": use_tessellation_cache,
+            "tessellation_cache_dir": tessellation_cache_dir,
+            "tessellation_cache_max_size": tessellation_cache_max_size,
+            "worker_count": worker_count,
+            "worker_freecadcmd": worker_freecadcmd,
+            "keep_workers": keep_workers,
             "auto_smooth_use": auto_smooth_use,
             "auto_smooth_angle": auto_smooth_angle,
             "skiphidden": skiphidden,
             "filter_sketch": filter_sketch,
             "scale": scale,
             "sharemats": sharemats,
+            "sharemats_across_imports": sharemats_across_imports,
             "update_materials": update_materials,
             "obj_name_prefix_with_filename": obj_name_prefix_with_filename,
             "obj_name_prefix": obj_name_prefix,
             "links_as_collectioninstance": links_as_collectioninstance,
+            "verbosity": verbosity,
+            "profile": profile,
+            "profile_allocations": profile_allocations,
+            "profile_directory": profile_directory,
+            "profile_export": profile_export,
+            "archive_use_mmap": archive_use_mmap,
             "report": self.print_report,
         }
         self.path_to_freecad = path_to_freecad
         self.path_to_system_packages = path_to_system_packages
         self.report = report
+        log.set_verbosity(verbosity)
 
-        print("config", self.config)
-        self.doc = None
-        self.doc_filename = None
-        self.guidata = {}
+        logger.debug("config %s", self.config)
+        self.reset_document_state()
 
-        self.fcstd_collection = None
-        self.link_targets = None
-        self.fcstd_empty = None
+        self.material_registry = MaterialRegistry(
+            reuse_existing=self.config["sharemats_across_imports"]
+        )
 
-        self.imported_obj_names = []
+        self.geometry_settings = tessellation_cache.get_geometry_settings(
+            self.config, triangulate=TRIANGULATE
+        )
+        # the mesh additionally depends on the import scale
+        self.mesh_settings = dict(self.geometry_settings, scale=self.config["scale"])
+        # mesh_data from the worker processes - by cache key
+        self.tessellation_results = {}
+        self.tessellation_cache = None
+        if self.config["use_tessellation_cache"]:
+            self.tessellation_cache = tessellation_cache.TessellationCache(
+                self.config["tessellation_cache_dir"],
+                max_size=self.config["tessellation_cache_max_size"],
+            )
 
         self.typeid_filter_list = [
             "GeoFeature",
@@ -89,11 +167,61 @@ class ImportFcstd(object):
         if self.config["filter_sketch"]:
             self.typeid_filter_list.append("Sketcher::SketchObject")
 
-    def print_report(self, mode, data, pre_line=""):
-        """Multi print handling."""
-        b_helper.print_multi(
-            mode=mode, data=data, pre_line=pre_line, report=self.report,
-        )
+    def reset_document_state(self):
+        """
+        Reset everything that belongs to one imported document.
+
+        materials, tessellation results and caches stay -
+        so they are shared by all files of a batch import.
+        """
+        self.doc = None
+        self.doc_filename = None
+        self.archive = None
+        self.document_scan = None
+        # DocumentAnalysis - by document name
+        self.doc_analyses = {}
+        self.guidata = {}
+        # shapes loaded directly from the archive - by object name
+        self.stored_shapes = {}
+        # original ExpandArray values of expanded arrays - by object name
+        self.expanded_arrays = {}
+        # BREP content hashes - by (document name, object name)
+        self.content_hashes = {}
+
+        self.fcstd_collection = None
+        self.link_targets = None
+        self.fcstd_empty = None
+
+        # name lookup for all blender datablocks we create or update
+        self.datablocks = datablock_index.DatablockIndex()
+        self.imported_obj_names = set()
+        self.imported_mesh_names = set()
+        # (freecad_mesh_hash, material key) → bmesh used by this import
+        self.shared_meshes = {}
+        # result of a dry run (see estimate_doc)
+        self.estimate = None
+
+        self.profiler = profiler.NullProfiler()
+
+    def print_report(self, mode, data, pre_line="", force=False):
+        """
+        Multi print handling.
+
+        messages below the configured verbosity are dropped
+        before anything is formatted.
+        use force to report regardless of the verbosity.
+        """
+        level = log.get_level(mode)
+        if logger.isEnabledFor(level):
+            logger.log(level, "%s%s", pre_line, data)
+        elif force:
+            b_helper.print_colored(mode, data, pre_line)
+        else:
+            return
+        if self.report:
+            self.report(mode, b_helper.filter_ASCII_controlls(str(data)))
+        else:
+            b_helper.print_blender_console(mode, data, pre_line)
 
     def format_obj(self, obj, pre_line="", post_line=""):
         """Print object with nice formating."""
@@ -111,6 +239,8 @@ class ImportFcstd(object):
 
     def print_obj(self, obj, pre_line="", post_line="", end="\n"):
         """Print object with nice formating."""
+        if not logger.isEnabledFor(logging.INFO):
+            return
         message = ""
 
         message = self.format_obj(obj=obj)
@@ -120,13 +250,13 @@ class ImportFcstd(object):
 
     def print_debug_report(self):
         """print out some minimal debug things.."""
-        print("print_debug_report")
+        logger.debug("print_debug_report")
         import FreeCAD
-        print("FreeCAD version:", FreeCAD.Version())
+        logger.debug("FreeCAD version: %s", FreeCAD.Version())
         objects = FreeCAD.ActiveDocument.Objects
-        print("doc.Objects", len(objects))
+        logger.debug("doc.Objects %s", len(objects))
         for o in objects:
-            print(o, o.Name)
+            logger.debug("%s %s", o, o.Name)
 
     def handle_label_prefix(self, label):
         """Handle all label prefix processing."""
@@ -235,8 +365,7 @@ class ImportFcstd(object):
 
     def fix_link_target_name(self, bobj):
         """Fix name of link target object."""
-        bobj.name = bobj.name + "__lt"
-        return bobj.name
+        return self.datablocks.rename("objects", bobj, bobj.name + "__lt")
 
     def check_obj_visibility(self, obj):
         """Check if obj is visible."""
@@ -260,25 +389,14 @@ class ImportFcstd(object):
     def check_collections_for_bobj(self, bobj):
         """Search all collections for given bobj."""
         found_in_collections = None
-        for col in bpy.data.collections:
-            if bobj.name in col.objects:
-                if found_in_collections is None:
-                    found_in_collections = []
-                found_in_collections.append(col.name)
+        collection_names = self.datablocks.get_collections(bobj)
+        if collection_names:
+            found_in_collections = sorted(collection_names)
         return found_in_collections
 
     # ##########################################
     # object handling
 
-    def hascurves(self, shape):
-        """Check if shape has curves."""
-        import Part
-
-        for e in shape.Edges:
-            if not isinstance(e.Curve, (Part.Line, Part.LineSegment)):
-                return True
-        return False
-
     def handle_placement(
         self,
         pre_line,
@@ -343,7 +461,7 @@ class ImportFcstd(object):
         if func_data["collection"]:
             add_to_collection = False
             if self.config["update"]:
-                if bobj.name not in func_data["collection"].objects:
+                if not self.datablocks.in_collection(func_data["collection"], bobj):
                     add_to_collection = True
                 else:
                     # print(
@@ -356,7 +474,7 @@ class ImportFcstd(object):
                 add_to_collection = True
 
             if add_to_collection:
-                func_data["collection"].objects.link(bobj)
+                self.datablocks.link(func_data["collection"], bobj)
                 # print(
                 #     pre_line +
                 #     "'{}' add (tree_collections) to  '{}' "
@@ -365,11 +483,8 @@ class ImportFcstd(object):
         if not self.check_collections_for_bobj(bobj):
             # link to import collection - so that the object is visible.
             collection = self.fcstd_collection
-            collection.objects.link(bobj)
-            print(
-                pre_line + "'{}' add (tree_parents) to '{}' "
-                "".format(bobj, collection)
-            )
+            self.datablocks.link(collection, bobj)
+            logger.debug("%s'%s' add (tree_parents) to '%s' ", pre_line, bobj, collection)
 
     def update_tree_parents(self, func_data):
         """Update object tree."""
@@ -381,9 +496,11 @@ class ImportFcstd(object):
         #     pre_line + "  func_data[parent_bobj] '{}'".format(func_data["parent_bobj"])
         # )
         if bobj.parent is None and func_data["parent_bobj"] is not None:
-            print(
-                pre_line + "update_tree_parents" + "  obj '{}' set parent to '{}' "
-                "".format(bobj, func_data["parent_bobj"])
+            logger.debug(
+                "%supdate_tree_parents  obj '%s' set parent to '%s' ",
+                pre_line,
+                bobj,
+                func_data["parent_bobj"],
             )
             # print(
             #     pre_line + "  obj '{}' set parent to '{}' "
@@ -396,21 +513,24 @@ class ImportFcstd(object):
         self, func_data, obj_label, enable_import_scale=True
     ):
         """Create new object from bmesh."""
-        bmesh = bpy.data.meshes.new(name=obj_label)
-        bmesh.from_pydata(func_data["verts"], func_data["edges"], func_data["faces"])
-        bmesh.update()
         # handle import scalling
+        scale = 1.0
         if enable_import_scale:
             scale = self.config["scale"]
-            for v in bmesh.vertices:
-                v.co *= scale
-        bmesh.update()
-        bmesh["freecad_mesh_hash"] = func_data["freecad_mesh_hash"]
+        mesh_data = func_data["mesh_data"]
+        with self.profiler.phase("mesh_build"):
+            bmesh = mesh_builder.create_mesh_from_mesh_data(
+                obj_label, mesh_data, scale=scale, use_smooth=self.config["auto_smooth_use"],
+            )
+            self.profiler.add_geometry(len(mesh_data["verts"]), len(mesh_data["loop_totals"]))
+        self.datablocks.add("meshes", bmesh)
+        if func_data["freecad_mesh_hash"]:
+            bmesh["freecad_mesh_hash"] = func_data["freecad_mesh_hash"]
         return bmesh
 
     def create_bobj_from_bmesh(self, func_data, obj_label, bmesh):
         """Create new object from bmesh."""
-        bobj = bpy.data.objects.new(obj_label, bmesh)
+        bobj = self.datablocks.new("objects", obj_label, bmesh)
         # check if we already used the bmesh.
         # if bmesh.name in bpy.data.meshes:
         #     print(
@@ -425,82 +545,108 @@ class ImportFcstd(object):
                 bobj=bobj,
                 obj_label=obj_label,
                 sharemats=self.config["sharemats"],
+                material_registry=self.material_registry,
+                datablocks=self.datablocks,
                 report=self.config["report"],
                 report_preline=func_data["pre_line"] + "| ",
             )
-            material_manager.create_new()
+            with self.profiler.phase("materials"):
+                material_manager.create_new()
         else:
-            print(
-                func_data["pre_line"]
-                + " ignore material import. mesh already has material."
+            logger.debug(
+                "%s ignore material import. mesh already has material.", func_data["pre_line"]
             )
         func_data["bobj"] = bobj
         return bobj
 
+    def check_bmesh_unchanged(self, func_data, bmesh):
+        """Check if bmesh was created from the same FreeCAD geometry."""
+        return (
+            func_data["freecad_mesh_hash"] is not None
+            and bmesh.get("freecad_mesh_hash", None) == func_data["freecad_mesh_hash"]
+        )
+
+    def get_reusable_bmesh(self, func_data, mesh_label):
+        """Get existing mesh that can be used without update - or None."""
+        bmesh = self.datablocks.get("meshes", mesh_label)
+        if bmesh is not None:
+            if mesh_label not in self.imported_mesh_names and self.config["update"]:
+                if not (
+                    self.config["update_only_modified_meshes"]
+                    and self.check_bmesh_unchanged(func_data, bmesh)
+                ):
+                    bmesh = None
+        return bmesh
+
+    def get_mesh_share_key(self, func_data):
+        """
+        Get key to share the mesh of identical shapes - or None.
+
+        freecad_mesh_hash is placement independent -
+        so copies of one part at different places get the same key.
+        the materials live in the mesh -
+        so only objects with the same colors can share it.
+        """
+        if not self.config["share_meshes"] or not func_data["freecad_mesh_hash"]:
+            return None
+        material_key = None
+        gui = self.guidata.get(func_data["obj"].Name)
+        if gui:
+            material_key = import_plan.get_material_key(gui)
+        return (func_data["freecad_mesh_hash"], material_key)
+
+    def get_shared_bmesh(self, func_data):
+        """Get mesh already imported for identical geometry - or None."""
+        key = self.get_mesh_share_key(func_data)
+        bmesh = self.shared_meshes.get(key)
+        if bmesh is not None:
+            try:
+                bmesh.name
+            except ReferenceError:
+                # removed in the meantime.
+                del self.shared_meshes[key]
+                bmesh = None
+        return bmesh
+
     def create_or_get_bmesh(self, pre_line, func_data, mesh_label):
         """Create or get bmesh."""
         pre_line_orig = func_data["pre_line"]
-        print(pre_line_orig + "create_or_get_bmesh")
+        logger.debug("%screate_or_get_bmesh", pre_line_orig)
         pre_line = pre_line_orig + "  "
         func_data["pre_line"] = pre_line
 
-        bmesh = None
-        # bmesh_old_name = None
+        bmesh = func_data["reuse_bmesh"]
+        if bmesh is None:
+            bmesh = self.get_reusable_bmesh(func_data, mesh_label)
         bmesh_import = True
 
-        print(pre_line + "mesh_label:", mesh_label)
-        # print(pre_line + "bpy.data.meshes ({})".format(len(bpy.data.meshes)))
-        # for mesh in bpy.data.meshes:
-        #     print(pre_line + " - ", mesh)
-        if mesh_label in bpy.data.meshes:
-            bmesh = bpy.data.meshes[mesh_label]
-            print(pre_line + "use found bmesh.")
+        logger.debug("%smesh_label: %s", pre_line, mesh_label)
+        if bmesh:
+            logger.debug("%suse found bmesh.", pre_line)
             bmesh_import = False
-            # print(
-            #     pre_line
-            #     + "bmesh.freecad_mesh_hash ",
-            #     bmesh.get("freecad_mesh_hash", None)
-            # )
-            # print(
-            #     pre_line
-            #     + "func_data[freecad_mesh_hash] ",
-            #     func_data["freecad_mesh_hash"]
-            # )
-            # print(pre_line + "mesh_label", mesh_label)
-            # print(pre_line + "self.imported_obj_names")
-            # for obj_name in self.imported_obj_names:
-            #     print(pre_line + " - ", obj_name)
-            if mesh_label not in self.imported_obj_names and self.config["update"]:
-                if self.config["update_only_modified_meshes"]:
-                    print(pre_line + "update_only_modified_meshes: TODO")
-                    # bmesh.get("freecad_mesh_hash", None)
-                    # func_data["freecad_mesh_hash"]
-                # rename old mesh -
-                # this way the new mesh can get the original name.
-                helper.rename_old_data(bpy.data.meshes, mesh_label)
-                # bmesh_old_name = helper.rename_old_data(bpy.data.meshes, mesh_label)
-                bmesh_import = True
+        elif self.datablocks.contains("meshes", mesh_label):
+            # rename old mesh -
+            # this way the new mesh can get the original name.
+            self.datablocks.rename_old("meshes", mesh_label)
         # create bmesh
         if bmesh_import:
-            print(pre_line + "import bmesh.")
+            logger.debug("%simport bmesh.", pre_line)
             bmesh = self.create_bmesh_from_func_data(
                 func_data, mesh_label, enable_import_scale=True
             )
             # print(pre_line + "create_bmesh_from_func_data: ", bmesh)
-            print(
-                pre_line + "set auto_smooth: ({}) '{}°'"
-                "".format(
-                    self.config["auto_smooth_use"],
-                    math.degrees(self.config["auto_smooth_angle"]),
-                )
+            logger.debug(
+                "%sset auto_smooth: (%s) '%s°'",
+                pre_line,
+                self.config["auto_smooth_use"],
+                math.degrees(self.config["auto_smooth_angle"]),
             )
             bmesh.use_auto_smooth = self.config["auto_smooth_use"]
             bmesh.auto_smooth_angle = self.config["auto_smooth_angle"]
-            if self.config["auto_smooth_use"]:
-                for f in bmesh.polygons:
-                    f.use_smooth = True
-            if mesh_label not in self.imported_obj_names:
-                self.imported_obj_names.append(mesh_label)
+        self.imported_mesh_names.add(mesh_label)
+        share_key = self.get_mesh_share_key(func_data)
+        if share_key:
+            self.shared_meshes.setdefault(share_key, bmesh)
         # return (bmesh, bmesh_old_name)
         func_data["pre_line"] = pre_line_orig
         return bmesh
@@ -508,30 +654,33 @@ class ImportFcstd(object):
     def create_or_update_bobj(self, pre_line, func_data, obj_label, bmesh):
         """Create or update bobj."""
         pre_line_orig = func_data["pre_line"]
-        print(pre_line_orig + "create_or_update_bobj")
+        logger.debug("%screate_or_update_bobj", pre_line_orig)
         pre_line = pre_line_orig + "  "
         func_data["pre_line"] = pre_line
         bobj = None
         is_new = False
         bobj_import = True
         # locate existing object (object with same name)
-        if obj_label in bpy.data.objects:
-            bobj = bpy.data.objects[obj_label]
-            print(pre_line + "found bobj!")
+        if self.datablocks.contains("objects", obj_label):
+            bobj = self.datablocks.get("objects", obj_label)
+            logger.debug("%sfound bobj!", pre_line)
             bobj_import = False
             if obj_label not in self.imported_obj_names and self.config["update"]:
-                print(
-                    pre_line + "Replacing existing object mesh: {}" "".format(obj_label)
-                )
+                logger.debug("%sReplacing existing object mesh: %s", pre_line, obj_label)
                 # update only the mesh of existing object.
                 # print(self.imported_obj_names)
-                if len(bmesh.materials) <= 0:
-                    # TODO: fix this!!
-                    # correctly handle multimaterials
-                    # copy old materials to new mesh:
-                    for mat in bobj.data.materials:
-                        bmesh.materials.append(mat)
-                bobj.data = bmesh
+                old_bmesh = bobj.data
+                if old_bmesh != bmesh:
+                    if len(bmesh.materials) <= 0:
+                        # TODO: fix this!!
+                        # correctly handle multimaterials
+                        # copy old materials to new mesh:
+                        for mat in old_bmesh.materials:
+                            bmesh.materials.append(mat)
+                    bobj.data = bmesh
+                    # clean up replaced mesh
+                    if old_bmesh and old_bmesh.users == 0:
+                        self.datablocks.remove("meshes", old_bmesh)
                 # self.handle_material_update(func_data, bobj)
                 bobj_import = False
         # create bobj
@@ -561,7 +710,7 @@ class ImportFcstd(object):
                 if not create it
         """
         pre_line_orig = func_data["pre_line"]
-        print(pre_line_orig + "add_or_update_blender_obj")
+        logger.debug("%sadd_or_update_blender_obj", pre_line_orig)
         pre_line = pre_line_orig + "  "
         func_data["pre_line"] = pre_line
 
@@ -604,31 +753,30 @@ class ImportFcstd(object):
                 # print(pre_line + "is not link")
                 self.handle_placement(pre_line, func_data["obj"], bobj)
 
-        if bobj.name not in self.imported_obj_names:
-            self.imported_obj_names.append(bobj.name)
+        self.imported_obj_names.add(bobj.name)
         func_data["bobj"] = bobj
         func_data["pre_line"] = pre_line_orig
 
     def sub_collection_add_or_update(self, func_data, collection_label):
         """Part-Collection handle add or update."""
-        print(
-            func_data["pre_line"]
-            + "sub_collection_add_or_update: '{}'".format(collection_label)
+        logger.debug(
+            "%ssub_collection_add_or_update: '%s'", func_data["pre_line"], collection_label
         )
         temp_collection = None
         if self.config["update"]:
-            if collection_label in bpy.data.collections:
-                temp_collection = bpy.data.collections[collection_label]
+            temp_collection = self.datablocks.get("collections", collection_label)
         else:
-            helper.rename_old_data(bpy.data.collections, collection_label)
+            self.datablocks.rename_old("collections", collection_label)
 
         if not temp_collection:
             # create new
-            temp_collection = bpy.data.collections.new(collection_label)
-            func_data["collection"].children.link(temp_collection)
-            print(
-                func_data["pre_line"] + "'{}' add to '{}' "
-                "".format(func_data["bobj"], func_data["collection"],)
+            temp_collection = self.datablocks.new("collections", collection_label)
+            self.datablocks.link_child(func_data["collection"], temp_collection)
+            logger.debug(
+                "%s'%s' add to '%s' ",
+                func_data["pre_line"],
+                func_data["bobj"],
+                func_data["collection"],
             )
         else:
             # bpy.context.scene.collection.children.link(self.fcstd_collection)
@@ -641,57 +789,45 @@ class ImportFcstd(object):
     def set_obj_parent_and_collection(self, pre_line, func_data, bobj):
         """Set Object parent and collection."""
         bobj.parent = func_data["parent_bobj"]
-        print(
-            pre_line + "'{}' set parent to '{}' "
-            "".format(bobj, func_data["parent_bobj"])
-        )
+        logger.debug("%s'%s' set parent to '%s' ", pre_line, bobj, func_data["parent_bobj"])
 
         # add object to current collection
         collection = func_data["collection"]
         if not collection:
             collection = self.fcstd_collection
-        if bobj.name not in collection.objects:
-            collection.objects.link(bobj)
-            # print(
-            #     pre_line +
-            #     "'{}' add to '{}' "
-            #     "".format(bobj, collection)
-            # )
+        self.datablocks.link(collection, bobj)
 
     def parent_empty_add_or_update(self, func_data, empty_label):
         """Parent Empty handle add or update."""
-        print(
-            func_data["pre_line"]
-            + "parent_empty_add_or_update: '{}'".format(empty_label)
-        )
+        logger.debug("%sparent_empty_add_or_update: '%s'", func_data["pre_line"], empty_label)
         pre_line = func_data["pre_line"] + " → "
         empty_bobj = None
 
         obj = func_data["obj"]
 
-        print(
-            pre_line + "current parent_obj ", self.format_obj(func_data["parent_obj"])
+        logger.debug(
+            "%scurrent parent_obj  %s", pre_line, log.lazy(self.format_obj, func_data["parent_obj"])
         )
 
-        if empty_label in bpy.data.objects:
+        if self.datablocks.contains("objects", empty_label):
             # print(
             #     pre_line +
             #     "'{}' already in objects list.".format(empty_label)
             # )
             if self.config["update"]:
-                empty_bobj = bpy.data.objects[empty_label]
+                empty_bobj = self.datablocks.get("objects", empty_label)
                 # print(
                 #     pre_line +
                 #     "update: '{}'".format(empty_bobj)
                 # )
             else:
-                renamed_to = helper.rename_old_data(bpy.data.objects, empty_label)
-                print(pre_line + "overwrite - renamed to " "'{}'".format(renamed_to))
+                renamed_to = self.datablocks.rename_old("objects", empty_label)
+                logger.debug("%soverwrite - renamed to '%s'", pre_line, renamed_to)
 
         flag_new = False
         if empty_bobj is None:
-            print(pre_line + "create new empty_bobj '{}'".format(empty_label))
-            empty_bobj = bpy.data.objects.new(name=empty_label, object_data=None)
+            logger.debug("%screate new empty_bobj '%s'", pre_line, empty_label)
+            empty_bobj = self.datablocks.new("objects", empty_label, None)
             empty_bobj.empty_display_size = self.config["scale"] * 10
             self.set_obj_parent_and_collection(pre_line, func_data, empty_bobj)
 
@@ -741,22 +877,18 @@ class ImportFcstd(object):
         self, func_data, pre_line, obj_label, base_collection
     ):
         """Create instance of given collection."""
-        result_bobj = bpy.data.objects.new(name=obj_label, object_data=None)
+        result_bobj = self.datablocks.new("objects", obj_label, None)
         result_bobj.instance_collection = base_collection
         result_bobj.instance_type = "COLLECTION"
         result_bobj.empty_display_size = self.config["scale"] * 10
 
         # TODO: CHECK where to add this!
         if func_data["collection"]:
-            func_data["collection"].objects.link(result_bobj)
-            print(
-                pre_line + "'{}' add to '{}' "
-                "".format(result_bobj, func_data["collection"])
-            )
+            self.datablocks.link(func_data["collection"], result_bobj)
+            logger.debug("%s'%s' add to '%s' ", pre_line, result_bobj, func_data["collection"])
         # result_bobj.parent = func_data["parent_bobj"]
         # result_bobj.parent = parent_obj
-        if result_bobj.name in bpy.context.scene.collection.objects:
-            bpy.context.scene.collection.objects.unlink(result_bobj)
+        self.datablocks.unlink(bpy.context.scene.collection, result_bobj)
 
         return result_bobj
 
@@ -770,8 +902,8 @@ class ImportFcstd(object):
             if link_target_bobj:
                 object_data = link_target_bobj.data
             else:
-                object_data = bpy.data.meshes.new(name=obj_label + ".temp")
-            result_bobj = bpy.data.objects.new(name=obj_label, object_data=object_data)
+                object_data = self.datablocks.new("meshes", obj_label + ".temp")
+            result_bobj = self.datablocks.new("objects", obj_label, object_data)
             result_bobj.empty_display_size = self.config["scale"] * 10
         else:
             self.config["report"](
@@ -806,7 +938,7 @@ class ImportFcstd(object):
     ):
         """Handle sub object."""
         pre_line_orig = func_data["pre_line"]
-        print(pre_line_orig + "handle__sub_object_import")
+        logger.debug("%shandle__sub_object_import", pre_line_orig)
         pre_line = pre_line_orig + "  "
         func_data["pre_line"] = pre_line
         link_source = None
@@ -819,21 +951,21 @@ class ImportFcstd(object):
                 # parent_obj,
                 obj,
             )
-            print(
-                pre_line
-                + "set special link obj_label: "
-                + b_helper.colors.fg.green
-                + "'{}'".format(obj_label)
-                + b_helper.colors.reset
+            logger.debug(
+                "%sset special link obj_label: %s'%s'%s",
+                pre_line,
+                b_helper.colors.fg.green,
+                obj_label,
+                b_helper.colors.reset,
             )
         link_source = func_data["link_source"]
         if is_link_source:
             link_source = obj
         # debug output
-        print(pre_line + ("*" * 42))
-        print(pre_line + "obj:         " + self.format_obj(obj))
-        print(pre_line + "parent_obj:  " + self.format_obj(parent_obj))
-        print(pre_line + "parent_bobj:  {}".format(parent_bobj))
+        logger.debug("%s%s", pre_line, "*" * 42)
+        logger.debug("%sobj:         %s", pre_line, log.lazy(self.format_obj, obj))
+        logger.debug("%sparent_obj:  %s", pre_line, log.lazy(self.format_obj, parent_obj))
+        logger.debug("%sparent_bobj:  %s", pre_line, parent_bobj)
         # # print(pre_line + "func_data[is_link]:  {}".format(func_data["is_link"]))
         # is_link_color = b_helper.colors.fg.red
         # if func_data["is_link"]:
@@ -876,7 +1008,7 @@ class ImportFcstd(object):
         func_data_new["parent_bobj"] = parent_bobj
         func_data_new["is_link"] = func_data["is_link"]
         func_data_new["link_source"] = link_source
-        print(pre_line + "import_obj ...")
+        logger.debug("%simport_obj ...", pre_line)
         self.import_obj(
             func_data=func_data_new, pre_line=pre_line,
         )
@@ -905,12 +1037,7 @@ class ImportFcstd(object):
         pre_line_orig = func_data["pre_line"]
         pre_line = pre_line_follow
         func_data["pre_line"] = pre_line
-        print(
-            pre_line_start
-            + "handle__sub_objects"
-            # + " - sub_objects '{}'"
-            # + "".format(sub_objects)
-        )
+        logger.debug("%shandle__sub_objects", pre_line_start)
         sub_filter_visible = False
         if not isinstance(include_only_visible, list):
             # convert True or False to list
@@ -931,8 +1058,8 @@ class ImportFcstd(object):
         #     "is_link_source '{}'"
         #     "".format(is_link_source)
         # )
-        print(pre_line + "parent_obj:  " + self.format_obj(parent_obj))
-        print(pre_line + "parent_bobj:  {}".format(parent_bobj))
+        logger.debug("%sparent_obj:  %s", pre_line, log.lazy(self.format_obj, parent_obj))
+        logger.debug("%sparent_bobj:  %s", pre_line, parent_bobj)
         sub_objects = fc_helper.filtered_objects(
             sub_objects, include_only_visible=sub_filter_visible
         )
@@ -998,7 +1125,7 @@ class ImportFcstd(object):
         parent_label = self.get_obj_label(parent_obj)
         if func_data["is_link"] and func_data["obj_label"]:
             parent_label = func_data["obj_label"]
-        print(pre_line + "handle__object_with_sub_objects '{}'".format(parent_label))
+        logger.debug("%shandle__object_with_sub_objects '%s'", pre_line, parent_label)
         # print(pre_line + "is_link_source '{}'".format(is_link_source))
         # pre_line += "→ "
 
@@ -1013,11 +1140,11 @@ class ImportFcstd(object):
         self.print_obj(
             func_data["parent_obj"], pre_line=pre_line + "# func_data[parent_obj]",
         )
-        print(pre_line + "# func_data[parent_bobj]", func_data["parent_bobj"])
+        logger.debug("%s# func_data[parent_bobj] %s", pre_line, func_data["parent_bobj"])
 
         self.parent_empty_add_or_update(func_data, parent_label)
         parent_bobj = func_data["parent_bobj"]
-        print(pre_line + "fresh created parent_bobj ", parent_bobj)
+        logger.debug("%sfresh created parent_bobj  %s", pre_line, parent_bobj)
 
         if len(sub_objects) > 0:
             self.handle__sub_objects(
@@ -1041,7 +1168,7 @@ class ImportFcstd(object):
     def handle__ObjectWithElementList(self, func_data, is_link_source=False):
         """Handle Part::Feature objects."""
         pre_line_orig = func_data["pre_line"]
-        print(pre_line_orig + "handle__ObjectWithElementList")
+        logger.debug("%shandle__ObjectWithElementList", pre_line_orig)
         pre_line = pre_line_orig + "  "
         func_data["pre_line"] = pre_line
         # fc_helper.print_objects(
@@ -1061,9 +1188,10 @@ class ImportFcstd(object):
     def handle__PartFeaturePython_Array(self, func_data):
         """Handle Part::Feature objects."""
         pre_line_orig = func_data["pre_line"]
-        print(
-            pre_line_orig + "handle__PartFeaturePython_Array",
-            self.format_obj(func_data["obj"]),
+        logger.debug(
+            "%shandle__PartFeaturePython_Array %s",
+            pre_line_orig,
+            log.lazy(self.format_obj, func_data["obj"]),
         )
         pre_line = pre_line_orig + "  "
         func_data["pre_line"] = pre_line
@@ -1075,11 +1203,19 @@ class ImportFcstd(object):
         # print(pre_line + "Count:", func_data["obj"].Count)
         # print(pre_line + "ExpandArray:", func_data["obj"].ExpandArray)
         # print(pre_line + "expand Array")
-        # TODO: this currently has only any effect in the GUI
-        func_data["obj"].ExpandArray = True
-        self.doc.recompute()
+        # arrays are expanded by expand_arrays before the document recompute.
+        # arrays that appear later (linked documents) are recomputed on their own.
+        obj = func_data["obj"]
+        if self.check_array_instancing(obj):
+            self.handle__PartFeaturePython_ArrayInstances(func_data)
+            func_data["pre_line"] = pre_line_orig
+            return
+        if not obj.ExpandArray:
+            self.expanded_arrays[obj.Name] = obj.ExpandArray
+            obj.ExpandArray = True
+            obj.recompute()
         # print(pre_line + "ExpandArray:", func_data["obj"].ExpandArray)
-        print(pre_line + "ElementList:", func_data["obj"].ElementList)
+        logger.debug("%sElementList: %s", pre_line, func_data["obj"].ElementList)
         # print(
         #     pre_line
         #     + "call handle__ObjectWithElementList with "
@@ -1091,12 +1227,126 @@ class ImportFcstd(object):
         self.handle__ObjectWithElementList(func_data, is_link_source=True)
         func_data["pre_line"] = pre_line_orig
 
+    def check_array_instancing(self, obj):
+        """Check if array should be imported as instances of its base object."""
+        if not self.config["array_instancing"]:
+            return False
+        base = getattr(obj, "Base", None)
+        return (
+            base is not None
+            and base.isDerivedFrom("Part::Feature")
+            and hasattr(obj, "PlacementList")
+        )
+
+    def get_array_element_placements(self, obj):
+        """
+        Get placements and scales of all visible array elements.
+
+        the placements are relative to the array object.
+        """
+        placements = list(obj.PlacementList)
+        if not placements:
+            # no link array - ask the (expanded) elements.
+            placements = [element.Placement for element in obj.ElementList]
+        scales = list(getattr(obj, "ScaleList", []))
+        if len(scales) != len(placements):
+            scales = None
+        visibility = list(obj.VisibilityList)
+        visible = [
+            index
+            for index in range(len(placements))
+            if index >= len(visibility) or visibility[index]
+        ]
+        if len(visible) != len(placements):
+            placements = [placements[index] for index in visible]
+            if scales:
+                scales = [scales[index] for index in visible]
+        return placements, scales
+
+    def add_or_update_array_base(self, func_data, base):
+        """
+        Create or update the base object the array instances.
+
+        the base object lives in the link_targets collection -
+        its mesh is shared with a normal import of the base.
+        """
+        pre_line = func_data["pre_line"]
+        base_label = self.get_obj_label(base)
+        func_data_base = self.create_func_data()
+        func_data_base["obj"] = base
+        func_data_base["pre_line"] = pre_line + "  "
+        self.create_mesh_from_shape(func_data_base, mesh_label=base_label)
+        if func_data_base["reuse_bmesh"] is None and not mesh_builder.has_geometry(
+            func_data_base["mesh_data"]
+        ):
+            return None
+        bmesh = self.create_or_get_bmesh(pre_line, func_data_base, base_label)
+        _, base_bobj = self.create_or_update_bobj(
+            pre_line, func_data_base, base_label + "__instance_base", bmesh
+        )
+        self.datablocks.link(self.link_targets, base_bobj)
+        self.imported_obj_names.add(base_bobj.name)
+        return base_bobj
+
+    def handle__PartFeaturePython_ArrayInstances(self, func_data):
+        """
+        Import array as Geometry Nodes instances.
+
+        instead of one object per array element
+        the base object is imported once
+        and instanced on a point cloud of the element placements.
+        """
+        pre_line = func_data["pre_line"]
+        obj = func_data["obj"]
+        logger.debug("%shandle__PartFeaturePython_ArrayInstances", pre_line)
+        base_bobj = self.add_or_update_array_base(func_data, obj.Base)
+        if base_bobj is None:
+            logger.debug("%s→ base has no geometry.", pre_line)
+            return
+
+        placements, scales = self.get_array_element_placements(obj)
+        positions, rotations, scales = array_instancer.placements_to_transforms(
+            placements, scales, import_scale=self.config["scale"]
+        )
+        obj_label = self.get_obj_label(obj)
+        with self.profiler.phase("mesh_build"):
+            bmesh = array_instancer.get_or_create_point_mesh(
+                self.datablocks, obj_label, positions, rotations, scales
+            )
+            self.profiler.add_geometry(len(positions), 0)
+
+        bobj = None
+        if obj_label not in self.imported_obj_names:
+            bobj = self.datablocks.get("objects", obj_label)
+            # an empty of an import without instancing can not take the points.
+            if bobj is not None and not (self.config["update"] and bobj.data is not None):
+                renamed_to = self.datablocks.rename_old("objects", obj_label)
+                logger.debug("%soverwrite - renamed to '%s'", pre_line, renamed_to)
+                bobj = None
+        if bobj is None:
+            bobj = self.datablocks.new("objects", obj_label, bmesh)
+        elif bobj.data != bmesh:
+            old_bmesh = bobj.data
+            bobj.data = bmesh
+            if old_bmesh and old_bmesh.users == 0:
+                self.datablocks.remove("meshes", old_bmesh)
+        array_instancer.set_instance_modifier(bobj, base_bobj)
+        self.handle_placement(pre_line, obj, bobj)
+        logger.debug(
+            "%s→ %s instances of '%s'", pre_line, len(positions), base_bobj.name
+        )
+
+        self.imported_obj_names.add(bobj.name)
+        func_data["bobj"] = bobj
+        func_data["update_tree"] = True
+
     def handle__PartFeaturePython_ArchWithHostChilds(self, func_data):
         """Handle Part::Feature Arch objects with HostsChilds."""
         pre_line_orig = func_data["pre_line"]
-        print(
-            pre_line_orig + "handle__PartFeaturePython_ArchWithHostChilds",
-            self.format_obj(func_data["obj"]),
+        logger.debug(
+            "%shandle__PartFeaturePython_ArchWithHostChilds %s",
+            pre_line_orig,
+            log.lazy(self.format_obj, func_data["obj"]),
         )
         pre_line = pre_line_orig + "  "
         func_data["pre_line"] = pre_line
@@ -1106,7 +1356,7 @@ class ImportFcstd(object):
         self.handle__PartFeature(func_data)
         # handle childs
         original_parent = func_data["parent_bobj"]
-        obj_childs = fc_helper.object_get_HostChilds(obj)
+        obj_childs = self.get_document_analysis(obj.Document).get_host_childs(obj)
         # print(pre_line + "obj_childs:", obj_childs)
         # print(pre_line + "len(obj_childs):", len(obj_childs))
         self.handle__object_with_sub_objects(func_data, obj_childs)
@@ -1117,9 +1367,10 @@ class ImportFcstd(object):
     def handle__PartFeaturePython(self, func_data, pre_line=""):
         """Handle Part::FeaturePython objects."""
         obj = func_data["obj"]
-        if hasattr(obj, "ExpandArray") and hasattr(obj, "ElementList"):
+        kind = self.get_document_analysis(obj.Document).get_feature_python_kind(obj)
+        if kind == "Array":
             self.handle__PartFeaturePython_Array(func_data)
-        elif hasattr(obj, "ArrayType"):
+        elif kind == "ArrayType":
             self.config["report"](
                 {"WARNING"},
                 (
@@ -1129,10 +1380,10 @@ class ImportFcstd(object):
                 ),
                 pre_line,
             )
-        elif len(fc_helper.object_get_HostChilds(obj)) > 0:
+        elif kind == "ArchWithHostChilds":
             # Arch Workbench - ArchComponent
             self.handle__PartFeaturePython_ArchWithHostChilds(func_data)
-        elif hasattr(obj, "Hosts"):
+        elif kind == "Hosts":
             # Arch Workbench - Childs
             self.handle__PartFeature(func_data)
 
@@ -1170,28 +1421,22 @@ class ImportFcstd(object):
         # pre_line_sub = pre_line_orig + "├─ "
         pre_line_follow = pre_line_orig + "│   "
         pre_line_end = pre_line_orig + "└────────── "
-        print(
-            pre_line_start + "add_or_update_collection_instance '{}'"
-            "".format(obj_label)
-        )
+        logger.debug("%sadd_or_update_collection_instance '%s'", pre_line_start, obj_label)
         func_data["pre_line"] = pre_line_follow
         # pre_line = pre_line_sub
         pre_line = pre_line_follow
 
-        print(pre_line + "obj_label '{}'".format(obj_label))
-        print(pre_line + "instance_target_label '{}'".format(instance_target_label))
-        print(
-            pre_line + "func_data[collection] '{}'" "".format(func_data["collection"])
-        )
+        logger.debug("%sobj_label '%s'", pre_line, obj_label)
+        logger.debug("%sinstance_target_label '%s'", pre_line, instance_target_label)
+        logger.debug("%sfunc_data[collection] '%s'", pre_line, func_data["collection"])
 
         base_collection = None
         bobj = None
-        if instance_target_label in bpy.data.collections:
-            base_collection = bpy.data.collections[instance_target_label]
+        base_collection = self.datablocks.get("collections", instance_target_label)
+        if base_collection is not None:
             flag_new = False
-            if obj_label in bpy.data.objects:
-                bobj = bpy.data.objects[obj_label]
-            else:
+            bobj = self.datablocks.get("objects", obj_label)
+            if bobj is None:
                 bobj = self.create_collection_instance(
                     func_data, pre_line_follow, obj_label, base_collection
                 )
@@ -1219,7 +1464,7 @@ class ImportFcstd(object):
                 pre_line,
             )
             # return False
-        print(pre_line_end + "")
+        logger.debug("%s", pre_line_end)
         func_data["pre_line"] = pre_line_orig
 
     def add_or_update_link_instance(
@@ -1235,19 +1480,19 @@ class ImportFcstd(object):
         # pre_line_sub = pre_line_orig + "├─ "
         pre_line_follow = pre_line_orig + "│   "
         pre_line_end = pre_line_orig + "└────────── "
-        print(pre_line_start + "add_or_update_link_instance '{}'" "".format(obj_label))
+        logger.debug("%sadd_or_update_link_instance '%s'", pre_line_start, obj_label)
         func_data["pre_line"] = pre_line_follow
         # pre_line = pre_line_sub
         pre_line = pre_line_follow
 
-        print(pre_line + "obj_label '{}'".format(obj_label))
-        print(pre_line + "link_target_label '{}'".format(link_target_label))
+        logger.debug("%sobj_label '%s'", pre_line, obj_label)
+        logger.debug("%slink_target_label '%s'", pre_line, link_target_label)
 
         link_target_bobj = None
         bobj = None
-        if link_target_label in bpy.data.objects:
-            link_target_bobj = bpy.data.objects[link_target_label]
-            print(pre_line + "# link_target_bobj ", link_target_bobj)
+        link_target_bobj = self.datablocks.get("objects", link_target_label)
+        if link_target_bobj is not None:
+            logger.debug("%s# link_target_bobj  %s", pre_line, link_target_bobj)
         else:
             self.config["report"](
                 {"WARNING"},
@@ -1260,14 +1505,14 @@ class ImportFcstd(object):
             )
             # return False
         flag_new = False
-        if obj_label in bpy.data.objects:
-            bobj = bpy.data.objects[obj_label]
-            print(pre_line + "# bobj already here: ", bobj)
+        bobj = self.datablocks.get("objects", obj_label)
+        if bobj is not None:
+            logger.debug("%s# bobj already here:  %s", pre_line, bobj)
         else:
             bobj = self.create_link_instance(
                 func_data, pre_line_follow, obj_label, link_target_bobj, link_target_obj
             )
-            print(pre_line + "# created new bobj: ", bobj)
+            logger.debug("%s# created new bobj:  %s", pre_line, bobj)
             flag_new = True
         # print(
         #     pre_line +
@@ -1292,26 +1537,28 @@ class ImportFcstd(object):
             #     pre_line + "    "
             #     "bobj '{}' ".format(bobj.location)
             # )
-            print(pre_line + "# bobj.data: ", bobj.data)
+            logger.debug("%s# bobj.data:  %s", pre_line, bobj.data)
             if bobj.data:
                 if bobj.data.name != link_target_label:
-                    if link_target_label in bpy.data.meshes:
-                        print(
-                            pre_line
-                            + "update / relink '{}' to original link target '{}'"
-                            "".format(obj_label, link_target_label)
+                    if self.datablocks.contains("meshes", link_target_label):
+                        logger.debug(
+                            "%supdate / relink '%s' to original link target '%s'",
+                            pre_line,
+                            obj_label,
+                            link_target_label,
                         )
                         old_mesh = bobj.data
-                        bobj.data = bpy.data.meshes[link_target_label]
+                        bobj.data = self.datablocks.get("meshes", link_target_label)
                         # clean up temporary mesh
                         if old_mesh.users == 0:
-                            bpy.data.meshes.remove(old_mesh)
+                            self.datablocks.remove("meshes", old_mesh)
                     else:
-                        print(
-                            pre_line + "→ link_target_label not in bpy.data.meshes "
+                        logger.debug(
+                            "%s→ link_target_label not in bpy.data.meshes "
                             "Something wired going on.... "
                             "it seems to working..."
-                            "TODO: maybe CHECK"
+                            "TODO: maybe CHECK",
+                            pre_line,
                         )
                 # else:
                 #     print(
@@ -1320,12 +1567,12 @@ class ImportFcstd(object):
                 #         "".format(bobj.data.name, link_target_label)
                 #     )
             else:
-                print(pre_line + "→ bobj.data == None " "→ maybe this is a Empty.")
+                logger.debug("%s→ bobj.data == None → maybe this is a Empty.", pre_line)
 
             func_data["bobj"] = bobj
             func_data["update_tree"] = True
 
-        print(pre_line_end + "")
+        logger.debug("%s", pre_line_end)
         func_data["pre_line"] = pre_line_orig
 
     def add_or_update_link_target(
@@ -1356,13 +1603,10 @@ class ImportFcstd(object):
         #     self.imported_obj_names
         # )
 
-        if obj_linkedobj_label in bpy.data.objects or (
+        if self.datablocks.contains("objects", obj_linkedobj_label) or (
             obj_linkedobj_label in self.imported_obj_names
         ):
-            print(
-                pre_line + "→ already imported/updated '{}'."
-                "".format(obj_linkedobj_label)
-            )
+            logger.debug("%s→ already imported/updated '%s'.", pre_line, obj_linkedobj_label)
         else:
             self.print_obj(
                 obj,
@@ -1397,7 +1641,7 @@ class ImportFcstd(object):
             # set collection to link_target
             # this way the imports get definitly added to the scene.
             # func_data["collection"] = self.link_targets
-            print(pre_line + "§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§")
+            logger.debug("%s%s", pre_line, "§" * 42)
             func_data_obj_linked = self.create_func_data()
             func_data_obj_linked["obj"] = obj_linkedobj
             func_data_obj_linked["collection"] = self.link_targets
@@ -1407,7 +1651,7 @@ class ImportFcstd(object):
             func_data_obj_linked = self.import_obj(
                 func_data=func_data_obj_linked, pre_line=pre_line + "    ",
             )
-            print(pre_line + "§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§§")
+            logger.debug("%s%s", pre_line, "§" * 42)
             bobj = func_data_obj_linked["bobj"]
             # print(
             #    pre_line +
@@ -1430,9 +1674,9 @@ class ImportFcstd(object):
             #         )
             # this has no parent as we use only the raw obj.
             self.print_obj(func_data_obj_linked["obj"], pre_line + "$ used obj: ")
-            print(pre_line + "$ created bobj: ", bobj)
-            print(pre_line + "$ bobj.parent: ", bobj.parent)
-            print(pre_line + "$ func_data[parent_bobj]: ", func_data["parent_bobj"])
+            logger.debug("%s$ created bobj:  %s", pre_line, bobj)
+            logger.debug("%s$ bobj.parent:  %s", pre_line, bobj.parent)
+            logger.debug("%s$ func_data[parent_bobj]:  %s", pre_line, func_data["parent_bobj"])
             # bobj.parent = None
             self.reset_placement_position(bobj)
 
@@ -1455,11 +1699,8 @@ class ImportFcstd(object):
             # self.parent_empty_add_or_update(
             #     func_data_obj_linked, obj_linkedobj_label)
             # add new object to collection.
-            func_data_obj_linked["collection"].objects.link(bobj)
-            print(
-                pre_line + "'{}' add to '{}' "
-                "".format(bobj, func_data_obj_linked["collection"])
-            )
+            self.datablocks.link(func_data_obj_linked["collection"], bobj)
+            logger.debug("%s'%s' add to '%s' ", pre_line, bobj, func_data_obj_linked["collection"])
 
     def handle__AppLink(self, func_data):
         """Handle App::Link objects."""
@@ -1472,7 +1713,7 @@ class ImportFcstd(object):
         # pre_line_sub = pre_line_orig + "├─ "
         pre_line_follow = pre_line_orig + "│   "
         pre_line_end = pre_line_orig + "└────────── "
-        print(pre_line_start + "handle__AppLink")
+        logger.debug("%shandle__AppLink", pre_line_start)
         func_data["pre_line"] = pre_line_follow
         # pre_line = pre_line_sub
         pre_line = pre_line_follow
@@ -1512,10 +1753,10 @@ class ImportFcstd(object):
             func_data["is_link"] = True
 
             if hasattr(obj, "ElementList") and len(obj.ElementList) > 0:
-                print(pre_line + "ElementList > 0")
+                logger.debug("%sElementList > 0", pre_line)
                 self.handle__ObjectWithElementList(func_data)
             else:
-                print(pre_line + "Single Element → fake list")
+                logger.debug("%sSingle Element → fake list", pre_line)
                 # if target is of Body type get real link target
                 # this excludes the link → link → link chain...
                 # try:
@@ -1526,7 +1767,7 @@ class ImportFcstd(object):
                 #     print(pre_line + "use recusive inner target")
                 #     obj_linkedobj = obj_linkedobj.getLinkedObject()
                 if obj_linkedobj.getLinkedObject().isDerivedFrom("Part::Feature"):
-                    print(pre_line + "use recusive inner target")
+                    logger.debug("%suse recusive inner target", pre_line)
                     obj_linkedobj = obj_linkedobj.getLinkedObject()
                 self.handle__object_with_sub_objects(
                     func_data, [obj_linkedobj], include_only_visible=[True]
@@ -1539,7 +1780,7 @@ class ImportFcstd(object):
                 ("Warning: '{}' LinkedObject is NONE → skipping." "".format(obj_label)),
                 pre_line,
             )
-        print(pre_line_end + "")
+        logger.debug("%s", pre_line_end)
         func_data["pre_line"] = pre_line_orig
 
     def handle__AppLinkElement(self, func_data, obj_linkedobj=None):
@@ -1554,7 +1795,7 @@ class ImportFcstd(object):
         # pre_line_sub = pre_line_orig + "├─ "
         pre_line_follow = pre_line_orig + "│   "
         pre_line_end = pre_line_orig + "└────────── "
-        print(pre_line_start + "handle__AppLinkElement")
+        logger.debug("%shandle__AppLinkElement", pre_line_start)
         func_data["pre_line"] = pre_line_follow
         # pre_line = pre_line_sub
         pre_line = pre_line_follow
@@ -1576,7 +1817,7 @@ class ImportFcstd(object):
         #     parent_obj_label in bpy.data.objects
         # ):
         #     func_data["parent_bobj"] = bpy.data.objects[parent_obj_label]
-        print(pre_line + "func_data[parent_bobj]:", func_data["parent_bobj"])
+        logger.debug("%sfunc_data[parent_bobj]: %s", pre_line, func_data["parent_bobj"])
 
         # obj_label = self.get_obj_combined_label(parent_obj, obj)
         obj_label = self.get_obj_label(obj)
@@ -1587,11 +1828,12 @@ class ImportFcstd(object):
 
         # print(pre_line + "collection:", func_data["collection"])
         # print(pre_line + "parent_obj_label:", parent_obj_label)
-        print(pre_line + "obj_label:", obj_label)
-        print(pre_line + "obj_linkedobj_label:", obj_linkedobj_label)
-        fc_helper.print_obj(parent_obj, pre_line=pre_line + "parent_obj   : ")
-        fc_helper.print_obj(obj, pre_line=pre_line + "obj          : ")
-        fc_helper.print_obj(obj_linkedobj, pre_line=pre_line + "obj_linkedobj: ")
+        logger.debug("%sobj_label: %s", pre_line, obj_label)
+        logger.debug("%sobj_linkedobj_label: %s", pre_line, obj_linkedobj_label)
+        if logger.isEnabledFor(logging.DEBUG):
+            fc_helper.print_obj(parent_obj, pre_line=pre_line + "parent_obj   : ")
+            fc_helper.print_obj(obj, pre_line=pre_line + "obj          : ")
+            fc_helper.print_obj(obj_linkedobj, pre_line=pre_line + "obj_linkedobj: ")
         # fc_helper.print_obj(obj_linked.LinkedObject, pre_line=pre_line)
 
         if not self.config["links_as_collectioninstance"]:
@@ -1626,7 +1868,7 @@ class ImportFcstd(object):
                 link_target_obj=obj_linkedobj,
                 link_target_label=obj_linkedobj_label,
             )
-        print(pre_line_end + "")
+        logger.debug("%s", pre_line_end)
         func_data["pre_line"] = pre_line_orig
 
     # ##########################################
@@ -1638,13 +1880,13 @@ class ImportFcstd(object):
         obj_host = obj.Hosts[0]
         obj_label = self.get_obj_label(obj)
         obj_host_label = self.get_obj_label(obj_host)
-        print(pre_line + "handle__object_hosts '{}'".format(obj_label))
-        print(pre_line + "obj_host_label '{}'".format(obj_host_label))
+        logger.debug("%shandle__object_hosts '%s'", pre_line, obj_label)
+        logger.debug("%sobj_host_label '%s'", pre_line, obj_host_label)
         bobj = func_data["bobj"]
-        bobj_host = bpy.data.objects[obj_host_label]
+        bobj_host = self.datablocks.get("objects", obj_host_label)
         if bobj_host:
-            print(pre_line + "bobj_host '{}'".format(bobj_host))
-            print(pre_line + "bobj_host.parent '{}'".format(bobj_host.parent))
+            logger.debug("%sbobj_host '%s'", pre_line, bobj_host)
+            logger.debug("%sbobj_host.parent '%s'", pre_line, bobj_host.parent)
             # Arch Wall Objects are no collection things - so we need to use the parent of it...
             # in the hope that this works...
             if bobj_host.parent:
@@ -1663,119 +1905,321 @@ class ImportFcstd(object):
     # 'real' object types
 
     # Part::Feature
-    def handle_shape_edge(self, func_data, edge):
-        """Handle edges that are not part of a face."""
-        if self.hascurves(edge):
-            # TODO use tessellation value
-            dv = edge.discretize(9)
-            for i in range(len(dv) - 1):
-                dv1 = [dv[i].x, dv[i].y, dv[i].z]
-                dv2 = [dv[i + 1].x, dv[i + 1].y, dv[i + 1].z]
-                if dv1 not in func_data["verts"]:
-                    func_data["verts"].append(dv1)
-                if dv2 not in func_data["verts"]:
-                    func_data["verts"].append(dv2)
-                func_data["edges"].append(
-                    [func_data["verts"].index(dv1), func_data["verts"].index(dv2)]
-                )
+    def get_shape_without_placement(self, obj):
+        """Get shape of object - with placement zeroed if placements are used."""
+        if obj.Name in self.stored_shapes:
+            shape = self.stored_shapes[obj.Name]
         else:
-            e = []
-            for vert in edge.Vertexes:
-                # TODO discretize non-linear edges
-                v = [vert.X, vert.Y, vert.Z]
-                if v not in func_data["verts"]:
-                    func_data["verts"].append(v)
-                e.append(func_data["verts"].index(v))
-            func_data["edges"].append(e)
-
-    def convert_face_to_polygon(self, func_data, face, faceedges):
-        """Convert face to polygons."""
+            shape = obj.Shape
+        if self.config["placement"]:
+            shape = shape.copy()
+            shape.Placement = obj.Placement.inverse().multiply(shape.Placement)
+        return shape
+
+    def load_stored_shape(self, obj):
+        """Load shape of object directly from the archive - returns True on success."""
         import Part
 
-        if (
-            (len(face.Wires) > 1)
-            or (not isinstance(face.Surface, Part.Plane))
-            or self.hascurves(face)
-        ):
-            # face has holes or is curved, so we need to triangulate it
-            rawdata = face.tessellate(self.config["tessellation"])
-            for v in rawdata[0]:
-                vl = [v.x, v.y, v.z]
-                if vl not in func_data["verts"]:
-                    func_data["verts"].append(vl)
-            for f in rawdata[1]:
-                nf = []
-                for vi in f:
-                    nv = rawdata[0][vi]
-                    nf.append(func_data["verts"].index([nv.x, nv.y, nv.z]))
-                func_data["faces"].append(nf)
-            func_data["matindex"].append(len(rawdata[1]))
-        else:
-            f = []
-            ov = face.OuterWire.OrderedVertexes
-            for v in ov:
-                vl = [v.X, v.Y, v.Z]
-                if vl not in func_data["verts"]:
-                    func_data["verts"].append(vl)
-                f.append(func_data["verts"].index(vl))
-            # FreeCAD doesn't care about func_data["verts"] order.
-            # Make sure our loop goes clockwise
-            c = face.CenterOfMass
-            v1 = ov[0].Point.sub(c)
-            v2 = ov[1].Point.sub(c)
-            n = face.normalAt(0, 0)
-            if (v1.cross(v2)).getAngle(n) > 1.57:
-                # inverting func_data["verts"] order
-                # if the direction is counterclockwise
-                f.reverse()
-            func_data["faces"].append(f)
-            func_data["matindex"].append(1)
-        for e in face.Edges:
-            faceedges.append(e.hashCode())
-
-    def handle_shape_faces(self, func_data, shape, faceedges):
-        """Convert faces to polygons."""
-        if TRIANGULATE:
-            # triangulate and make faces
-            rawdata = shape.tessellate(self.config["tessellation"])
-            for v in rawdata[0]:
-                func_data["verts"].append([v.x, v.y, v.z])
-            for f in rawdata[1]:
-                func_data["faces"].append(f)
-            for face in shape.Faces:
-                for e in face.Edges:
-                    faceedges.append(e.hashCode())
+        member = self.document_scan["shape_files"].get(obj.Name)
+        if not member or member not in self.archive:
+            return False
+        shape = Part.Shape()
+        try:
+            brep = self.archive.read_brep(member)
+            if brep is None:
+                # binary format - Part only reads these from a file.
+                self.read_stored_shape_file(shape, member)
+            elif brep.strip():
+                shape.importBrepFromString(brep)
+        except (UnicodeDecodeError, RuntimeError) as e:
+            # Part.OCCError is a RuntimeError.
+            # the object is recomputed instead.
+            logger.debug("stored shape '{}' not loaded: {}".format(member, e))
+            return False
+        if shape.isNull():
+            return False
+        self.stored_shapes[obj.Name] = shape
+        return True
+
+    def read_stored_shape_file(self, shape, member):
+        """Read shape from archive member through a temporary file."""
+        extension = os.path.splitext(member)[1]
+        handle, path = tempfile.mkstemp(suffix=extension)
+        try:
+            with os.fdopen(handle, "wb") as f:
+                f.write(self.archive.read(member))
+            shape.read(path)
+        finally:
+            os.remove(path)
+
+    def get_outdated_objects(self, doc):
+        """
+        Get objects that need a recompute.
+
+        FreeCAD.open restores the last computed shapes from the archive.
+        only objects that are touched / invalid -
+        or that have no stored shape at all - need to be recomputed.
+        """
+        outdated = []
+        for obj in doc.Objects:
+            state = obj.State
+            if "Invalid" in state or "Touched" in state or "Error" in state:
+                outdated.append(obj)
+            elif obj.isDerivedFrom("Part::Feature") and obj.Shape.isNull():
+                if not self.load_stored_shape(obj):
+                    outdated.append(obj)
+        return outdated
+
+    def expand_arrays(self, doc):
+        """
+        Expand all Draft arrays - so they provide their ElementList.
+
+        this only sets ExpandArray -
+        the following recompute_document updates all of them at once.
+        arrays imported as instances need only their PlacementList.
+        """
+        for obj in doc.Objects:
+            if (
+                obj.isDerivedFrom("Part::FeaturePython")
+                and hasattr(obj, "ExpandArray")
+                and hasattr(obj, "ElementList")
+                and not obj.ExpandArray
+                and not self.check_array_instancing(obj)
+            ):
+                self.expanded_arrays[obj.Name] = obj.ExpandArray
+                obj.ExpandArray = True
+
+    def restore_arrays(self, doc):
+        """Restore original ExpandArray values."""
+        for name, expand_array in self.expanded_arrays.items():
+            obj = doc.getObject(name)
+            if obj:
+                obj.ExpandArray = expand_array
+        self.expanded_arrays = {}
+
+    def recompute_document(self, doc):
+        """
+        Recompute document.
+
+        only the outdated objects if stored shapes are used -
+        or for a dry run (the stored shapes are good enough for an estimate).
+        """
+        if not (self.config["use_stored_shapes"] or self.config["dry_run"]):
+            self.config["report"]({"INFO"}, "recompute..")
+            doc.recompute()
+            return
+        outdated = self.get_outdated_objects(doc)
+        self.config["report"](
+            {"INFO"},
+            "use stored shapes - recompute {} of {} objects.."
+            "".format(len(outdated), len(doc.Objects)),
+        )
+        if outdated:
+            doc.recompute(outdated)
+
+    def convert_shape(self, func_data, shape):
+        """Convert shape to verts, edges and faces."""
+        tessellation.convert_shape(
+            func_data, shape, self.config["tessellation"], triangulate=TRIANGULATE
+        )
+
+    def get_tessellation_pool(self):
+        """Get started tessellation worker pool."""
+        executable = None
+        sys_path = None
+        if self.config["worker_freecadcmd"]:
+            # FreeCAD brings its own python -
+            # so do not hand over our paths.
+            executable = self.config["worker_freecadcmd"]
+            sys_path = []
+        if self.config["keep_workers"]:
+            pool = tessellation_pool.get_shared_pool(
+                self.config["worker_count"],
+                executable=executable,
+                sys_path=sys_path,
+                report=self.config["report"],
+            )
         else:
-            # write FreeCAD faces as polygons when possible
-            for face in shape.Faces:
-                self.convert_face_to_polygon(func_data, face, faceedges)
+            pool = tessellation_pool.TessellationPool(
+                self.config["worker_count"],
+                executable=executable,
+                sys_path=sys_path,
+                report=self.config["report"],
+            )
+            pool.start()
+        return pool
+
+    def get_prefetch_objects(self, doc):
+        """
+        Get the shape objects the import reaches - each once.
+
+        walks the root objects and their visible childs
+        with the same rules as the import (see import_plan.PlanBuilder) -
+        so hidden or unreachable objects are not tessellated.
+        """
+        result = []
+        visited = set()
+
+        def walk(obj):
+            key = (obj.Document.Name, obj.Name)
+            if key in visited:
+                return
+            visited.add(key)
+            analysis = self.get_document_analysis(obj.Document)
+            branch = analysis.get_branch(obj)
+            if branch == "Part::FeaturePython":
+                kind = analysis.get_feature_python_kind(obj)
+                if kind == "Array" and getattr(obj, "Base", None) is not None:
+                    walk(obj.Base)
+                elif kind != "ArrayType":
+                    result.append(obj)
+                    if kind == "ArchWithHostChilds":
+                        walk_childs(analysis.get_host_childs(obj))
+            elif branch == "Part::Feature":
+                result.append(obj)
+            elif branch == "App::Part":
+                walk_childs(obj.Group)
+            elif branch in ("App::Link", "App::LinkElement"):
+                linked = obj.LinkedObject
+                if linked is not None:
+                    resolved = linked.getLinkedObject()
+                    if resolved.isDerivedFrom("Part::Feature"):
+                        linked = resolved
+                    walk(linked)
+
+        def walk_childs(childs):
+            for child in fc_helper.filtered_objects(childs, self.typeid_filter_list):
+                if self.check_obj_visibility_with_skiphidden(child):
+                    walk(child)
+
+        obj_list, _ = self.get_document_analysis(doc).get_root_objects(
+            filter_list=self.typeid_filter_list
+        )
+        walk_childs(obj_list)
+        return result
 
-    def create_mesh_from_shape(self, func_data):
+    def get_content_hash(self, obj, shape, brep=None):
+        """Get BREP content hash of the shape of obj - computed once per object."""
+        key = (obj.Document.Name, obj.Name)
+        content_hash = self.content_hashes.get(key)
+        if content_hash is None:
+            if brep is None:
+                brep = shape.exportBrepToString()
+            content_hash = tessellation_cache.brep_content_hash(brep)
+            self.content_hashes[key] = content_hash
+        return content_hash
+
+    def prefetch_tessellation(self, doc):
+        """Tessellate the shapes the import reaches in worker processes."""
+        if self.config["worker_count"] < 2:
+            return
+        jobs = []
+        job_keys = set()
+        for obj in self.get_prefetch_objects(doc):
+            shape = self.get_shape_without_placement(obj)
+            if shape.isNull():
+                continue
+            brep = shape.exportBrepToString()
+            content_hash = self.get_content_hash(obj, shape, brep)
+            cache_key = tessellation_cache.combine_key(
+                content_hash, self.geometry_settings
+            )
+            if cache_key in job_keys:
+                continue
+            if self.tessellation_cache and self.tessellation_cache.contains(cache_key):
+                continue
+            mesh_hash = tessellation_cache.combine_key(content_hash, self.mesh_settings)
+            if self.get_reusable_bmesh(
+                {"freecad_mesh_hash": mesh_hash}, self.get_obj_label(obj)
+            ):
+                continue
+            job_keys.add(cache_key)
+            jobs.append((cache_key, brep))
+        if not jobs:
+            return
+        self.config["report"](
+            {"INFO"},
+            "tessellate {} shapes with {} workers.."
+            "".format(len(jobs), self.config["worker_count"]),
+        )
+        pool = self.get_tessellation_pool()
+        try:
+            for cache_key, mesh_data in pool.map(
+                jobs,
+                self.config["tessellation"],
+                self.config["weld_tolerance"],
+                triangulate=TRIANGULATE,
+            ):
+                self.tessellation_results[cache_key] = mesh_data
+                if self.tessellation_cache:
+                    self.tessellation_cache.save(cache_key, mesh_data)
+        finally:
+            if not self.config["keep_workers"]:
+                pool.close()
+        self.config["report"](
+            {"INFO"},
+            "tessellated {} of {} shapes in workers."
+            "".format(len(self.tessellation_results), len(jobs)),
+        )
+
+    def create_mesh_from_shape(self, func_data, mesh_label=None):
         """Create mesh from shape."""
         # print(func_data["pre_line"] + "create_mesh_from_shape")
-        # a placeholder to store edges that belong to a face
-        faceedges = []
-        shape = func_data["obj"].Shape
+        shape = self.get_shape_without_placement(func_data["obj"])
         # func_data["freecad_mesh_hash"] = shape.hashCode()
         # hashCode changes on every file opening :-(
-        if self.config["placement"]:
-            shape = func_data["obj"].Shape.copy()
-            shape.Placement = (
-                func_data["obj"].Placement.inverse().multiply(shape.Placement)
+        # so we use a hash of the BREP content.
+        content_hash = None
+        if (
+            self.tessellation_cache
+            or self.tessellation_results
+            or self.config["update_only_modified_meshes"]
+            or self.config["share_meshes"]
+        ):
+            content_hash = self.get_content_hash(func_data["obj"], shape)
+            func_data["freecad_mesh_hash"] = tessellation_cache.combine_key(
+                content_hash, self.mesh_settings
+            )
+        func_data["reuse_bmesh"] = self.get_shared_bmesh(func_data)
+        if func_data["reuse_bmesh"] is not None:
+            # identical shape already imported - skip tessellation.
+            return shape
+        if mesh_label:
+            func_data["reuse_bmesh"] = self.get_reusable_bmesh(func_data, mesh_label)
+            if func_data["reuse_bmesh"] is not None:
+                # nothing changed - skip tessellation.
+                return shape
+        cache_key = None
+        mesh_data = None
+        if content_hash:
+            cache_key = tessellation_cache.combine_key(
+                content_hash, self.geometry_settings
             )
-        if shape.Faces:
-            self.handle_shape_faces(func_data, shape, faceedges)
-        # Treat remaining edges (that are not in faces)
-        for edge in shape.Edges:
-            if not (edge.hashCode() in faceedges):
-                self.handle_shape_edge(func_data, edge)
+            # results of the worker processes
+            mesh_data = self.tessellation_results.get(cache_key)
+        if mesh_data is None and self.tessellation_cache:
+            mesh_data = self.tessellation_cache.load(cache_key)
+        if mesh_data is None:
+            with self.profiler.phase("tessellation"):
+                self.convert_shape(func_data, shape)
+                mesh_data = mesh_builder.pack_mesh_data(
+                    func_data["verts"],
+                    func_data["edges"],
+                    func_data["faces"],
+                    func_data["matindex"],
+                )
+            if self.tessellation_cache:
+                self.tessellation_cache.save(cache_key, mesh_data)
+        else:
+            func_data["matindex"] = mesh_data["matindex"].tolist()
+        func_data["mesh_data"] = mesh_data
         return shape
 
     def handle__PartFeature(self, func_data):
         """Handle Part::Feature objects."""
         pre_line_orig = func_data["pre_line"]
         pre_line = func_data["pre_line"]
-        print(func_data["pre_line"] + "handle__PartFeature")
+        logger.debug("%shandle__PartFeature", func_data["pre_line"])
         pre_line += "> "
         func_data["pre_line"] = pre_line
 
@@ -1789,14 +2233,14 @@ class ImportFcstd(object):
         # check if this Part::Feature object is already imported.
         if self.config["links_as_collectioninstance"]:
             if (
-                obj_label in self.link_targets.children
-                and obj_label in bpy.data.objects
+                self.datablocks.has_child(self.link_targets, obj_label)
+                and self.datablocks.contains("objects", obj_label)
             ):
                 # print(
                 #     pre_line + "found link target object '{}'"
                 #     "".format(obj_label)
                 # )
-                bobj_link_target = bpy.data.objects[obj_label]
+                bobj_link_target = self.datablocks.get("objects", obj_label)
                 # bobj_link_target_label = self.fix_link_target_name(
                 self.fix_link_target_name(bobj_link_target)
                 # print(
@@ -1821,26 +2265,27 @@ class ImportFcstd(object):
                 pass
         else:
             # handle creation of linked copies
-            print(pre_line + "handle creation of linked copies..")
+            logger.debug("%shandle creation of linked copies..", pre_line)
             # print(pre_line + "imported_obj_names:", self.imported_obj_names)
             if (
-                obj_label
-                in bpy.data.objects
+                self.datablocks.contains("objects", obj_label)
                 # and obj_label in self.imported_obj_names
             ):
-                print(pre_line + "→ update bobj")
-                bobj = bpy.data.objects[obj_label]
+                logger.debug("%s→ update bobj", pre_line)
+                bobj = self.datablocks.get("objects", obj_label)
                 func_data["bobj"] = bobj
                 if not func_data["is_link"]:
                     update_placement = True
                 func_data["update_tree"] = True
             else:
-                print(pre_line + "→ just import it")
+                logger.debug("%s→ just import it", pre_line)
                 # import_it = True
 
         # if import_it:
-        self.create_mesh_from_shape(func_data)
-        if func_data["verts"] and (func_data["faces"] or func_data["edges"]):
+        self.create_mesh_from_shape(func_data, mesh_label=self.get_obj_label(obj))
+        if func_data["reuse_bmesh"] is not None or mesh_builder.has_geometry(
+            func_data["mesh_data"]
+        ):
             self.add_or_update_blender_obj(func_data)
             func_data["update_tree"] = True
 
@@ -1861,25 +2306,33 @@ class ImportFcstd(object):
             # in meshes, this zeroes the placement
             mesh = func_data["obj"].Mesh.copy()
         t = mesh.Topology
-        func_data["verts"] = [[v.x, v.y, v.z] for v in t[0]]
-        func_data["faces"] = t[1]
+        vert_indices = func_data["welder"].add_vectors(t[0])
+        tessellation.add_faces(func_data, t[1], vert_indices)
+        func_data["mesh_data"] = mesh_builder.pack_mesh_data(
+            func_data["verts"], func_data["edges"], func_data["faces"], []
+        )
 
     # ##########################################
     # main object import
     def create_func_data(self):
         "Create a blank func_data structure."
+        verts = []
         func_data = {
             "obj": None,
             "bobj": None,
             "obj_label": None,
-            "verts": [],
+            "verts": verts,
+            # shared vertex lookup for all geometry paths - fills 'verts'
+            "welder": VertexWelder(self.config["weld_tolerance"], verts=verts),
             "edges": [],
             "faces": [],
+            # flat numpy arrays - see mesh_builder.pack_mesh_data
+            "mesh_data": None,
             "freecad_mesh_hash": None,
+            # existing mesh with matching freecad_mesh_hash
+            "reuse_bmesh": None,
             # face to material relationship
             "matindex": [],
-            # to store reusable materials
-            "matdatabase": {},
             # name: "Unnamed",
             "link_targets": [],
             "collection": None,
@@ -1893,26 +2346,47 @@ class ImportFcstd(object):
         }
         return func_data
 
+    def get_document_analysis(self, doc):
+        """Get (and on first use create) the one pass analysis of doc."""
+        analysis = self.doc_analyses.get(doc.Name)
+        if analysis is None:
+            analysis = doc_analysis.DocumentAnalysis(doc)
+            self.doc_analyses[doc.Name] = analysis
+        return analysis
+
+    def get_guidata_object_names(self, doc):
+        """Get names of all objects we need the gui data for."""
+        analysis = self.get_document_analysis(doc)
+        return {name for name, branch in analysis.branches.items() if branch}
+
     def _import_obj__handle_type(self, func_data, pre_line=""):
         """Choose Import Type."""
         obj = func_data["obj"]
-        if obj.isDerivedFrom("Part::FeaturePython"):
-            self.handle__PartFeaturePython(func_data, pre_line)
-        elif obj.isDerivedFrom("Part::Feature"):
-            self.handle__PartFeature(func_data)
-        elif obj.isDerivedFrom("Mesh::Feature"):
-            self.handle__MeshFeature(func_data)
+        # the branch is the first import TypeId the object is derived from.
+        branch = self.get_document_analysis(obj.Document).get_branch(obj)
+        if branch == "Part::FeaturePython":
+            with self.profiler.obj_type(obj.TypeId, branch):
+                self.handle__PartFeaturePython(func_data, pre_line)
+        elif branch == "Part::Feature":
+            with self.profiler.obj_type(obj.TypeId, branch):
+                self.handle__PartFeature(func_data)
+        elif branch == "Mesh::Feature":
+            with self.profiler.obj_type(obj.TypeId, branch):
+                self.handle__MeshFeature(func_data)
         # elif obj.isDerivedFrom("PartDesign::Body"):
         #     self.create_mesh_from_Body(func_data)
         # elif obj.isDerivedFrom("XXXXXX"):
         #     self.handle__XXXXXX(func_data)
-        elif obj.isDerivedFrom("App::Part"):
-            self.handle__AppPart(func_data)
-        elif obj.isDerivedFrom("App::LinkElement"):
-            # self.handle__AppLinkElement(func_data)
-            self.handle__AppLink(func_data)
-        elif obj.isDerivedFrom("App::Link"):
-            self.handle__AppLink(func_data)
+        elif branch == "App::Part":
+            with self.profiler.obj_type(obj.TypeId, branch):
+                self.handle__AppPart(func_data)
+        elif branch == "App::LinkElement":
+            with self.profiler.obj_type(obj.TypeId, branch):
+                # self.handle__AppLinkElement(func_data)
+                self.handle__AppLink(func_data)
+        elif branch == "App::Link":
+            with self.profiler.obj_type(obj.TypeId, branch):
+                self.handle__AppLink(func_data)
         else:
             self.config["report"](
                 {"WARNING"},
@@ -1950,17 +2424,18 @@ class ImportFcstd(object):
             self._import_obj__handle_type(func_data, pre_line)
 
             if func_data["update_tree"]:
-                self.update_tree_collections(func_data)
-                self.update_tree_parents(func_data)
+                with self.profiler.phase("tree_linking"):
+                    self.update_tree_collections(func_data)
+                    self.update_tree_parents(func_data)
         return func_data
 
     def import_doc_content(self, doc):
         """Import document content = filterd objects."""
         pre_line = ""
-        obj_list, obj_list_withHost = fc_helper.get_root_objects(
-            doc, filter_list=self.typeid_filter_list
+        obj_list, obj_list_withHost = self.get_document_analysis(doc).get_root_objects(
+            filter_list=self.typeid_filter_list
         )
-        print("-" * 21)
+        logger.debug("-" * 21)
 
         self.config["report"](
             {"INFO"},
@@ -1970,8 +2445,9 @@ class ImportFcstd(object):
             ),
             pre_line=pre_line,
         )
-        fc_helper.print_objects(obj_list, show_lists=True, show_list_details=True)
-        print("-" * 21)
+        if logger.isEnabledFor(logging.DEBUG):
+            fc_helper.print_objects(obj_list, show_lists=True, show_list_details=True)
+        logger.debug("-" * 21)
 
         self.config["report"](
             {"INFO"},
@@ -1981,10 +2457,11 @@ class ImportFcstd(object):
             ),
             pre_line=pre_line,
         )
-        fc_helper.print_objects(
-            obj_list_withHost, show_lists=True, show_list_details=True
-        )
-        print("-" * 21)
+        if logger.isEnabledFor(logging.DEBUG):
+            fc_helper.print_objects(
+                obj_list_withHost, show_lists=True, show_list_details=True
+            )
+        logger.debug("-" * 21)
         # self.config["report"](
         #     {"INFO"},
         #     ("the Hosts ARCH way is not implemented yet. so we just import them."),
@@ -2030,22 +2507,195 @@ class ImportFcstd(object):
                 )
         self.config["report"]({"INFO"}, "finished.", pre_line=pre_line_end)
 
+    # ##########################################
+    # two pass import
+    def get_plan_mesh_data(self, geometry_key, plan_builder=None, geometry_store=None):
+        """Get mesh_data for a plan geometry key - or None."""
+        mesh_data = self.tessellation_results.get(geometry_key)
+        if mesh_data is None and plan_builder:
+            mesh_data = plan_builder.mesh_data.get(geometry_key)
+        if mesh_data is None and geometry_store:
+            mesh_data = geometry_store.load(geometry_key)
+        if mesh_data is None and self.tessellation_cache:
+            mesh_data = self.tessellation_cache.load(geometry_key)
+        return mesh_data
+
+    def tessellate_plan(self, plan_builder):
+        """
+        Tessellate all plan geometry that is not cached yet.
+
+        every distinct geometry is tessellated once -
+        with worker_count >= 2 in parallel by the worker processes.
+        """
+        missing = [
+            key
+            for key in plan_builder.shapes
+            if key not in self.tessellation_results
+            and not (self.tessellation_cache and self.tessellation_cache.contains(key))
+        ]
+        if not missing:
+            return
+        if plan_builder.breps:
+            self.config["report"](
+                {"INFO"},
+                "tessellate {} shapes with {} workers.."
+                "".format(len(missing), self.config["worker_count"]),
+            )
+            pool = self.get_tessellation_pool()
+            try:
+                for cache_key, mesh_data in pool.map(
+                    [(key, plan_builder.breps[key]) for key in missing],
+                    self.config["tessellation"],
+                    self.config["weld_tolerance"],
+                    triangulate=TRIANGULATE,
+                ):
+                    self.tessellation_results[cache_key] = mesh_data
+            finally:
+                if not self.config["keep_workers"]:
+                    pool.close()
+        for key in missing:
+            if key not in self.tessellation_results:
+                func_data = self.create_func_data()
+                self.convert_shape(func_data, plan_builder.shapes[key])
+                self.tessellation_results[key] = mesh_builder.pack_mesh_data(
+                    func_data["verts"],
+                    func_data["edges"],
+                    func_data["faces"],
+                    func_data["matindex"],
+                )
+            if self.tessellation_cache:
+                self.tessellation_cache.save(key, self.tessellation_results[key])
+
+    def execute_plan(self, plan, get_mesh_data):
+        """
+        Realize plan in Blender.
+
+        uses the prepared import collection, link targets and root empty -
+        or lets the executor get or create them.
+        """
+        executor = import_plan.PlanExecutor(
+            plan,
+            config=self.config,
+            datablocks=self.datablocks,
+            material_registry=self.material_registry,
+            get_mesh_data=get_mesh_data,
+            get_reusable_bmesh=self.get_reusable_bmesh,
+            imported_obj_names=self.imported_obj_names,
+            imported_mesh_names=self.imported_mesh_names,
+            collection=self.fcstd_collection,
+            link_targets=self.link_targets,
+            root_empty=self.fcstd_empty,
+        )
+        executor.execute()
+        self.fcstd_collection = executor.collection
+        self.link_targets = executor.link_targets
+        self.fcstd_empty = executor.root_empty
+        return executor
+
+    def import_doc_plan(self, doc):
+        """Import document in two passes: build plan - then execute it."""
+        with self.profiler.phase("plan"):
+            plan_builder = import_plan.PlanBuilder(self)
+            plan = plan_builder.build(doc)
+        self.config["report"](
+            {"INFO"},
+            "plan: {} nodes, {} distinct geometries, {} materials."
+            "".format(len(plan["nodes"]), len(plan["geometry"]), len(plan["materials"])),
+        )
+        with self.profiler.phase("tessellation"):
+            self.tessellate_plan(plan_builder)
+
+        def get_mesh_data(geometry_key):
+            return self.get_plan_mesh_data(geometry_key, plan_builder=plan_builder)
+
+        if self.config["plan_directory"]:
+            path = import_plan.save_plan(
+                plan, self.config["plan_directory"], get_mesh_data=get_mesh_data
+            )
+            self.config["report"]({"INFO"}, "plan saved to '{}'.".format(path))
+        with self.profiler.phase("import_objects"):
+            self.execute_plan(plan, get_mesh_data)
+        return plan
+
+    def get_estimate_counts(self, geometry_key, plan_builder):
+        """
+        Get mesh counts for a plan geometry key - or None.
+
+        exact if the mesh data is known (tessellation cache, earlier results, meshes) -
+        else estimated without a full tessellation.
+        """
+        mesh_data = self.get_plan_mesh_data(geometry_key, plan_builder=plan_builder)
+        if mesh_data is not None:
+            return estimate.get_mesh_counts(mesh_data)
+        shape = plan_builder.shapes.get(geometry_key)
+        if shape is None:
+            return None
+        counts = tessellation.estimate_shape_counts(
+            shape, self.config["tessellation"], triangulate=TRIANGULATE
+        )
+        counts["estimated"] = True
+        return counts
+
+    def estimate_doc(self, doc):
+        """
+        Estimate what the import of document would create.
+
+        builds the import plan and counts its distinct geometries -
+        but does not create any Blender data.
+        """
+        with self.profiler.phase("plan"):
+            plan_builder = import_plan.PlanBuilder(self)
+            plan = plan_builder.build(doc)
+        with self.profiler.phase("tessellation"):
+            self.estimate = estimate.PlanEstimate(
+                plan,
+                lambda geometry_key: self.get_estimate_counts(geometry_key, plan_builder),
+                array_instancing=self.config["array_instancing"],
+                share_meshes=self.config["share_meshes"],
+                links_as_collectioninstance=self.config["links_as_collectioninstance"],
+            ).compute()
+        for line in estimate.format_estimate(self.estimate):
+            self.config["report"]({"INFO"}, line, force=True)
+        return self.estimate
+
+    def import_plan_file(self, path):
+        """
+        Execute a saved plan - FreeCAD is not needed.
+
+        path is the plan.json or the plan directory (see import_plan.save_plan).
+        the mesh data comes from the geometry saved with the plan
+        or from the tessellation cache.
+        """
+        self.reset_document_state()
+        try:
+            plan, geometry_store = import_plan.load_plan(path)
+        except (OSError, ValueError) as e:
+            self.config["report"]({"ERROR"}, "Unable to load plan: {}".format(e))
+            return {"CANCELLED"}
+
+        def get_mesh_data(geometry_key):
+            return self.get_plan_mesh_data(geometry_key, geometry_store=geometry_store)
+
+        try:
+            self.execute_plan(plan, get_mesh_data)
+        finally:
+            b_helper.flush_blender_console()
+        return {"FINISHED"}
+
     def prepare_collection(self):
         """Prepare main import collection."""
         link_targets_label = self.doc.Name + "__link_targets"
         if self.config["update"]:
-            if self.doc_filename in bpy.data.collections:
-                self.fcstd_collection = bpy.data.collections[self.doc_filename]
-            if link_targets_label in bpy.data.collections:
-                self.link_targets = bpy.data.collections[link_targets_label]
+            self.fcstd_collection = self.datablocks.get("collections", self.doc_filename)
+            self.link_targets = self.datablocks.get("collections", link_targets_label)
 
         if not self.fcstd_collection:
-            self.fcstd_collection = bpy.data.collections.new(self.doc_filename)
-            bpy.context.scene.collection.children.link(self.fcstd_collection)
+            self.fcstd_collection = self.datablocks.new("collections", self.doc_filename)
+            self.datablocks.link_child(bpy.context.scene.collection, self.fcstd_collection)
 
         if not self.link_targets:
-            self.link_targets = bpy.data.collections.new(link_targets_label)
-            self.fcstd_collection.children.link(self.link_targets)
+            self.link_targets = self.datablocks.new("collections", link_targets_label)
+            self.datablocks.link_child(self.fcstd_collection, self.link_targets)
             # hide this internal object.
             # we use only the instances..
             self.link_targets.hide_render = False
@@ -2071,11 +2721,11 @@ class ImportFcstd(object):
     def append_path(self, path, sub=""):
         if path and sub:
             path = os.path.join(path, sub)
-            print("full path:", path)
+            logger.debug("full path: %s", path)
         if path and os.path.exists(path):
             if os.path.isfile(path):
                 path = os.path.dirname(path)
-            print("configured path:", path)
+            logger.debug("configured path: %s", path)
             if path not in sys.path:
                 sys.path.append(path)
         else:
@@ -2116,6 +2766,8 @@ class ImportFcstd(object):
 
     def handle_additonal_paths(self):
         """Prepare more paths for import."""
+        if freecad_state["additional_paths"]:
+            return
         import FreeCAD
 
         path_base = FreeCAD.getResourceDir()  # noqa
@@ -2123,16 +2775,22 @@ class ImportFcstd(object):
         # /usr/share/freecad-daily/Ext/PySide
         self.append_path(path_base, "Ext")
         self.append_path(path_base, "Mod")
+        freecad_state["additional_paths"] = True
 
-    def import_extras(self):
+    def import_extras(self, workbenches=()):
         """Import additional things."""
         self.handle_additonal_paths()
+        # Part is always needed for the shape conversion.
+        # the big workbenches only if the document uses them.
+        module_names = ["Part"] + [
+            name for name in ("Draft", "Arch") if name in workbenches
+        ]
         try:
-            import Part  # noqa
-
-            # import PartDesign  # noqa
-            import Draft  # noqa
-            import Arch  # noqa
+            for name in module_names:
+                if name not in freecad_state["modules"]:
+                    self.config["report"]({"INFO"}, "load '{}'..".format(name))
+                    importlib.import_module(name)
+                    freecad_state["modules"].add(name)
         except ModuleNotFoundError as e:
             self.config["report"](
                 {"ERROR"},
@@ -2148,18 +2806,40 @@ class ImportFcstd(object):
             self.config["report"]({"ERROR"}, "Import Failed.\n" "\n" + str(e))
             return {"CANCELLED"}
 
+    def finish_profile(self):
+        """Stop profiler - report summary and save files."""
+        if not self.profiler.enabled:
+            return
+        self.profiler.stop()
+        for line in self.profiler.format_summary():
+            self.config["report"]({"INFO"}, line, force=True)
+        if self.config["profile_directory"]:
+            try:
+                files = self.profiler.save(
+                    self.config["profile_directory"], self.config["profile_export"]
+                )
+            except OSError as e:
+                self.config["report"](
+                    {"WARNING"}, "unable to save profile: {}".format(e)
+                )
+            else:
+                for path in files:
+                    self.config["report"](
+                        {"INFO"}, "profile saved to '{}'".format(path), force=True
+                    )
+
     def import_fcstd(self, filename=None):
         """Read a FreeCAD .FCStd file and creates Blender objects."""
         if filename:
             self.config["filename"] = filename
+        self.reset_document_state()
 
         try:
             self.prepare_freecad_path()
             self.prepare_freecad_import()
             import FreeCAD
         except ModuleNotFoundError as e:
-            self.config["report"](
-                {"ERROR"},
+            message = (
                 "Unable to import the FreeCAD Python module. \n"
                 "\n"
                 "Make sure FreeCAD is installed on your system! \n"
@@ -2167,37 +2847,58 @@ class ImportFcstd(object):
                 "We tried to search for it - \n"
                 "but maybee its easier to set its path in this Addon preferences "
                 "(User preferences->Addons->expand this addon).\n"
-                "\n" + str(e),
             )
+            if self.config["worker_freecadcmd"]:
+                message += (
+                    "(freecadcmd only runs the tessellation workers - "
+                    "the document is opened inside of Blender.)\n"
+                )
+            self.config["report"]({"ERROR"}, message + "\n" + str(e))
             return {"CANCELLED"}
         except Exception as e:
             self.config["report"]({"ERROR"}, "Import Failed.\n" "\n" + str(e))
             return {"CANCELLED"}
         finally:
             self.cleanup_freecad_import()
+            b_helper.flush_blender_console()
 
-        self.import_extras()
-
-        self.guidata = guidata.load_guidata(
-            self.config["filename"], self.config["report"],
+        self.profiler = profiler.create_profiler(
+            self.config["profile"],
+            name=os.path.splitext(os.path.basename(self.config["filename"]))[0],
+            track_allocations=self.config["profile_allocations"],
+            export_format=self.config["profile_export"],
         )
+        self.profiler.start()
 
         # Context Managers not implemented..
         # see https://docs.python.org/3.8/reference/compound_stmts.html#with
         # with FreeCAD.open(self.config["filename"]) as doc:
         # so we use the classic try finally block:
+        doc = None
+        docname = None
         try:
+            # the archive stays open for the whole import -
+            # guidata reads the color lists on demand.
+            self.archive = archive.FCStdArchive(
+                self.config["filename"], use_mmap=self.config["archive_use_mmap"]
+            )
+            # only load the workbenches the document needs.
+            with self.profiler.phase("scan_document"):
+                self.document_scan = docdata.scan_document(self.archive)
+            self.import_extras(docdata.get_required_workbenches(self.document_scan))
+
             # doc = FreeCAD.open(
             #     "/home/stefan/mydata/freecad/tests/linking_test/Linking.FCStd")
             self.config["report"](
                 {"INFO"}, "open FreeCAD file. '{}'" "".format(self.config["filename"])
             )
             try:
-                doc = FreeCAD.open(self.config["filename"])
+                with self.profiler.phase("freecad_open"):
+                    doc = FreeCAD.open(self.config["filename"])
             except Exception as e:
-                print(e)
-            docname = doc.Name
+                logger.debug("%s", e)
             if doc:
+                docname = doc.Name
                 self.doc_filename = doc.Name + ".FCStd"
                 self.config["report"](
                     {"INFO"},
@@ -2205,16 +2906,36 @@ class ImportFcstd(object):
                 )
                 self.doc = doc
                 # self.print_debug_report()
-                self.config["report"]({"INFO"}, "recompute..")
-                self.doc.recompute()
+                with self.profiler.phase("recompute"):
+                    if not self.config["dry_run"]:
+                        # the dry run only needs the element count of arrays.
+                        self.expand_arrays(doc)
+                    self.recompute_document(doc)
+                with self.profiler.phase("analyze_document"):
+                    self.get_document_analysis(doc)
+                with self.profiler.phase("guidata"):
+                    self.guidata = guidata.load_guidata(
+                        self.archive,
+                        self.config["report"],
+                        object_names=self.get_guidata_object_names(doc),
+                    )
                 # self.config["report"]({'INFO'}, "importLinks..")
                 # self.doc.importLinks()
                 # importLinks is currently not reliable..
                 # self.config["report"]({'INFO'}, "recompute..")
                 # self.doc.recompute()
+                if self.config["dry_run"]:
+                    self.estimate_doc(doc)
+                    return {"FINISHED"}
                 self.prepare_collection()
                 self.prepare_root_empty()
-                self.import_doc_content(doc)
+                if self.config["use_import_plan"]:
+                    self.import_doc_plan(doc)
+                else:
+                    with self.profiler.phase("tessellation"):
+                        self.prefetch_tessellation(doc)
+                    with self.profiler.phase("import_objects"):
+                        self.import_doc_content(doc)
             else:
                 self.config["report"](
                     {"ERROR"},
@@ -2226,10 +2947,61 @@ class ImportFcstd(object):
             self.config["report"]({"ERROR"}, str(e))
             raise e
         finally:
-            FreeCAD.closeDocument(docname)
-        print("Import finished.")
+            if docname:
+                self.restore_arrays(doc)
+                FreeCAD.closeDocument(docname)
+            if self.archive:
+                self.archive.close()
+            if self.tessellation_cache and self.tessellation_cache.saved:
+                self.tessellation_cache.prune()
+            self.finish_profile()
+            b_helper.flush_blender_console()
+        logger.debug("Import finished.")
         return {"FINISHED"}
 
+    def import_files(self, filenames):
+        """
+        Import multiple .FCStd files in one go.
+
+        all files share this importer -
+        so loaded FreeCAD modules, materials,
+        tessellation workers and caches are reused.
+        """
+        results = []
+        time_start = time.perf_counter()
+        for index, filename in enumerate(filenames):
+            self.config["report"](
+                {"INFO"},
+                "batch import {}/{}: '{}'".format(index + 1, len(filenames), filename),
+            )
+            file_time_start = time.perf_counter()
+            try:
+                result = self.import_fcstd(filename=filename)
+            except Exception as e:
+                self.config["report"](
+                    {"ERROR"}, "Import of '{}' failed: {}".format(filename, e)
+                )
+                result = {"CANCELLED"}
+            results.append((filename, result, time.perf_counter() - file_time_start))
+
+        self.config["report"](
+            {"INFO"},
+            "batch import of {} files finished in {:.2f}s:"
+            "".format(len(filenames), time.perf_counter() - time_start),
+            force=True,
+        )
+        for filename, result, duration in results:
+            self.config["report"](
+                {"INFO"},
+                "  {:>8.2f}s  {:<10} '{}'".format(
+                    duration, ", ".join(result), os.path.basename(filename)
+                ),
+                force=True,
+            )
+        if any("FINISHED" in result for _, result, _ in results):
+            return {"FINISHED"}
+        return {"CANCELLED"}
+
 
 def main_test():
     """Tests."""
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Read access to .FCStd files.
+
+a .FCStd file is a zip archive with
+    Document.xml        objects and their properties
+    GuiDocument.xml     view provider data (colors, visibility)
+    *.brp               persisted shapes (BREP)
+    DiffuseColor*       per-face color lists
+"""
+
+import mmap
+import os
+import zipfile
+
+
+class MappedFile(object):
+    """File like access to a mmap (zipfile needs `seekable`)."""
+
+    def __init__(self, mapped):
+        """Init."""
+        super(MappedFile, self).__init__()
+        self.mapped = mapped
+
+    def read(self, size=-1):
+        """Read bytes."""
+        return self.mapped.read(size)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Move position."""
+        self.mapped.seek(offset, whence)
+        return self.mapped.tell()
+
+    def tell(self):
+        """Get position."""
+        return self.mapped.tell()
+
+    def seekable(self):
+        """Mapped files are seekable."""
+        return True
+
+
+class FCStdArchive(object):
+    """
+    Open a .FCStd file once and serve its members on demand.
+
+    the central directory is read once and indexed by member name.
+    with use_mmap the file is memory mapped -
+    so repeated member reads do not hit the (network) file system again.
+    use as context manager or call close().
+    """
+
+    def __init__(self, filename, use_mmap=False):
+        """Init."""
+        super(FCStdArchive, self).__init__()
+        self.filename = filename
+        self.use_mmap = use_mmap
+        self.file = None
+        self.mmap = None
+        self.zip = None
+        self.members = {}
+        self.open()
+
+    def open(self):
+        """Open file and index members."""
+        self.file = open(self.filename, "rb")
+        source = self.file
+        if self.use_mmap:
+            try:
+                self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                source = MappedFile(self.mmap)
+            except (OSError, ValueError):
+                # empty file or mmap not supported for this file system.
+                self.mmap = None
+        self.zip = zipfile.ZipFile(source)
+        self.members = {info.filename: info for info in self.zip.infolist()}
+
+    def close(self):
+        """Close file."""
+        if self.zip:
+            self.zip.close()
+            self.zip = None
+        if self.mmap:
+            self.mmap.close()
+            self.mmap = None
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        """Context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close file."""
+        self.close()
+
+    def __contains__(self, name):
+        """Check if member exists."""
+        return name in self.members
+
+    def open_member(self, name):
+        """Open member as binary stream."""
+        return self.zip.open(self.members[name])
+
+    def read(self, name):
+        """Read member content."""
+        return self.zip.read(self.members[name])
+
+    def get_document_xml(self):
+        """Open Document.xml stream - or None."""
+        if "Document.xml" in self.members:
+            return self.open_member("Document.xml")
+        return None
+
+    def get_guidocument_xml(self):
+        """Open GuiDocument.xml stream - or None."""
+        if "GuiDocument.xml" in self.members:
+            return self.open_member("GuiDocument.xml")
+        return None
+
+    def is_brep_text(self, name):
+        """Check if member is a shape in the BREP text format."""
+        return os.path.splitext(name)[1].lower() in (".brp", ".brep")
+
+    def read_brep(self, name):
+        """
+        Read persisted shape as BREP string.
+
+        FreeCAD can also persist shapes in a binary format (*.bin) -
+        for these None is returned.
+        """
+        if not self.is_brep_text(name):
+            return None
+        return self.read(name).decode("utf-8")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Array instancing with Geometry Nodes.
+
+a FreeCAD array is imported as one point cloud mesh
+(one vertex per array element)
+with the element rotation and scale stored as point attributes.
+a Geometry Nodes modifier instances the base object on these points -
+so a 10 000 element array costs one base mesh and one point buffer.
+"""
+
+import hashlib
+
+import bpy
+import numpy as np
+
+NODE_GROUP_NAME = "FreeCAD Array Instances"
+MODIFIER_NAME = "FreeCAD Array"
+ROTATION_ATTRIBUTE = "freecad_rotation"
+SCALE_ATTRIBUTE = "freecad_scale"
+# same property the shape meshes use for their content hash
+HASH_PROPERTY = "freecad_mesh_hash"
+
+
+def placements_to_transforms(placements, scales=None, import_scale=1.0):
+    """
+    Convert FreeCAD placements into transform buffers.
+
+    returns a tuple of float32 arrays (positions, rotations, scales)
+    with the shape (count, 3).
+    rotations are XYZ euler angles.
+    """
+    from mathutils import Quaternion
+
+    count = len(placements)
+    positions = np.empty((count, 3), dtype=np.float32)
+    rotations = np.empty((count, 3), dtype=np.float32)
+    for index, placement in enumerate(placements):
+        positions[index] = tuple(placement.Base)
+        # FreeCAD Quaternion is XYZW while Blender is WXYZ
+        q = placement.Rotation.Q
+        rotations[index] = Quaternion((q[3], q[0], q[1], q[2])).to_euler("XYZ")
+    positions *= import_scale
+    if scales:
+        scales = np.asarray([tuple(scale) for scale in scales], dtype=np.float32)
+    else:
+        scales = np.ones((count, 3), dtype=np.float32)
+    return positions, rotations, scales
+
+
+def transforms_from_dicts(elements, import_scale=1.0):
+    """
+    Convert element placements of an import plan into transform buffers.
+
+    same result as placements_to_transforms.
+    """
+    from mathutils import Quaternion
+
+    count = len(elements)
+    positions = np.asarray(
+        [element["location"] for element in elements], dtype=np.float32
+    ).reshape(count, 3)
+    positions *= import_scale
+    rotations = np.asarray(
+        [Quaternion(element["rotation"]).to_euler("XYZ") for element in elements],
+        dtype=np.float32,
+    ).reshape(count, 3)
+    scales = np.asarray(
+        [element.get("scale", (1.0, 1.0, 1.0)) for element in elements], dtype=np.float32
+    ).reshape(count, 3)
+    return positions, rotations, scales
+
+
+def create_point_mesh(name, positions, rotations, scales):
+    """Create mesh with one vertex and transform attributes per instance."""
+    bmesh = bpy.data.meshes.new(name)
+    bmesh.vertices.add(len(positions))
+    bmesh.vertices.foreach_set("co", positions.reshape(-1))
+    for attribute_name, values in (
+        (ROTATION_ATTRIBUTE, rotations),
+        (SCALE_ATTRIBUTE, scales),
+    ):
+        attribute = bmesh.attributes.new(attribute_name, "FLOAT_VECTOR", "POINT")
+        attribute.data.foreach_set("vector", values.reshape(-1))
+    bmesh.update()
+    return bmesh
+
+
+def get_transforms_hash(positions, rotations, scales):
+    """Get content hash of the transform buffers."""
+    content = hashlib.sha1()
+    for values in (positions, rotations, scales):
+        content.update(np.ascontiguousarray(values, dtype=np.float32).tobytes())
+    return content.hexdigest()
+
+
+def get_or_create_point_mesh(datablocks, name, positions, rotations, scales):
+    """
+    Get point mesh with name if it holds the same transforms - else create it.
+
+    a changed mesh is renamed to '_old' -
+    this way the new mesh can get the original name.
+    """
+    transforms_hash = get_transforms_hash(positions, rotations, scales)
+    bmesh = datablocks.get("meshes", name)
+    if bmesh is not None:
+        if bmesh.get(HASH_PROPERTY) == transforms_hash:
+            return bmesh
+        datablocks.rename_old("meshes", name)
+    bmesh = create_point_mesh(name, positions, rotations, scales)
+    bmesh[HASH_PROPERTY] = transforms_hash
+    datablocks.add("meshes", bmesh)
+    return bmesh
+
+
+def new_socket(node_group, in_out, socket_type, name):
+    """Add node group socket."""
+    if hasattr(node_group, "interface"):
+        # blender >= 4.0
+        return node_group.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    if in_out == "INPUT":
+        return node_group.inputs.new(socket_type, name)
+    return node_group.outputs.new(socket_type, name)
+
+
+def get_input_sockets(node_group):
+    """Get node group input sockets by name."""
+    if hasattr(node_group, "interface"):
+        return {
+            item.name: item
+            for item in node_group.interface.items_tree
+            if item.item_type == "SOCKET" and item.in_out == "INPUT"
+        }
+    return {socket.name: socket for socket in node_group.inputs}
+
+
+def create_node_group():
+    """
+    Create shared instancing node group.
+
+    inputs: Geometry (points), Object (base), Rotation, Scale.
+    Rotation and Scale are fed from the point attributes by the modifier.
+    """
+    node_group = bpy.data.node_groups.new(NODE_GROUP_NAME, "GeometryNodeTree")
+    new_socket(node_group, "INPUT", "NodeSocketGeometry", "Geometry")
+    new_socket(node_group, "INPUT", "NodeSocketObject", "Object")
+    new_socket(node_group, "INPUT", "NodeSocketVector", "Rotation")
+    scale = new_socket(node_group, "INPUT", "NodeSocketVector", "Scale")
+    scale.default_value = (1.0, 1.0, 1.0)
+    new_socket(node_group, "OUTPUT", "NodeSocketGeometry", "Geometry")
+
+    nodes = node_group.nodes
+    group_input = nodes.new("NodeGroupInput")
+    group_input.location = (-400, 0)
+    object_info = nodes.new("GeometryNodeObjectInfo")
+    object_info.location = (-200, -150)
+    # the base mesh without its own placement -
+    # the element placements already contain it.
+    object_info.transform_space = "ORIGINAL"
+    instance = nodes.new("GeometryNodeInstanceOnPoints")
+    instance.location = (0, 0)
+    group_output = nodes.new("NodeGroupOutput")
+    group_output.location = (200, 0)
+
+    links = node_group.links
+    links.new(group_input.outputs["Geometry"], instance.inputs["Points"])
+    links.new(group_input.outputs["Object"], object_info.inputs["Object"])
+    links.new(object_info.outputs["Geometry"], instance.inputs["Instance"])
+    links.new(group_input.outputs["Rotation"], instance.inputs["Rotation"])
+    links.new(group_input.outputs["Scale"], instance.inputs["Scale"])
+    links.new(instance.outputs["Instances"], group_output.inputs["Geometry"])
+    return node_group
+
+
+def get_node_group():
+    """Get or create shared instancing node group."""
+    node_group = bpy.data.node_groups.get(NODE_GROUP_NAME)
+    if node_group is None or node_group.bl_idname != "GeometryNodeTree":
+        node_group = create_node_group()
+    return node_group
+
+
+def set_instance_modifier(bobj, base_bobj):
+    """Add or update the instancing modifier of bobj."""
+    modifier = bobj.modifiers.get(MODIFIER_NAME)
+    if modifier is None or modifier.type != "NODES":
+        modifier = bobj.modifiers.new(MODIFIER_NAME, "NODES")
+    node_group = get_node_group()
+    modifier.node_group = node_group
+    sockets = get_input_sockets(node_group)
+    modifier[sockets["Object"].identifier] = base_bobj
+    for name, attribute_name in (
+        ("Rotation", ROTATION_ATTRIBUTE),
+        ("Scale", SCALE_ATTRIBUTE),
+    ):
+        identifier = sockets[name].identifier
+        modifier[identifier + "_use_attribute"] = True
+        modifier[identifier + "_attribute_name"] = attribute_name
+    return modifier
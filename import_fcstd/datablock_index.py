@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Name lookup for Blender datablocks.
+
+`name in bpy.data.objects` and `bobj.name in collection.objects`
+are linear searches -
+done for every imported object the import gets quadratic.
+"""
+
+import bpy
+
+
+class DatablockIndex(object):
+    """
+    Map names to datablocks for one import session.
+
+    indexes objects, meshes, collections and materials,
+    the object names linked to every collection
+    and the child collection names of every collection.
+    every kind is filled from bpy.data on first use -
+    after that everything the importer creates, renames, links or removes
+    has to go through the index to keep it in sync.
+    entries renamed or removed outside of the index are dropped on lookup.
+    """
+
+    KINDS = ("objects", "meshes", "collections", "materials")
+
+    def __init__(self):
+        """Init."""
+        super(DatablockIndex, self).__init__()
+        self.index = {}
+        # collection name → object names
+        self.collection_objects = None
+        # object name → collection names
+        self.object_collections = None
+        # collection name → child collection names (filled per collection)
+        self.collection_children = {}
+
+    def get_names(self, kind):
+        """Get name → datablock dict for kind."""
+        names = self.index.get(kind)
+        if names is None:
+            names = {datablock.name: datablock for datablock in getattr(bpy.data, kind)}
+            self.index[kind] = names
+        return names
+
+    def get(self, kind, name):
+        """Get datablock by name - or None."""
+        names = self.get_names(kind)
+        datablock = names.get(name)
+        if datablock is not None:
+            try:
+                if datablock.name == name:
+                    return datablock
+            except ReferenceError:
+                # removed in the meantime.
+                pass
+            del names[name]
+        return None
+
+    def contains(self, kind, name):
+        """Check if datablock with name exists."""
+        return self.get(kind, name) is not None
+
+    def add(self, kind, datablock):
+        """Add datablock created outside of the index."""
+        self.get_names(kind)[datablock.name] = datablock
+        return datablock
+
+    def new(self, kind, name, *args, **kwargs):
+        """Create new datablock."""
+        datablock = getattr(bpy.data, kind).new(name, *args, **kwargs)
+        return self.add(kind, datablock)
+
+    def remove(self, kind, datablock):
+        """Remove datablock."""
+        name = datablock.name
+        getattr(bpy.data, kind).remove(datablock)
+        self.get_names(kind).pop(name, None)
+        self.rename_membership(kind, name, None)
+
+    def rename(self, kind, datablock, name):
+        """Rename datablock - returns the name blender has chosen."""
+        names = self.get_names(kind)
+        name_old = datablock.name
+        names.pop(name_old, None)
+        datablock.name = name
+        names[datablock.name] = datablock
+        self.rename_membership(kind, name_old, datablock.name)
+        return datablock.name
+
+    def rename_old(self, kind, name):
+        """
+        Add '_old' to datablock name.
+
+        recursive - an existing '_old' datablock gets '_old_old' and so on.
+        returns the new name - or None if there is no datablock with name.
+        """
+        datablock = self.get(kind, name)
+        if datablock is None:
+            return None
+        name_old = name + "_old"
+        if self.contains(kind, name_old):
+            self.rename_old(kind, name_old)
+        return self.rename(kind, datablock, name_old)
+
+    # collection membership
+    def rename_children(self, name_old, name_new):
+        """Move child collection entries to the new name - or drop them."""
+        children = self.collection_children.pop(name_old, None)
+        if children is not None and name_new is not None:
+            self.collection_children[name_new] = children
+        for names in self.collection_children.values():
+            if name_old in names:
+                names.discard(name_old)
+                if name_new is not None:
+                    names.add(name_new)
+
+    def rename_membership(self, kind, name_old, name_new):
+        """Move memberships to the new name - or drop them if name_new is None."""
+        if kind == "collections":
+            self.rename_children(name_old, name_new)
+        if self.collection_objects is None:
+            return
+        if kind == "objects":
+            source, target = self.object_collections, self.collection_objects
+        elif kind == "collections":
+            source, target = self.collection_objects, self.object_collections
+        else:
+            return
+        related = source.pop(name_old, set())
+        for related_name in related:
+            names = target.setdefault(related_name, set())
+            names.discard(name_old)
+            if name_new is not None:
+                names.add(name_new)
+        if name_new is not None:
+            source[name_new] = related
+
+    def build_memberships(self):
+        """Collect the objects of all collections in one pass."""
+        self.collection_objects = {}
+        self.object_collections = {}
+        for collection in bpy.data.collections:
+            names = {bobj.name for bobj in collection.objects}
+            self.collection_objects[collection.name] = names
+            for name in names:
+                self.object_collections.setdefault(name, set()).add(collection.name)
+
+    def in_collection(self, collection, bobj):
+        """Check if bobj is linked to collection."""
+        if self.collection_objects is None:
+            self.build_memberships()
+        names = self.collection_objects.get(collection.name)
+        if names is None:
+            # collection created outside of the index
+            names = {item.name for item in collection.objects}
+            self.collection_objects[collection.name] = names
+            for name in names:
+                self.object_collections.setdefault(name, set()).add(collection.name)
+        return bobj.name in names
+
+    def link(self, collection, bobj):
+        """Link bobj to collection (if not already linked)."""
+        if self.in_collection(collection, bobj):
+            return False
+        collection.objects.link(bobj)
+        self.collection_objects[collection.name].add(bobj.name)
+        self.object_collections.setdefault(bobj.name, set()).add(collection.name)
+        return True
+
+    def unlink(self, collection, bobj):
+        """Unlink bobj from collection (if linked)."""
+        if not self.in_collection(collection, bobj):
+            return False
+        collection.objects.unlink(bobj)
+        self.collection_objects[collection.name].discard(bobj.name)
+        self.object_collections.get(bobj.name, set()).discard(collection.name)
+        return True
+
+    def get_children(self, collection):
+        """Get names of the child collections of collection."""
+        names = self.collection_children.get(collection.name)
+        if names is None:
+            names = {child.name for child in collection.children}
+            self.collection_children[collection.name] = names
+        return names
+
+    def has_child(self, collection, name):
+        """Check if collection has a child collection with name."""
+        return name in self.get_children(collection)
+
+    def link_child(self, collection, child):
+        """Link child collection to collection (if not already linked)."""
+        if self.has_child(collection, child.name):
+            return False
+        collection.children.link(child)
+        self.get_children(collection).add(child.name)
+        return True
+
+    def get_collections(self, bobj):
+        """Get names of all collections bobj is linked to."""
+        if self.object_collections is None:
+            self.build_memberships()
+        return self.object_collections.get(bobj.name, set())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+One pass analysis of a FreeCAD document.
+
+collects what the import would otherwise ask again and again per object:
+    import branch       type dispatch (isDerivedFrom chain)
+    host childs         Arch objects with Host / Hosts set to an object
+    parents / childs    adjacency from obj.Parents
+"""
+
+from .. import freecad_helper as fc_helper
+
+# always filtered by get_root_objects
+ROOT_TYPEID_FILTER = ("App::Line", "App::Plane", "App::Origin")
+
+# import branches in dispatch order -
+# every object is handled as the first TypeId it is derived from.
+BRANCHES = (
+    "Part::FeaturePython",
+    "Part::Feature",
+    "Mesh::Feature",
+    "App::Part",
+    "App::LinkElement",
+    "App::Link",
+)
+
+
+def get_branch(obj):
+    """Get import branch of object - or None if it can not be imported."""
+    for type_id in BRANCHES:
+        if obj.isDerivedFrom(type_id):
+            return type_id
+    return None
+
+
+def get_hosts(obj):
+    """
+    Get objects that host obj.
+
+    same rules as `fc_helper.object_get_HostChilds` -
+    a `Host` property wins over `Hosts`.
+    """
+    if hasattr(obj, "Host"):
+        if obj.Host:
+            return [obj.Host]
+        return []
+    if hasattr(obj, "Hosts") and obj.Hosts:
+        hosts = []
+        for host in obj.Hosts:
+            if host not in hosts:
+                hosts.append(host)
+        return hosts
+    return []
+
+
+def get_parent_name(parent, subname):
+    """Get name of the direct parent from a obj.Parents entry."""
+    # subname is the path below parent - ending with the object itself.
+    names = [name for name in subname.split(".") if name]
+    if len(names) > 1:
+        return names[-2]
+    return parent.Name
+
+
+class DocumentAnalysis(object):
+    """
+    Analyze all objects of a document in one pass.
+
+    objects created after the analysis (for example elements of arrays
+    recomputed during the import) and objects of other documents
+    are answered by falling back to the direct FreeCAD queries.
+    """
+
+    def __init__(self, doc):
+        """Init."""
+        super(DocumentAnalysis, self).__init__()
+        self.doc = doc
+        # object name → import branch
+        self.branches = {}
+        # host name → objects with Host / Hosts set to it
+        self.host_childs = {}
+        # object name → names of the direct parents / childs
+        self.parents = {}
+        self.childs = {}
+        # object name → Part::FeaturePython kind
+        self.feature_python_kinds = {}
+        self.analyze()
+
+    def analyze(self):
+        """Walk all objects once."""
+        for obj in self.doc.Objects:
+            self.branches[obj.Name] = get_branch(obj)
+            for host in get_hosts(obj):
+                # the host can come later in doc.Objects -
+                # so only check that it belongs to this document.
+                if host.Document.Name == self.doc.Name:
+                    self.host_childs.setdefault(host.Name, []).append(obj)
+            parents = self.parents.setdefault(obj.Name, [])
+            for parent, subname in obj.Parents:
+                parent_name = get_parent_name(parent, subname)
+                if parent_name not in parents:
+                    parents.append(parent_name)
+                    self.childs.setdefault(parent_name, []).append(obj.Name)
+
+    def is_analyzed(self, obj):
+        """Check if obj was part of the analysis."""
+        return obj.Document.Name == self.doc.Name and obj.Name in self.parents
+
+    def get_branch(self, obj):
+        """Get import branch of object."""
+        if self.is_analyzed(obj):
+            return self.branches[obj.Name]
+        return get_branch(obj)
+
+    def get_host_childs(self, obj):
+        """Get objects that have set Host(s) to obj."""
+        if self.is_analyzed(obj):
+            return self.host_childs.get(obj.Name, [])
+        return fc_helper.object_get_HostChilds(obj)
+
+    def get_feature_python_kind(self, obj):
+        """
+        Get kind of Part::FeaturePython object.
+
+        one of 'Array', 'ArrayType', 'ArchWithHostChilds', 'Hosts'
+        or None for all others.
+        """
+        kind = self.feature_python_kinds.get(obj.Name)
+        if kind is None or not self.is_analyzed(obj):
+            kind = ""
+            if hasattr(obj, "ExpandArray") and hasattr(obj, "ElementList"):
+                kind = "Array"
+            elif hasattr(obj, "ArrayType"):
+                kind = "ArrayType"
+            elif len(self.get_host_childs(obj)) > 0:
+                # Arch Workbench - ArchComponent
+                kind = "ArchWithHostChilds"
+            elif hasattr(obj, "Hosts"):
+                # Arch Workbench - Childs
+                kind = "Hosts"
+            if self.is_analyzed(obj):
+                self.feature_python_kinds[obj.Name] = kind
+        return kind or None
+
+    def get_parents(self, obj):
+        """Get names of the direct parents."""
+        return self.parents.get(obj.Name, [])
+
+    def get_childs(self, obj):
+        """Get names of the direct childs."""
+        return self.childs.get(obj.Name, [])
+
+    def get_root_objects(self, filter_list=()):
+        """
+        Get root list of objects.
+
+        same result as `fc_helper.get_root_objects`:
+        a tuple of (objects without parents, objects with Hosts set).
+        """
+        typeid_filter_list = ROOT_TYPEID_FILTER + tuple(filter_list)
+        result_objects = []
+        result_objects_withHost = []
+        for obj in self.doc.Objects:
+            if obj.TypeId in typeid_filter_list or self.parents.get(obj.Name):
+                continue
+            if hasattr(obj, "Hosts") and len(obj.Hosts) > 0:
+                result_objects_withHost.append(obj)
+            else:
+                result_objects.append(obj)
+        return result_objects, result_objects_withHost
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Scan FreeCAD Document.xml without loading FreeCAD."""
+
+import xml.sax
+
+from .archive import FCStdArchive
+
+
+class FreeCAD_document_scan_handler(xml.sax.ContentHandler):
+    """
+    A XML handler to collect the object types of a FreeCAD document.
+
+    collects the TypeId of every object,
+    the python modules of all python feature proxies
+    and the archive members the object shapes are stored in.
+    """
+
+    def __init__(self):
+        """Init."""
+        self.types = {}
+        self.proxy_modules = set()
+        self.shape_files = {}
+        self.current_object = None
+        self.current_property = None
+
+    def startElement(self, tag, attributes):
+        """Call when an element starts."""
+        if tag == "Object":
+            # the object list entries have a type -
+            # the object data entries only a name.
+            type_id = attributes.get("type")
+            if type_id:
+                self.types[type_id] = self.types.get(type_id, 0) + 1
+            else:
+                self.current_object = attributes.get("name")
+        elif tag == "Property":
+            self.current_property = attributes.get("name")
+        elif tag == "Part":
+            if self.current_object and self.current_property == "Shape":
+                self.shape_files[self.current_object] = attributes.get("file")
+        elif tag == "Python":
+            module = attributes.get("module")
+            if module:
+                self.proxy_modules.add(module)
+
+    def endElement(self, tag):
+        """Call when an elements ends."""
+        if tag == "Object":
+            self.current_object = None
+        elif tag == "Property":
+            self.current_property = None
+
+
+def scan_document(archive):
+    """
+    Scan Document.xml of FCStd file.
+
+    archive is a FCStdArchive or a filename.
+    returns dict with
+    `types`: TypeId → object count
+    `proxy_modules`: set of python modules used by python features
+    `shape_files`: object name → archive member of the stored shape
+    """
+    if not isinstance(archive, FCStdArchive):
+        with FCStdArchive(archive) as archive:
+            return scan_document(archive)
+    handler = FreeCAD_document_scan_handler()
+    df = archive.get_document_xml()
+    if df:
+        with df:
+            xml.sax.parse(df, handler)
+    return {
+        "types": handler.types,
+        "proxy_modules": handler.proxy_modules,
+        "shape_files": handler.shape_files,
+    }
+
+
+def get_required_workbenches(scan):
+    """Get FreeCAD workbench modules the documents python features need."""
+    workbenches = set()
+    for module in scan["proxy_modules"]:
+        root = module.split(".")[0]
+        if root.startswith("Arch") or root in ("ifc_objects", "ifc_viewproviders"):
+            workbenches.add("Arch")
+        elif root.startswith("Draft") or root in (
+            "draftobjects",
+            "draftviewproviders",
+        ):
+            workbenches.add("Draft")
+    return workbenches
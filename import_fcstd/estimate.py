@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Import estimate (dry run).
+
+computes from an import plan (see import_plan)
+what an import would create - without creating any Blender data:
+per-type counts, link fan-out, instance count,
+triangles at the chosen tessellation and projected memory.
+the geometry counts come from cached mesh data -
+or are estimated (see tessellation.estimate_shape_counts).
+"""
+
+import collections
+
+# rough Blender memory cost per element in bytes.
+# (position / normal / index data of the mesh element plus bookkeeping)
+BYTES_PER_VERT = 32
+BYTES_PER_EDGE = 16
+BYTES_PER_LOOP = 16
+BYTES_PER_FACE = 16
+BYTES_PER_OBJECT = 2048
+# instancing points: position + rotation + scale
+BYTES_PER_ARRAY_POINT = 36
+
+
+def get_mesh_counts(mesh_data):
+    """Get vertex / face / triangle / loop counts of mesh_data."""
+    loop_totals = mesh_data["loop_totals"]
+    loops = int(loop_totals.sum())
+    return {
+        "verts": len(mesh_data["verts"]),
+        "faces": len(loop_totals),
+        "triangles": loops - 2 * len(loop_totals),
+        "loops": loops,
+    }
+
+
+def get_mesh_bytes(counts):
+    """Estimate Blender memory of one mesh."""
+    # every edge is shared by two loops of a closed mesh.
+    edges = counts["loops"] // 2
+    return (
+        counts["verts"] * BYTES_PER_VERT
+        + edges * BYTES_PER_EDGE
+        + counts["loops"] * BYTES_PER_LOOP
+        + counts["faces"] * BYTES_PER_FACE
+    )
+
+
+class PlanEstimate(object):
+    """
+    Walk an import plan and sum up what its execution would create.
+
+    get_geometry_counts(geometry_key) returns the counts of get_mesh_counts -
+    with "estimated": True if they are not exact - or None.
+    the other options have the same meaning as for the PlanExecutor.
+    """
+
+    def __init__(
+        self,
+        plan,
+        get_geometry_counts,
+        array_instancing=False,
+        share_meshes=True,
+        links_as_collectioninstance=True,
+    ):
+        """Init."""
+        super(PlanEstimate, self).__init__()
+        self.plan = plan
+        self.nodes = plan["nodes"]
+        self.array_instancing = array_instancing
+        self.share_meshes = share_meshes
+        self.links_as_collectioninstance = links_as_collectioninstance
+        self.childs = collections.defaultdict(list)
+        for node in self.nodes:
+            if node["parent"] is not None:
+                self.childs[node["parent"]].append(node["id"])
+        self.geometry_counts = {}
+        self.missing_geometry = 0
+        self.estimated_geometry = 0
+        for key in plan["geometry"]:
+            counts = get_geometry_counts(key)
+            if counts is None:
+                self.missing_geometry += 1
+            else:
+                self.geometry_counts[key] = counts
+                if counts.get("estimated"):
+                    self.estimated_geometry += 1
+        self.subtree_totals = {}
+        self.subtree_objects = {}
+
+    def get_node_counts(self, node):
+        """Get geometry counts of a MESH node."""
+        counts = self.geometry_counts.get(node.get("geometry"))
+        if counts is None:
+            return {"verts": 0, "faces": 0, "triangles": 0, "loops": 0}
+        return counts
+
+    def get_subtree_totals(self, node_id):
+        """Get (instances, triangles) shown by node and its childs."""
+        totals = self.subtree_totals.get(node_id)
+        if totals is None:
+            # guard against link cycles
+            self.subtree_totals[node_id] = (0, 0)
+            node = self.nodes[node_id]
+            instances = 0
+            triangles = 0
+            if node["type"] == "MESH":
+                instances = 1
+                triangles = self.get_node_counts(node)["triangles"]
+            elif node["type"] in ("LINK", "ARRAY"):
+                target_instances, target_triangles = self.get_subtree_totals(
+                    node["link_target"]
+                )
+                count = len(node.get("elements", ())) if node["type"] == "ARRAY" else 1
+                instances = count * target_instances
+                triangles = count * target_triangles
+            for child_id in self.childs[node_id]:
+                child_instances, child_triangles = self.get_subtree_totals(child_id)
+                instances += child_instances
+                triangles += child_triangles
+            totals = (instances, triangles)
+            self.subtree_totals[node_id] = totals
+        return totals
+
+    def get_subtree_ids(self, node_id):
+        """Get ids of node and all its childs."""
+        ids = [node_id]
+        for child_id in self.childs[node_id]:
+            ids.extend(self.get_subtree_ids(child_id))
+        return ids
+
+    def uses_target_collection(self, node):
+        """Check if LINK / ARRAY node instances the target collection."""
+        target = self.nodes[node["link_target"]]
+        if target["type"] == "MESH":
+            # linked copies share the mesh -
+            # only instancing arrays need the base object.
+            return node["type"] == "ARRAY" and self.array_instancing
+        return self.links_as_collectioninstance
+
+    def get_realized_targets(self):
+        """Get ids of all TARGET nodes the execution realizes in the link targets."""
+        realized = set()
+        for node in self.nodes:
+            if (
+                node["role"] == "SCENE"
+                and node["type"] in ("LINK", "ARRAY")
+                and self.uses_target_collection(node)
+            ):
+                realized.update(self.get_subtree_ids(node["link_target"]))
+        return realized
+
+    def get_link_objects(self, node):
+        """Get number of Blender objects one link to the target of node creates."""
+        target = self.nodes[node["link_target"]]
+        if target["type"] == "MESH" or self.links_as_collectioninstance:
+            return 1
+        # empty + copy of the target tree
+        return 1 + self.get_subtree_objects(target["id"])
+
+    def get_object_count(self, node):
+        """Get number of Blender objects the node creates."""
+        if node["type"] == "LINK":
+            return self.get_link_objects(node)
+        if node["type"] == "ARRAY":
+            if self.array_instancing and self.nodes[node["link_target"]]["type"] == "MESH":
+                return 1
+            # empty + one link per element
+            return 1 + len(node["elements"]) * self.get_link_objects(node)
+        return 1
+
+    def get_subtree_objects(self, node_id):
+        """Get number of Blender objects node and its childs create."""
+        count = self.subtree_objects.get(node_id)
+        if count is None:
+            # guard against link cycles
+            self.subtree_objects[node_id] = 0
+            count = self.get_object_count(self.nodes[node_id])
+            for child_id in self.childs[node_id]:
+                count += self.get_subtree_objects(child_id)
+            self.subtree_objects[node_id] = count
+        return count
+
+    def compute(self):
+        """Compute estimate."""
+        realized_targets = self.get_realized_targets()
+        realized = [
+            node
+            for node in self.nodes
+            if node["role"] == "SCENE" or node["id"] in realized_targets
+        ]
+        type_counts = collections.Counter(node["type_id"] for node in realized)
+        node_type_counts = collections.Counter(node["type"] for node in realized)
+        objects = sum(self.get_object_count(node) for node in realized)
+
+        # see PlanExecutor.get_mesh_key -
+        # linked copies of MESH targets always share the mesh of the target.
+        meshes = {}
+        for node in self.nodes:
+            if node["type"] == "MESH":
+                mesh_key = (node["geometry"], node.get("material"))
+                if not self.share_meshes:
+                    mesh_key += (node["id"],)
+                meshes[mesh_key] = self.get_node_counts(node)
+        mesh_triangles = sum(counts["triangles"] for counts in meshes.values())
+        mesh_bytes = sum(get_mesh_bytes(counts) for counts in meshes.values())
+
+        array_points = 0
+        if self.array_instancing:
+            array_points = sum(
+                len(node["elements"])
+                for node in realized
+                if node["type"] == "ARRAY"
+                and self.nodes[node["link_target"]]["type"] == "MESH"
+            )
+
+        instances = 0
+        scene_triangles = 0
+        for node in self.nodes:
+            if node["role"] == "SCENE" and node["parent"] is None:
+                node_instances, node_triangles = self.get_subtree_totals(node["id"])
+                instances += node_instances
+                scene_triangles += node_triangles
+
+        fan_out = collections.Counter()
+        fan_out_links = collections.Counter()
+        for node in self.nodes:
+            if node["type"] in ("LINK", "ARRAY"):
+                fan_out_links[node["link_target"]] += 1
+                fan_out[node["link_target"]] += len(node.get("elements", ())) or 1
+
+        return {
+            "document": self.plan["document"],
+            "types": dict(type_counts.most_common()),
+            "node_types": dict(node_type_counts.most_common()),
+            "objects": objects,
+            "meshes": len(meshes),
+            "materials": len(self.plan["materials"]),
+            "geometries": len(self.plan["geometry"]),
+            "missing_geometry": self.missing_geometry,
+            "estimated_geometry": self.estimated_geometry,
+            "instances": instances,
+            "link_targets": len(fan_out),
+            "link_fan_out": [
+                {
+                    "target": self.nodes[target_id]["label"],
+                    "links": fan_out_links[target_id],
+                    "instances": count,
+                }
+                for target_id, count in fan_out.most_common()
+            ],
+            "triangles_scene": scene_triangles,
+            "triangles_meshes": mesh_triangles,
+            "array_points": array_points,
+            "memory_bytes": (
+                mesh_bytes
+                + objects * BYTES_PER_OBJECT
+                + array_points * BYTES_PER_ARRAY_POINT
+            ),
+        }
+
+
+def format_estimate(estimate, type_count=10, fan_out_count=5):
+    """Get estimate as list of lines."""
+    lines = [
+        "estimate '{}': {} objects  {} meshes  {} materials  ~{:.1f} MiB"
+        "".format(
+            estimate["document"],
+            estimate["objects"],
+            estimate["meshes"],
+            estimate["materials"],
+            estimate["memory_bytes"] / 2 ** 20,
+        ),
+        "  {} geometry instances  {} triangles in scene  {} triangles in meshes"
+        "".format(
+            estimate["instances"], estimate["triangles_scene"], estimate["triangles_meshes"]
+        ),
+    ]
+    if estimate["array_points"]:
+        lines.append("  {} array instancing points".format(estimate["array_points"]))
+    if estimate["estimated_geometry"]:
+        lines.append(
+            "  {} of {} geometries estimated (not in the tessellation cache)"
+            "".format(estimate["estimated_geometry"], estimate["geometries"])
+        )
+    if estimate["missing_geometry"]:
+        lines.append(
+            "  {} geometries could not be counted".format(estimate["missing_geometry"])
+        )
+    for type_id, count in list(estimate["types"].items())[:type_count]:
+        lines.append("  {:<32} {:>7}".format(type_id, count))
+    if estimate["link_fan_out"]:
+        lines.append("  link fan-out ({} targets):".format(estimate["link_targets"]))
+        for entry in estimate["link_fan_out"][:fan_out_count]:
+            lines.append(
+                "    {:<30} {:>5} links {:>7} instances"
+                "".format(entry["target"], entry["links"], entry["instances"])
+            )
+    return lines
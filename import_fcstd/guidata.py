@@ -3,8 +3,100 @@
 
 """XML handler."""
 
+import struct
 import xml.sax
-import zipfile
+
+import numpy as np
+
+from .archive import FCStdArchive
+
+
+# ViewProvider properties the importer uses
+GUI_PROPERTIES = frozenset(("Visibility", "ShapeColor", "Transparency", "DiffuseColor"))
+
+
+COLOR_LIST_HEADER = struct.Struct("<I")
+
+
+def get_color_list_count(data):
+    """Get number of colors in a PropertyColorList file."""
+    if len(data) < COLOR_LIST_HEADER.size:
+        return 0
+    (count,) = COLOR_LIST_HEADER.unpack_from(data)
+    # never read behind the end of a truncated file.
+    return min(count, (len(data) - COLOR_LIST_HEADER.size) // 4)
+
+
+def decode_color_list(data):
+    """
+    Decode PropertyColorList file.
+
+    the file starts with the color count (uint32 little endian)
+    followed by one packed color (uint32 little endian) per entry.
+    a packed color is 0xRRGGBBAA -
+    so the bytes of one entry are stored as a, b, g, r.
+    A is the transparency (0 = opaque).
+
+    returns (count, 4) uint8 array with r, g, b, transparency columns.
+    this is a view on data - nothing is copied.
+    """
+    count = get_color_list_count(data)
+    colors = np.frombuffer(
+        data, dtype=np.uint8, count=count * 4, offset=COLOR_LIST_HEADER.size
+    ).reshape(count, 4)
+    return colors[:, ::-1]
+
+
+class ColorList(object):
+    """
+    Lazy loaded DiffuseColor list.
+
+    the file is read from the archive on first access of `data`
+    and decoded on first access of `colors`.
+    """
+
+    def __init__(self, archive, member):
+        """Init."""
+        super(ColorList, self).__init__()
+        self.archive = archive
+        self.member = member
+        self._data = None
+        self._colors = None
+
+    @classmethod
+    def from_data(cls, data):
+        """Create from already read file content."""
+        color_list = cls(None, None)
+        color_list._data = data
+        return color_list
+
+    @property
+    def data(self):
+        """Get file content."""
+        if self._data is None:
+            self.load()
+        return self._data
+
+    def load(self):
+        """Read file content from archive."""
+        self._data = self.archive.read(self.member)
+        # the archive can be closed now.
+        self.archive = None
+
+    @property
+    def colors(self):
+        """Get (count, 4) uint8 array (see decode_color_list)."""
+        if self._colors is None:
+            self._colors = decode_color_list(self.data)
+        return self._colors
+
+    def __len__(self):
+        """Get color count - without decoding."""
+        return get_color_list_count(self.data)
+
+    def __getitem__(self, index):
+        """Get (r, g, b, transparency) uint8 values of one entry."""
+        return self.colors[index]
 
 
 class FreeCAD_xml_handler(xml.sax.ContentHandler):
@@ -13,11 +105,14 @@ class FreeCAD_xml_handler(xml.sax.ContentHandler):
 
     this creates a dictionary where each key is a FC object name,
     and each value is a dictionary of property:value pairs
+
+    if object_names is given only these ViewProviders are extracted.
     """
 
-    def __init__(self):
+    def __init__(self, object_names=None):
         """Init."""
         self.guidata = {}
+        self.object_names = object_names
         self.current = None
         self.properties = {}
         self.currentprop = None
@@ -26,17 +121,21 @@ class FreeCAD_xml_handler(xml.sax.ContentHandler):
     def startElement(self, tag, attributes):
         """Call when an element starts."""
         if tag == "ViewProvider":
-            self.current = attributes["name"]
+            name = attributes["name"]
+            if self.object_names is None or name in self.object_names:
+                self.current = name
+            else:
+                self.current = None
+        elif not self.current:
+            # skipped ViewProvider
+            pass
         elif tag == "Property":
             name = attributes["name"]
-            element_names = [
-                "Visibility",
-                "ShapeColor",
-                "Transparency",
-                "DiffuseColor"
-            ]
-            if name in element_names:
+            if name in GUI_PROPERTIES:
                 self.currentprop = name
+        elif not self.currentprop:
+            # value of a property we do not need
+            pass
         elif tag == "Bool":
             if attributes["value"] == "true":
                 self.currentval = True
@@ -60,44 +159,49 @@ class FreeCAD_xml_handler(xml.sax.ContentHandler):
         if tag == "ViewProvider":
             if self.current and self.properties:
                 self.guidata[self.current] = self.properties
-                self.current = None
-                self.properties = {}
+            self.current = None
+            self.properties = {}
         elif tag == "Property":
             if self.currentprop and (self.currentval is not None):
                 self.properties[self.currentprop] = self.currentval
-                self.currentprop = None
-                self.currentval = None
+            self.currentprop = None
+            self.currentval = None
 
 
-def load_guidata(filename, report):
-    """Check if we have a GUI document."""
+def load_guidata(archive, report, object_names=None):
+    """
+    Check if we have a GUI document.
+
+    archive is a FCStdArchive or a filename.
+    GuiDocument.xml is parsed directly from the zip stream -
+    so the file is never loaded into memory as a whole.
+    the DiffuseColor files are read from the archive on first use -
+    so the archive has to stay open as long as guidata is used.
+    (if a filename is given they are read before the file is closed.)
+    object_names (set) restricts the extraction to these objects.
+    """
+    if not isinstance(archive, FCStdArchive):
+        with FCStdArchive(archive) as archive:
+            guidata = load_guidata(archive, report, object_names)
+            for properties in (guidata or {}).values():
+                if "DiffuseColor" in properties:
+                    properties["DiffuseColor"].load()
+            return guidata
     report({'INFO'}, "load guidata..")
     guidata = None
-    zdoc = zipfile.ZipFile(filename)
-    if zdoc:
-        if "GuiDocument.xml" in zdoc.namelist():
-            gf = zdoc.open("GuiDocument.xml")
-            guidata = gf.read()
-            gf.close()
-            Handler = FreeCAD_xml_handler()
-            xml.sax.parseString(guidata, Handler)
-            guidata = Handler.guidata
-            for key, properties in guidata.items():
-                # open each diffusecolor files and retrieve values
-                # first 4 bytes are the array length,
-                # then each group of 4 bytes is abgr
-                if "DiffuseColor" in properties:
-                    # print ("opening:",guidata[key]["DiffuseColor"])
-                    df = zdoc.open(guidata[key]["DiffuseColor"])
-                    buf = df.read()
-                    # print (buf," length ",len(buf))
-                    df.close()
-                    cols = []
-                    for i in range(1, int(len(buf)/4)):
-                        cols.append(
-                            (buf[i*4+3], buf[i*4+2], buf[i*4+1], buf[i*4]))
-                    guidata[key]["DiffuseColor"] = cols
-        zdoc.close()
+    gf = archive.get_guidocument_xml()
+    if gf:
+        Handler = FreeCAD_xml_handler(object_names)
+        with gf:
+            xml.sax.parse(gf, Handler)
+        guidata = Handler.guidata
+        for key, properties in guidata.items():
+            if "DiffuseColor" in properties:
+                member = properties["DiffuseColor"]
+                if member in archive:
+                    properties["DiffuseColor"] = ColorList(archive, member)
+                else:
+                    del properties["DiffuseColor"]
     report({'INFO'}, "load guidata done.")
     # print("guidata:", guidata)
     return guidata
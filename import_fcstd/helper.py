@@ -6,18 +6,6 @@
 import bpy
 
 
-def rename_old_data(data, data_label):
-    """Recusive add '_old' to data object."""
-    name_old = None
-    if data_label in data:
-        name_old = data[data_label].name + "_old"
-        if name_old in data:
-            # rename recusive..
-            rename_old_data(data, name_old)
-        data[data_label].name = name_old
-    return name_old
-
-
 def find_layer_collection_recusive(*, collection_name, layer_collection):
     """Recursivly transverse layer_collection for a particular name."""
     result_layer_collection = None
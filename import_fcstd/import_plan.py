@@ -0,0 +1,721 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Two pass import.
+
+the analysis pass (PlanBuilder) walks the FreeCAD document
+and produces a flat, json serializable plan.
+the execution pass (PlanExecutor) realizes the plan in Blender -
+it does not need FreeCAD at all.
+
+plan layout:
+    {
+        "format_version": 1,
+        "document": "Name",
+        "settings": {"scale": ..., "tessellation": ..., ...},
+        "nodes": [node, ...],
+        "geometry": {geometry_key: {"source": "Doc#Name", "kind": "SHAPE", "mesh_hash": ...}},
+        "materials": {material_key: {"ShapeColor": [...], ...}},
+    }
+
+every node is a dict:
+    id              index in nodes - parents always come before their childs
+    type            GROUP, MESH, LINK or ARRAY
+    type_id         FreeCAD TypeId
+    name / label    FreeCAD Name / Blender name
+    parent          id of parent node - or None
+    role            SCENE (imported) or TARGET (only used by links / arrays)
+    placement       {"location": [x, y, z], "rotation": [w, x, y, z], "scale": [x, y, z]}
+    link_target     id of the linked node (LINK / ARRAY)
+    elements        element placements (ARRAY)
+    geometry        key of the placement independent geometry (MESH)
+    material        key into materials (MESH)
+
+geometry keys are tessellation cache keys -
+so the mesh data for a plan can come from the tessellation cache
+or from the geometry folder saved next to the plan.
+mesh_hash is the freecad_mesh_hash the direct import stores in its meshes -
+so both import paths can update the meshes of each other.
+"""
+
+import base64
+import hashlib
+import json
+import os
+
+import bpy
+
+from .. import freecad_helper as fc_helper
+from . import array_instancer
+from . import guidata
+from . import helper
+from . import mesh_builder
+from . import tessellation_cache
+from .material import MaterialManager
+from .log import logger
+
+PLAN_FORMAT_VERSION = 1
+
+NODE_TYPES = ("GROUP", "MESH", "LINK", "ARRAY")
+
+PLAN_FILENAME = "plan.json"
+GEOMETRY_DIRNAME = "geometry"
+
+
+def placement_to_dict(placement, scale=None):
+    """Convert FreeCAD placement to json compatible dict."""
+    q = placement.Rotation.Q
+    result = {
+        "location": list(placement.Base),
+        # FreeCAD Quaternion is XYZW while Blender is WXYZ
+        "rotation": [q[3], q[0], q[1], q[2]],
+    }
+    if scale is not None:
+        result["scale"] = list(scale)
+    return result
+
+
+def get_obj_scale(obj):
+    """Get Scale property - or None."""
+    if "Scale" in obj.PropertiesList:
+        scale = obj.Scale
+        if isinstance(scale, (int, float)):
+            return [scale] * 3
+        return list(scale)
+    return None
+
+
+def get_gui_entry(gui):
+    """Get json compatible copy of the gui data of one object."""
+    entry = {}
+    if "ShapeColor" in gui:
+        entry["ShapeColor"] = list(gui["ShapeColor"])
+    if "Transparency" in gui:
+        entry["Transparency"] = gui["Transparency"]
+    if "DiffuseColor" in gui:
+        entry["DiffuseColor"] = base64.b64encode(gui["DiffuseColor"].data).decode("ascii")
+    return entry
+
+
+def get_material_key(gui):
+    """Get content key of the gui data of one object."""
+    entry = get_gui_entry(gui)
+    return hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def gui_entry_to_guidata(entry):
+    """Convert plan material entry back to importer gui data."""
+    gui = dict(entry)
+    if "ShapeColor" in gui:
+        gui["ShapeColor"] = tuple(gui["ShapeColor"])
+    if "DiffuseColor" in gui:
+        gui["DiffuseColor"] = guidata.ColorList.from_data(
+            base64.b64decode(gui["DiffuseColor"])
+        )
+    return gui
+
+
+def save_plan(plan, directory, get_mesh_data=None):
+    """
+    Save plan as json.
+
+    with get_mesh_data the mesh data of all plan geometry
+    is saved to the geometry folder next to it -
+    so the plan can be executed without FreeCAD and without the tessellation cache.
+    returns the plan path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, PLAN_FILENAME)
+    with open(path, "w") as f:
+        json.dump(plan, f, indent=1)
+    if get_mesh_data:
+        store = tessellation_cache.TessellationCache(os.path.join(directory, GEOMETRY_DIRNAME))
+        for key in plan["geometry"]:
+            mesh_data = get_mesh_data(key)
+            if mesh_data is not None:
+                store.save(key, mesh_data)
+    return path
+
+
+def load_plan(path):
+    """
+    Load plan.
+
+    path is the plan file or the directory it was saved to.
+    returns (plan, geometry store) - the store is None if no geometry was saved.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, PLAN_FILENAME)
+    with open(path) as f:
+        plan = json.load(f)
+    if plan.get("format_version") != PLAN_FORMAT_VERSION:
+        raise ValueError(
+            "unsupported plan format '{}' in '{}'".format(plan.get("format_version"), path)
+        )
+    store = None
+    geometry_dir = os.path.join(os.path.dirname(path), GEOMETRY_DIRNAME)
+    if os.path.isdir(geometry_dir):
+        store = tessellation_cache.TessellationCache(geometry_dir)
+    return plan, store
+
+
+class PlanObjectRef(object):
+    """Stand-in for the FreeCAD object the MaterialManager asks for."""
+
+    def __init__(self, name, label):
+        """Init."""
+        super(PlanObjectRef, self).__init__()
+        self.Name = name
+        self.Label = label
+
+
+class PlanBuilder(object):
+    """
+    Analysis pass: walk the document and collect the plan.
+
+    uses the ImportFcstd instance for configuration,
+    labels, visibility, gui data and the document analysis.
+    """
+
+    def __init__(self, importer):
+        """Init."""
+        super(PlanBuilder, self).__init__()
+        self.importer = importer
+        self.config = importer.config
+        self.nodes = []
+        self.geometry = {}
+        self.materials = {}
+        # (document name, object name) → node id of link target
+        self.targets = {}
+        # geometry key → FreeCAD shape / BREP / mesh_data - not serialized
+        self.shapes = {}
+        self.breps = {}
+        self.mesh_data = {}
+
+    def build(self, doc):
+        """Build plan for document."""
+        analysis = self.importer.get_document_analysis(doc)
+        obj_list, _ = analysis.get_root_objects(filter_list=self.importer.typeid_filter_list)
+        for obj in obj_list:
+            if self.importer.check_obj_visibility_with_skiphidden(obj):
+                self.plan_object(obj, parent=None, role="SCENE")
+        return {
+            "format_version": PLAN_FORMAT_VERSION,
+            "document": doc.Name,
+            "settings": {
+                "scale": self.config["scale"],
+                "tessellation": self.config["tessellation"],
+                "weld_tolerance": self.config["weld_tolerance"],
+                "auto_smooth_use": self.config["auto_smooth_use"],
+                "auto_smooth_angle": self.config["auto_smooth_angle"],
+            },
+            "nodes": self.nodes,
+            "geometry": self.geometry,
+            "materials": self.materials,
+        }
+
+    def add_node(self, obj, node_type, parent, role, **data):
+        """Add node to plan."""
+        node = {
+            "id": len(self.nodes),
+            "type": node_type,
+            "type_id": obj.TypeId,
+            "name": obj.Name,
+            "label": self.importer.get_obj_label(obj),
+            "parent": parent,
+            "role": role,
+            "placement": placement_to_dict(obj.Placement, get_obj_scale(obj)),
+        }
+        node.update(data)
+        self.nodes.append(node)
+        return node
+
+    def plan_childs(self, childs, parent, role):
+        """Plan visible childs."""
+        for child in fc_helper.filtered_objects(childs, self.importer.typeid_filter_list):
+            if self.importer.check_obj_visibility_with_skiphidden(child):
+                self.plan_object(child, parent=parent, role=role)
+
+    def plan_object(self, obj, parent, role):
+        """Plan object - returns node or None."""
+        analysis = self.importer.get_document_analysis(obj.Document)
+        branch = analysis.get_branch(obj)
+        node = None
+        if branch == "Part::FeaturePython":
+            kind = analysis.get_feature_python_kind(obj)
+            if kind == "Array" and getattr(obj, "Base", None) is not None:
+                node = self.plan_array(obj, obj.Base, parent, role)
+            elif kind == "ArrayType":
+                self.warn_not_implemented(obj)
+            else:
+                node = self.plan_shape(obj, parent, role)
+                if node and kind == "ArchWithHostChilds":
+                    self.plan_childs(analysis.get_host_childs(obj), node["id"], role)
+        elif branch == "Part::Feature":
+            node = self.plan_shape(obj, parent, role)
+        elif branch == "Mesh::Feature":
+            node = self.plan_mesh(obj, parent, role)
+        elif branch == "App::Part":
+            node = self.add_node(obj, "GROUP", parent, role)
+            self.plan_childs(obj.Group, node["id"], role)
+        elif branch in ("App::Link", "App::LinkElement"):
+            node = self.plan_link(obj, parent, role)
+        else:
+            self.warn_not_implemented(obj)
+        return node
+
+    def warn_not_implemented(self, obj):
+        """Report unsupported object."""
+        self.config["report"](
+            {"WARNING"},
+            "Unable to load '{}' ('{}') of type '{}'. "
+            "(Type Not implemented yet)."
+            "".format(obj.Label, obj.Name, obj.TypeId),
+        )
+
+    def get_material_key(self, obj):
+        """Get key of the material entry for obj - or None."""
+        gui = self.importer.guidata.get(obj.Name)
+        if not gui or obj.Document.Name != self.importer.doc.Name:
+            return None
+        key = get_material_key(gui)
+        if key not in self.materials:
+            self.materials[key] = get_gui_entry(gui)
+        return key
+
+    def add_geometry(self, key, obj, kind, content_hash):
+        """Register geometry - returns True if it is new."""
+        if key in self.geometry:
+            return False
+        self.geometry[key] = {
+            "source": obj.Document.Name + "#" + obj.Name,
+            "kind": kind,
+            "mesh_hash": tessellation_cache.combine_key(
+                content_hash, self.importer.mesh_settings
+            ),
+        }
+        return True
+
+    def plan_shape(self, obj, parent, role):
+        """Plan Part::Feature object."""
+        shape = self.importer.get_shape_without_placement(obj)
+        if shape.isNull():
+            # keep the tree - childs can be hosted by it.
+            return self.add_node(obj, "GROUP", parent, role)
+        brep = shape.exportBrepToString()
+        content_hash = self.importer.get_content_hash(obj, shape, brep)
+        key = tessellation_cache.combine_key(content_hash, self.importer.geometry_settings)
+        if self.add_geometry(key, obj, "SHAPE", content_hash):
+            self.shapes[key] = shape
+            if self.config["worker_count"] >= 2:
+                self.breps[key] = brep
+        return self.add_node(
+            obj, "MESH", parent, role, geometry=key, material=self.get_material_key(obj)
+        )
+
+    def plan_mesh(self, obj, parent, role):
+        """Plan Mesh::Feature object."""
+        func_data = self.importer.create_func_data()
+        func_data["obj"] = obj
+        self.importer.handle__MeshFeature(func_data)
+        mesh_data = func_data["mesh_data"]
+        content = hashlib.sha1()
+        for name in tessellation_cache.MESH_DATA_KEYS:
+            content.update(mesh_data[name].tobytes())
+        key = tessellation_cache.combine_key(
+            content.hexdigest(), self.importer.geometry_settings
+        )
+        if self.add_geometry(key, obj, "MESH", content.hexdigest()):
+            self.mesh_data[key] = mesh_data
+        return self.add_node(
+            obj, "MESH", parent, role, geometry=key, material=self.get_material_key(obj)
+        )
+
+    def plan_target(self, obj):
+        """Plan link target (once) - returns node id or None."""
+        target_key = (obj.Document.Name, obj.Name)
+        if target_key not in self.targets:
+            # mark as in progress - links pointing to themselves end here.
+            self.targets[target_key] = None
+            node = self.plan_object(obj, parent=None, role="TARGET")
+            self.targets[target_key] = node["id"] if node else None
+        return self.targets[target_key]
+
+    def get_link_target(self, obj):
+        """Get object a link points to."""
+        linked = obj.LinkedObject
+        if linked is None:
+            return None
+        resolved = linked.getLinkedObject()
+        if resolved.isDerivedFrom("Part::Feature"):
+            linked = resolved
+        return linked
+
+    def plan_link(self, obj, parent, role):
+        """Plan App::Link object."""
+        linked = self.get_link_target(obj)
+        if linked is None:
+            self.config["report"](
+                {"WARNING"},
+                "Warning: '{}' LinkedObject is NONE → skipping.".format(obj.Label),
+            )
+            return None
+        if hasattr(obj, "ElementList") and len(obj.ElementList) > 0:
+            return self.plan_array(obj, linked, parent, role)
+        target = self.plan_target(linked)
+        if target is None:
+            return None
+        return self.add_node(obj, "LINK", parent, role, link_target=target)
+
+    def plan_array(self, obj, base, parent, role):
+        """Plan Draft array or link array."""
+        target = self.plan_target(base)
+        if target is None:
+            return None
+        placements, scales = self.importer.get_array_element_placements(obj)
+        elements = [
+            placement_to_dict(placement, scales[index] if scales else None)
+            for index, placement in enumerate(placements)
+        ]
+        if not elements and self.config["dry_run"]:
+            # arrays are not expanded for a dry run -
+            # the estimate only needs the element count.
+            elements = [{"location": [0, 0, 0], "rotation": [1, 0, 0, 0]}] * getattr(
+                obj, "Count", 0
+            )
+        return self.add_node(
+            obj, "ARRAY", parent, role, link_target=target, elements=elements
+        )
+
+
+class PlanExecutor(object):
+    """
+    Execution pass: realize a plan in Blender.
+
+    nodes with role TARGET are only realized if a link or array needs them.
+    a MESH link target is shared as mesh -
+    all other targets are realized into a collection below the link targets collection
+    and instanced (or copied without links_as_collectioninstance).
+    with share_meshes identical (geometry, material) pairs share one Blender mesh.
+
+    existing collections, objects and meshes are resolved by name
+    with the same update rules as the direct import:
+    with update existing objects are reused -
+    and with update_only_modified_meshes also their unchanged meshes.
+    """
+
+    def __init__(
+        self,
+        plan,
+        *,
+        config,
+        datablocks,
+        material_registry,
+        get_mesh_data,
+        get_reusable_bmesh=None,
+        imported_obj_names=None,
+        imported_mesh_names=None,
+        collection=None,
+        link_targets=None,
+        root_empty=None,
+    ):
+        """Init."""
+        super(PlanExecutor, self).__init__()
+        self.plan = plan
+        self.config = config
+        self.datablocks = datablocks
+        self.material_registry = material_registry
+        self.get_mesh_data = get_mesh_data
+        # (func_data, mesh_label) → existing mesh that needs no update - or None
+        self.get_reusable_bmesh = get_reusable_bmesh
+        # names created or updated by this import - shared with the importer
+        if imported_obj_names is None:
+            imported_obj_names = set()
+        self.imported_obj_names = imported_obj_names
+        if imported_mesh_names is None:
+            imported_mesh_names = set()
+        self.imported_mesh_names = imported_mesh_names
+        self.nodes = plan["nodes"]
+        self.childs = {}
+        for node in self.nodes:
+            if node["parent"] is not None:
+                self.childs.setdefault(node["parent"], []).append(node["id"])
+        self.scale = plan["settings"]["scale"]
+        self.bobjs = {}
+        # mesh key → mesh (see get_mesh_key)
+        self.meshes = {}
+        # target node id → (collection, root bobj)
+        self.target_collections = {}
+        self.collection = collection
+        self.link_targets = link_targets
+        self.root_empty = root_empty
+
+    def execute(self):
+        """Realize all SCENE nodes."""
+        self.prepare_collections()
+        for node in self.nodes:
+            if node["role"] == "SCENE":
+                self.realize_node(node, self.collection, self.root_empty)
+        return self.bobjs
+
+    def get_or_new_collection(self, label, parent):
+        """Get existing collection (with update) - or create it below parent."""
+        collection = None
+        if self.config["update"]:
+            collection = self.datablocks.get("collections", label)
+        if collection is None:
+            collection = self.datablocks.new("collections", label)
+            self.datablocks.link_child(parent, collection)
+        return collection
+
+    def prepare_collections(self):
+        """Get or create the import collection, root empty and link targets collection."""
+        doc_filename = self.plan["document"] + ".FCStd"
+        if self.collection is None:
+            self.collection = self.get_or_new_collection(
+                doc_filename, bpy.context.scene.collection
+            )
+        if self.link_targets is None:
+            label = self.plan["document"] + "__link_targets"
+            is_new = not (self.config["update"] and self.datablocks.contains("collections", label))
+            self.link_targets = self.get_or_new_collection(label, self.collection)
+            if is_new:
+                # hide this internal collection - we use only the instances.
+                self.link_targets.hide_select = True
+                for lc in helper.find_layer_collection_in_scene(
+                    collection_name=self.link_targets.name
+                ):
+                    lc.exclude = True
+        if self.root_empty is None:
+            self.root_empty = self.new_empty(doc_filename, self.collection)
+
+    def get_or_new_object(self, label, data):
+        """
+        Get object to realize a node.
+
+        with update an existing object of the same name and kind is reused -
+        else it is renamed to '_old' and a new object is created.
+        every name is only used once per import.
+        """
+        bobj = None
+        if label not in self.imported_obj_names:
+            bobj = self.datablocks.get("objects", label)
+            if bobj is not None:
+                same_kind = (bobj.data is None) == (data is None)
+                if not (self.config["update"] and same_kind):
+                    self.datablocks.rename_old("objects", label)
+                    bobj = None
+        if bobj is None:
+            bobj = self.datablocks.new("objects", label, data)
+        elif data is not None and bobj.data != data:
+            old_data = bobj.data
+            bobj.data = data
+            # clean up replaced mesh
+            if old_data.users == 0:
+                self.datablocks.remove("meshes", old_data)
+        self.imported_obj_names.add(bobj.name)
+        return bobj
+
+    def new_empty(self, label, collection):
+        """Get or create empty object."""
+        bobj = self.get_or_new_object(label, None)
+        bobj.instance_type = "NONE"
+        bobj.instance_collection = None
+        bobj.empty_display_size = self.scale * 10
+        self.datablocks.link(collection, bobj)
+        return bobj
+
+    def apply_placement(self, bobj, placement, reset_location=False):
+        """Apply plan placement to bobj."""
+        if not self.config["placement"]:
+            return
+        if not reset_location:
+            bobj.location = [value * self.scale for value in placement["location"]]
+        rotation_mode = bobj.rotation_mode
+        bobj.rotation_mode = "QUATERNION"
+        bobj.rotation_quaternion = placement["rotation"]
+        bobj.rotation_mode = rotation_mode
+        if "scale" in placement:
+            bobj.scale = placement["scale"]
+
+    def get_parent_bobj(self, node, default):
+        """Get realized parent - or default."""
+        if node["parent"] is None:
+            return default
+        return self.bobjs.get(node["parent"], default)
+
+    def realize_node(self, node, collection, root_bobj, reset_location=False, suffix=""):
+        """
+        Get or create Blender object for node.
+
+        suffix is added to the object name -
+        so the objects of link targets and copies keep stable names across imports.
+        """
+        node_type = node["type"]
+        label = node["label"] + suffix
+        bobj = None
+        if node_type == "GROUP":
+            bobj = self.new_empty(label, collection)
+        elif node_type == "MESH":
+            bobj = self.new_mesh_object(node, label, collection)
+        elif node_type == "LINK":
+            bobj = self.new_link_object(node["link_target"], label, collection)
+        elif node_type == "ARRAY":
+            bobj = self.new_array_object(node, label, collection)
+        if bobj is None:
+            return None
+        self.apply_placement(bobj, node["placement"], reset_location=reset_location)
+        bobj.parent = self.get_parent_bobj(node, root_bobj)
+        self.bobjs[node["id"]] = bobj
+        return bobj
+
+    def get_mesh_key(self, node):
+        """
+        Get key of the mesh for node.
+
+        with share_meshes all nodes with the same geometry and material share it -
+        else only the linked copies of the node.
+        """
+        if self.config["share_meshes"]:
+            return (node["geometry"], node.get("material"))
+        return (node["geometry"], node.get("material"), node["id"])
+
+    def get_mesh(self, node, mesh_label):
+        """
+        Get mesh for node.
+
+        returns (mesh, mesh_data) - mesh_data only if the mesh is new.
+        """
+        mesh_key = self.get_mesh_key(node)
+        if mesh_key in self.meshes:
+            return self.meshes[mesh_key], None
+        mesh_hash = self.plan["geometry"][node["geometry"]].get("mesh_hash")
+        bmesh = None
+        if self.get_reusable_bmesh:
+            bmesh = self.get_reusable_bmesh({"freecad_mesh_hash": mesh_hash}, mesh_label)
+        if bmesh is not None:
+            self.imported_mesh_names.add(mesh_label)
+            self.meshes[mesh_key] = bmesh
+            return bmesh, None
+        mesh_data = self.get_mesh_data(node["geometry"])
+        if mesh_data is None or not mesh_builder.has_geometry(mesh_data):
+            logger.warning("plan: no geometry for '%s' - skipped.", node["label"])
+            self.meshes[mesh_key] = None
+            return None, None
+        if self.datablocks.contains("meshes", mesh_label):
+            # rename old mesh -
+            # this way the new mesh can get the original name.
+            self.datablocks.rename_old("meshes", mesh_label)
+        bmesh = mesh_builder.create_mesh_from_mesh_data(
+            mesh_label,
+            mesh_data,
+            scale=self.scale,
+            use_smooth=self.config["auto_smooth_use"],
+        )
+        bmesh.use_auto_smooth = self.config["auto_smooth_use"]
+        bmesh.auto_smooth_angle = self.config["auto_smooth_angle"]
+        if mesh_hash:
+            bmesh["freecad_mesh_hash"] = mesh_hash
+        self.datablocks.add("meshes", bmesh)
+        self.imported_mesh_names.add(mesh_label)
+        self.meshes[mesh_key] = bmesh
+        return bmesh, mesh_data
+
+    def create_materials(self, node, bobj, mesh_data):
+        """Create materials of a new mesh."""
+        material_key = node.get("material")
+        if material_key is None:
+            return
+        ref = PlanObjectRef(node["name"], node["label"])
+        gui = {ref.Name: gui_entry_to_guidata(self.plan["materials"][material_key])}
+        material_manager = MaterialManager(
+            guidata=gui,
+            func_data={"obj": ref, "matindex": mesh_data["matindex"].tolist()},
+            bobj=bobj,
+            obj_label=node["label"],
+            sharemats=self.config["sharemats"],
+            material_registry=self.material_registry,
+            datablocks=self.datablocks,
+            report=self.config["report"],
+        )
+        material_manager.create_new()
+
+    def new_mesh_object(self, node, label, collection):
+        """Get or create object for MESH node."""
+        bmesh, mesh_data = self.get_mesh(node, node["label"])
+        if bmesh is None:
+            return None
+        bobj = self.get_or_new_object(label, bmesh)
+        if mesh_data is not None:
+            self.create_materials(node, bobj, mesh_data)
+        self.datablocks.link(collection, bobj)
+        return bobj
+
+    def new_link_object(self, target_id, label, collection):
+        """Get or create object showing the link target."""
+        target = self.nodes[target_id]
+        if target["type"] == "MESH":
+            # linked copy - share the mesh.
+            return self.new_mesh_object(target, label, collection)
+        if not self.config["links_as_collectioninstance"]:
+            # real copy of the target tree
+            bobj = self.new_empty(label, collection)
+            self.realize_subtree(
+                target, collection, bobj, reset_location=True, suffix="__" + label
+            )
+            return bobj
+        target_collection, _ = self.get_target_collection(target_id)
+        bobj = self.new_empty(label, collection)
+        bobj.instance_type = "COLLECTION"
+        bobj.instance_collection = target_collection
+        return bobj
+
+    def new_array_object(self, node, label, collection):
+        """Get or create object for ARRAY node."""
+        target_id = node["link_target"]
+        target = self.nodes[target_id]
+        if self.config["array_instancing"] and target["type"] == "MESH":
+            _, base_bobj = self.get_target_collection(target_id)
+            if base_bobj is None:
+                return None
+            positions, rotations, scales = array_instancer.transforms_from_dicts(
+                node["elements"], import_scale=self.scale
+            )
+            bmesh = array_instancer.get_or_create_point_mesh(
+                self.datablocks, label, positions, rotations, scales
+            )
+            bobj = self.get_or_new_object(label, bmesh)
+            array_instancer.set_instance_modifier(bobj, base_bobj)
+            self.datablocks.link(collection, bobj)
+            return bobj
+        # one object per element
+        bobj = self.new_empty(label, collection)
+        for index, placement in enumerate(node["elements"]):
+            element_bobj = self.new_link_object(
+                target_id, "{}_i{}".format(label, index), collection
+            )
+            if element_bobj is not None:
+                self.apply_placement(element_bobj, placement)
+                element_bobj.parent = bobj
+        return bobj
+
+    def get_target_collection(self, target_id):
+        """Realize target subtree into its own collection (once)."""
+        if target_id not in self.target_collections:
+            target = self.nodes[target_id]
+            collection = self.get_or_new_collection(target["label"], self.link_targets)
+            root_bobj = self.realize_subtree(
+                target, collection, None, reset_location=True, suffix="__lt"
+            )
+            self.target_collections[target_id] = (collection, root_bobj)
+        return self.target_collections[target_id]
+
+    def realize_subtree(self, node, collection, root_bobj, reset_location=False, suffix=""):
+        """Realize node and all its childs."""
+        bobj = self.realize_node(
+            node, collection, root_bobj, reset_location=reset_location, suffix=suffix
+        )
+        for child_id in self.childs.get(node["id"], []):
+            self.realize_subtree(self.nodes[child_id], collection, root_bobj, suffix=suffix)
+        return bobj
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Leveled logging for the importer.
+
+all messages go through the `io_import_fcstd` logger.
+use %-style arguments (`logger.debug("'%s' add to '%s'", bobj, collection)`) -
+then nothing is formatted as long as the level is disabled.
+for expensive arguments use `lazy(func, *args)`.
+"""
+
+import logging
+
+from .. import blender_helper as b_helper
+
+VERBOSITY_LEVELS = {
+    "ERROR": logging.ERROR,
+    "WARNING": logging.WARNING,
+    "INFO": logging.INFO,
+    "DEBUG": logging.DEBUG,
+}
+
+logger = logging.getLogger("io_import_fcstd")
+
+
+class ConsoleHandler(logging.Handler):
+    """Print colored to the system console."""
+
+    def emit(self, record):
+        """Print record."""
+        try:
+            message = self.format(record)
+            b_helper.print_colored({record.levelname}, message)
+        except Exception:
+            self.handleError(record)
+
+
+class lazy(object):
+    """Call `func(*args, **kwargs)` only when the message is formatted."""
+
+    __slots__ = ("func", "args", "kwargs")
+
+    def __init__(self, func, *args, **kwargs):
+        """Init."""
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        """Call func."""
+        return str(self.func(*self.args, **self.kwargs))
+
+
+def get_level(mode):
+    """Get logging level for a blender report mode like {"INFO"}."""
+    level = logging.NOTSET
+    for name in mode:
+        level = max(level, VERBOSITY_LEVELS.get(name, logging.INFO))
+    return level
+
+
+def set_verbosity(verbosity):
+    """Set level by name (see VERBOSITY_LEVELS)."""
+    logger.setLevel(VERBOSITY_LEVELS[verbosity])
+
+
+if not logger.handlers:
+    logger.addHandler(ConsoleHandler())
+    # we print on our own - the root logger would print everything twice.
+    logger.propagate = False
+    logger.setLevel(logging.WARNING)
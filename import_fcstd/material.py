@@ -4,13 +4,70 @@
 """Material Things."""
 
 import bpy
+import numpy as np
 from bpy_extras.node_shader_utils import PrincipledBSDFWrapper
 
 from .. import blender_helper as b_helper
+from . import log
 
 # from . import helper
 
 
+class MaterialRegistry(object):
+    """
+    Share materials with the same color / transparency.
+
+    one registry lives for the whole import -
+    so all objects of a document use the same materials.
+    every material created by the importer stores its rgba value
+    as custom property.
+    with `reuse_existing` materials from earlier imports
+    (found by this property) are reused too.
+    """
+
+    rgba_property = "freecad_rgba"
+
+    def __init__(self, reuse_existing=False):
+        """Init."""
+        super(MaterialRegistry, self).__init__()
+        self.reuse_existing = reuse_existing
+        self.materials = {}
+        self.existing_scanned = False
+
+    @staticmethod
+    def get_key(rgba):
+        """Get lookup key for rgba value."""
+        return tuple(round(value, 6) for value in rgba)
+
+    def scan_existing(self):
+        """Collect all materials of earlier imports."""
+        for bmat in bpy.data.materials:
+            rgba = bmat.get(self.rgba_property, None)
+            if rgba is not None:
+                self.materials.setdefault(self.get_key(rgba), bmat)
+        self.existing_scanned = True
+
+    def get(self, rgba):
+        """Get shared material for rgba - or None."""
+        if self.reuse_existing and not self.existing_scanned:
+            self.scan_existing()
+        key = self.get_key(rgba)
+        bmat = self.materials.get(key)
+        if bmat is not None:
+            try:
+                bmat.name
+            except ReferenceError:
+                # material was removed in the meantime.
+                del self.materials[key]
+                bmat = None
+        return bmat
+
+    def add(self, rgba, bmat):
+        """Add material to registry."""
+        bmat[self.rgba_property] = list(rgba)
+        self.materials[self.get_key(rgba)] = bmat
+
+
 class MaterialManager(object):
     """
     Handle all Material related things.
@@ -23,6 +80,8 @@ class MaterialManager(object):
         bobj,
         obj_label,
         sharemats,
+        material_registry,
+        datablocks=None,
         report=None,
         report_preline="",
     ):
@@ -34,6 +93,8 @@ class MaterialManager(object):
         self.bobj = bobj
         self.obj_label = obj_label
         self.sharemats = sharemats
+        self.material_registry = material_registry
+        self.datablocks = datablocks
 
     def report(self, data, mode=None, pre_line=None):
         if not mode:
@@ -45,7 +106,7 @@ class MaterialManager(object):
         if self.report_fnc:
             return self.report_fnc(mode, data, pre_line=pre_line)
         else:
-            print(pre_line + data)
+            log.logger.log(log.get_level(mode), "%s%s", pre_line, data)
 
     # material
     def get_obj_Transparency(self, obj_Name):
@@ -63,32 +124,25 @@ class MaterialManager(object):
             rgb = self.guidata[obj_Name]["ShapeColor"]
         return rgb
 
-    def get_obj_DiffuseColor(self, obj_Name, i):
-        """Get object DiffuseColor and convert to blender units."""
-        # DiffuseColor stores int values, Blender use floats
-        rgba = tuple(
-            [float(x) / 255.0 for x in self.guidata[obj_Name]["DiffuseColor"][i]]
-        )
+    def get_obj_DiffuseColors(self, obj_Name):
+        """Get all object DiffuseColors as (N, 4) rgba float array."""
+        rgba = self.guidata[obj_Name]["DiffuseColor"].colors / 255.0
+        # FreeCAD stores transparency, not alpha
+        rgba[:, 3] = 1.0 - rgba[:, 3]
         return rgba
 
-    def get_obj_rgba(self, obj_Name, mat_index=None):
+    def get_obj_rgba(self, obj_Name):
         """Get object rgba value in blender usable format."""
-        if mat_index:
-            rgba = self.get_obj_DiffuseColor(obj_Name, mat_index)
-            # FreeCAD stores transparency, not alpha
-            alpha = 1.0
-            if rgba[3] > 0:
-                alpha = 1.0 - rgba[3]
-            rgba = rgba[:3] + (alpha,)
-        else:
-            alpha = self.get_obj_Transparency(obj_Name)
-            rgb = self.get_obj_ShapeColor(obj_Name)
-            rgba = rgb + (alpha,)
-        return rgba
+        alpha = self.get_obj_Transparency(obj_Name)
+        rgb = self.get_obj_ShapeColor(obj_Name)
+        return rgb + (alpha,)
 
     def create_new_bmat(self, bmat_name, rgba):
         """Create new blender material."""
-        bmat = bpy.data.materials.new(name=bmat_name)
+        if self.datablocks:
+            bmat = self.datablocks.new("materials", bmat_name)
+        else:
+            bmat = bpy.data.materials.new(name=bmat_name)
         bmat.use_nodes = True
         # link bmat to PrincipledBSDFWrapper
         principled = PrincipledBSDFWrapper(bmat, is_readonly=False)
@@ -99,111 +153,56 @@ class MaterialManager(object):
             principled.alpha = rgba[3]
             bmat.blend_method = "BLEND"
         if self.sharemats:
-            self.func_data["matdatabase"][rgba] = bmat
+            self.material_registry.add(rgba, bmat)
+        else:
+            bmat[MaterialRegistry.rgba_property] = list(rgba)
         return bmat
 
-    def handle_material_per_face(self, face_index, objmats, material_index):
-        """Handle material for face."""
-        # Create new mats and attribute faces to them
-        # DiffuseColor stores int values, Blender use floats
-        # self.report(
-        #     b_helper.colors.fg.lightblue
-        #     + "handle_material_per_face"
-        #     + b_helper.colors.reset,
-        #     pre_line="|  ",
-        # )
-        rgba = self.get_obj_rgba(self.func_data["obj"].Name, material_index)
-        # get or create blender material
-        bmat = None
-        if self.sharemats:
-            if rgba in self.func_data["matdatabase"]:
-                bmat = self.func_data["matdatabase"][rgba]
-                if rgba not in objmats:
-                    objmats.append(rgba)
-                    self.bobj.data.materials.append(bmat)
-        if not bmat:
-            if rgba in objmats:
-                bmat = self.bobj.data.materials[objmats.index(rgba)]
-        if not bmat:
-            bmat_name = self.obj_label + "_" + str(len(objmats))
-            bmat = self.create_new_bmat(bmat_name, rgba)
-            objmats.append(rgba)
+    def get_material_slot(self, objmats, rgba):
+        """Get or create the material slot for the given face color."""
+        # objmats maps rgba → material slot index of self.bobj
+        slot_index = objmats.get(rgba)
+        if slot_index is None:
+            # get or create blender material
+            bmat = None
+            if self.sharemats:
+                bmat = self.material_registry.get(rgba)
+            if not bmat:
+                bmat_name = self.obj_label + "_" + str(len(objmats))
+                bmat = self.create_new_bmat(bmat_name, rgba)
+            slot_index = len(objmats)
+            objmats[rgba] = slot_index
             self.bobj.data.materials.append(bmat)
-
-        # at this point we should have a valid blender material
-
-        # self.report(
-        #     b_helper.colors.fg.lightblue
-        #     + "objmats "
-        #     + b_helper.colors.reset
-        #     + "{}".format(objmats),
-        #     pre_line="|  ",
-        # )
-        # self.report(
-        #     b_helper.colors.fg.lightblue
-        #     + "bmat "
-        #     + b_helper.colors.reset
-        #     + "{}".format(bmat),
-        #     pre_line="|  ",
-        # )
-        # self.report(
-        #     b_helper.colors.fg.lightblue
-        #     + "face_index "
-        #     + b_helper.colors.reset
-        #     + "{}".format(face_index),
-        #     pre_line="|  ",
-        # )
-
-        # assigne materials to polygons
-        objmats_index = objmats.index(rgba)
-        # self.report(
-        #     b_helper.colors.fg.lightblue
-        #     + "objmats_index "
-        #     + b_helper.colors.reset
-        #     + "{}".format(objmats_index),
-        #     pre_line="|  ",
-        # )
-        # self.report(
-        #     b_helper.colors.fg.lightblue
-        #     + 'self.func_data["matindex"][material_index] '
-        #     + b_helper.colors.reset
-        #     + "{}".format(self.func_data["matindex"][material_index]),
-        #     pre_line="|  ",
-        # )
-
-        for fj in range(self.func_data["matindex"][material_index]):
-            # self.report(
-            #     b_helper.colors.fg.lightblue
-            #     + "fj "
-            #     + b_helper.colors.reset
-            #     + "{}".format(fj),
-            #     pre_line="|  * ",
-            # )
-            # self.report(
-            #     b_helper.colors.fg.lightblue
-            #     + "face_index + fj "
-            #     + b_helper.colors.reset
-            #     + "{}".format(face_index + fj),
-            #     pre_line="|  * ",
-            # )
-            self.bobj.data.polygons[face_index + fj].material_index = objmats_index
-        face_index += self.func_data["matindex"][material_index]
-        return face_index
+        return slot_index
 
     def handle_material_multi(self):
         """Handle multi material."""
         # we have per-face materials.
-        # self.report(
-        #     b_helper.colors.fg.lightgreen
-        #     + "handle_material_multi"
-        #     + b_helper.colors.reset,
-        #     pre_line="|  ",
-        # )
-        face_index = 0
-        objmats = []
-        for material_index in range(len(self.func_data["matindex"])):
-            face_index = self.handle_material_per_face(
-                face_index, objmats, material_index
+        # matindex holds the count of polygons for every FreeCAD face.
+        face_colors = self.get_obj_DiffuseColors(self.func_data["obj"].Name)
+        # one material slot per distinct color - in order of first use.
+        colors, first_use, color_indices = np.unique(
+            face_colors, axis=0, return_index=True, return_inverse=True
+        )
+        objmats = {}
+        color_slots = np.zeros(len(colors), dtype=np.int32)
+        for color_index in np.argsort(first_use):
+            rgba = tuple(float(value) for value in colors[color_index])
+            color_slots[color_index] = self.get_material_slot(objmats, rgba)
+        slot_indices = color_slots[color_indices.reshape(-1)]
+        # expand to one entry per polygon
+        material_indices = np.repeat(
+            slot_indices, np.asarray(self.func_data["matindex"], dtype=np.int32)
+        )
+        polygons = self.bobj.data.polygons
+        if len(material_indices) == len(polygons):
+            polygons.foreach_set("material_index", material_indices)
+        else:
+            self.report(
+                "polygon count ({}) does not match face material count ({}). "
+                "skipping per-face material assignment."
+                "".format(len(polygons), len(material_indices)),
+                mode={"WARNING"},
             )
 
     def handle_material_single(self):
@@ -217,11 +216,7 @@ class MaterialManager(object):
         rgba = self.get_obj_rgba(self.func_data["obj"].Name)
         bmat = None
         if self.sharemats:
-            if rgba in self.func_data["matdatabase"]:
-                bmat = self.func_data["matdatabase"][rgba]
-            else:
-                # print("not found in db:",rgba,"in",matdatabase)
-                pass
+            bmat = self.material_registry.get(rgba)
         if not bmat:
             bmat_name = self.obj_label
             bmat = self.create_new_bmat(bmat_name, rgba)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Array based Blender mesh creation."""
+
+import itertools
+
+import bpy
+import numpy as np
+
+
+def flatten_faces(faces):
+    """
+    Flatten list of faces.
+
+    returns a tuple of
+    (loop_vertex_indices, loop_totals)
+    as flat int32 arrays.
+    """
+    loop_totals = np.fromiter(
+        (len(f) for f in faces), dtype=np.int32, count=len(faces)
+    )
+    loop_vertex_indices = np.fromiter(
+        itertools.chain.from_iterable(faces),
+        dtype=np.int32,
+        count=int(loop_totals.sum()),
+    )
+    return loop_vertex_indices, loop_totals
+
+
+def pack_mesh_data(verts, edges, faces, matindex):
+    """
+    Pack python lists of mesh data into flat numpy arrays.
+
+    the resulting mesh_data dict is what the tessellation cache stores
+    and what `create_mesh_from_mesh_data` consumes.
+    """
+    loop_vertex_indices, loop_totals = flatten_faces(faces)
+    return {
+        "verts": np.asarray(verts, dtype=np.float64).reshape(-1, 3),
+        "edges": np.asarray(edges, dtype=np.int32).reshape(-1, 2),
+        "loop_vertex_indices": loop_vertex_indices,
+        "loop_totals": loop_totals,
+        "matindex": np.asarray(matindex, dtype=np.int32),
+    }
+
+
+def has_geometry(mesh_data):
+    """Check if mesh_data contains vertices and faces or edges."""
+    return bool(
+        mesh_data
+        and len(mesh_data["verts"])
+        and (len(mesh_data["loop_totals"]) or len(mesh_data["edges"]))
+    )
+
+
+def get_loop_starts(loop_totals):
+    """Calculate loop_start for every polygon from the loop_totals."""
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+    if len(loop_totals) > 1:
+        np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+    return loop_starts
+
+
+def create_mesh(
+    name,
+    verts,
+    edges,
+    faces=None,
+    *,
+    loop_vertex_indices=None,
+    loop_totals=None,
+    scale=1.0,
+    use_smooth=False,
+):
+    """
+    Create new blender mesh from vertex / edge / face data.
+
+    every attribute is written with one `foreach_set` call.
+    faces can be given as list of vertex index lists
+    or already flattened as `loop_vertex_indices` and `loop_totals`.
+    """
+    mesh = bpy.data.meshes.new(name=name)
+
+    co = np.asarray(verts, dtype=np.float32).reshape(-1)
+    if scale != 1.0:
+        co *= scale
+    mesh.vertices.add(len(co) // 3)
+    mesh.vertices.foreach_set("co", co)
+
+    if len(edges):
+        edge_vertices = np.asarray(edges, dtype=np.int32).reshape(-1)
+        mesh.edges.add(len(edge_vertices) // 2)
+        mesh.edges.foreach_set("vertices", edge_vertices)
+
+    if faces is not None:
+        loop_vertex_indices, loop_totals = flatten_faces(faces)
+    if loop_totals is not None and len(loop_totals):
+        loop_vertex_indices = np.asarray(loop_vertex_indices, dtype=np.int32)
+        loop_totals = np.asarray(loop_totals, dtype=np.int32)
+        mesh.loops.add(len(loop_vertex_indices))
+        mesh.loops.foreach_set("vertex_index", loop_vertex_indices)
+        mesh.polygons.add(len(loop_totals))
+        mesh.polygons.foreach_set("loop_start", get_loop_starts(loop_totals))
+        # newer blender versions derive loop_total from loop_start
+        if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+            mesh.polygons.foreach_set("loop_total", loop_totals)
+        mesh.polygons.foreach_set(
+            "use_smooth", np.full(len(loop_totals), use_smooth, dtype=bool)
+        )
+
+    # calc_edges creates the face edges and keeps the loose edges
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+def create_mesh_from_mesh_data(name, mesh_data, *, scale=1.0, use_smooth=False):
+    """Create new blender mesh from packed mesh_data."""
+    return create_mesh(
+        name,
+        mesh_data["verts"],
+        mesh_data["edges"],
+        loop_vertex_indices=mesh_data["loop_vertex_indices"],
+        loop_totals=mesh_data["loop_totals"],
+        scale=scale,
+        use_smooth=use_smooth,
+    )
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Import profiling.
+
+collects wall time, call counts, vertex / face counts
+and (optional) memory allocations
+for every import phase and every imported FreeCAD TypeId.
+
+the result is a JSON report -
+optional the whole import can be exported as cProfile stats
+or as speedscope file (https://www.speedscope.app/).
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+
+# phases recorded by ImportFcstd - in import order.
+PHASES = (
+    "scan_document",
+    "freecad_open",
+    "recompute",
+    "analyze_document",
+    "guidata",
+    "plan",
+    "tessellation",
+    "import_objects",
+    "mesh_build",
+    "materials",
+    "tree_linking",
+)
+
+EXPORT_FORMATS = ("NONE", "CPROFILE", "SPEEDSCOPE")
+
+REPORT_FORMAT_VERSION = 1
+
+
+def create_entry():
+    """Create blank statistic entry."""
+    return {
+        # wall time including nested sections
+        "time": 0.0,
+        # wall time without nested sections
+        "self_time": 0.0,
+        "calls": 0,
+        "verts": 0,
+        "faces": 0,
+        # net bytes allocated (only with track_allocations)
+        "alloc_size": 0,
+    }
+
+
+class NullProfiler(object):
+    """
+    Profiler that records nothing.
+
+    used if profiling is disabled -
+    so the import code does not need to check.
+    """
+
+    enabled = False
+
+    def start(self):
+        """Nothing to do."""
+
+    def stop(self):
+        """Nothing to do."""
+
+    def section(self, group, name, **info):
+        """Nothing to record."""
+        return contextlib.nullcontext()
+
+    def phase(self, name):
+        """Nothing to record."""
+        return contextlib.nullcontext()
+
+    def obj_type(self, type_id, branch):
+        """Nothing to record."""
+        return contextlib.nullcontext()
+
+    def add_geometry(self, verts, faces):
+        """Nothing to record."""
+
+
+class ImportProfiler(object):
+    """Record timings of one import."""
+
+    enabled = True
+
+    def __init__(
+        self, *, name="", track_allocations=False, use_cprofile=False, record_events=False,
+    ):
+        """Init."""
+        super(ImportProfiler, self).__init__()
+        self.name = name
+        self.track_allocations = track_allocations
+        self.record_events = record_events
+        self.sections = {"phases": {}, "types": {}}
+        self.totals = create_entry()
+        # open sections: [group, entry, start, child_time, alloc_start]
+        self.stack = []
+        # nesting depth per entry - recursive sections count their time only once.
+        self.active = {}
+        # speedscope frame names and open / close events
+        self.frames = []
+        self.frame_index = {}
+        self.events = []
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        self.started_tracemalloc = False
+        self.time_start = None
+        self.time_end = None
+        self.alloc_peak = 0
+
+    def start(self):
+        """Start recording."""
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        if self.cprofile:
+            self.cprofile.enable()
+        self.time_start = time.perf_counter()
+
+    def stop(self):
+        """Stop recording."""
+        self.time_end = time.perf_counter()
+        self.totals["time"] = self.time_end - self.time_start
+        if self.cprofile:
+            self.cprofile.disable()
+        if self.track_allocations and tracemalloc.is_tracing():
+            _, self.alloc_peak = tracemalloc.get_traced_memory()
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+                self.started_tracemalloc = False
+
+    def get_frame(self, group, name):
+        """Get speedscope frame index."""
+        key = (group, name)
+        index = self.frame_index.get(key)
+        if index is None:
+            index = len(self.frames)
+            self.frames.append("{}: {}".format(group, name))
+            self.frame_index[key] = index
+        return index
+
+    @contextlib.contextmanager
+    def section(self, group, name, **info):
+        """Record everything inside of the with block."""
+        entry = self.sections[group].get(name)
+        if entry is None:
+            entry = create_entry()
+            entry.update(info)
+            self.sections[group][name] = entry
+        alloc_start = 0
+        if self.track_allocations:
+            alloc_start, _ = tracemalloc.get_traced_memory()
+        frame = [group, entry, time.perf_counter(), 0.0, alloc_start]
+        self.stack.append(frame)
+        self.active[id(entry)] = self.active.get(id(entry), 0) + 1
+        if self.record_events:
+            self.events.append(("O", self.get_frame(group, name), frame[2]))
+        try:
+            yield entry
+        finally:
+            time_end = time.perf_counter()
+            self.stack.pop()
+            duration = time_end - frame[2]
+            entry["calls"] += 1
+            entry["self_time"] += duration - frame[3]
+            self.active[id(entry)] -= 1
+            if not self.active[id(entry)]:
+                entry["time"] += duration
+                if self.track_allocations:
+                    alloc_end, _ = tracemalloc.get_traced_memory()
+                    entry["alloc_size"] += alloc_end - alloc_start
+            if self.stack:
+                self.stack[-1][3] += duration
+            if self.record_events:
+                self.events.append(("C", self.get_frame(group, name), time_end))
+
+    def phase(self, name):
+        """Record import phase."""
+        return self.section("phases", name)
+
+    def obj_type(self, type_id, branch):
+        """Record import of one object."""
+        return self.section("types", type_id, branch=branch)
+
+    def add_geometry(self, verts, faces):
+        """Add vertex / face counts to the innermost phase and type."""
+        self.totals["verts"] += verts
+        self.totals["faces"] += faces
+        found = set()
+        for group, entry, *_ in reversed(self.stack):
+            if group not in found:
+                found.add(group)
+                entry["verts"] += verts
+                entry["faces"] += faces
+
+    def get_report(self):
+        """Get report as json compatible dict."""
+        phases = {}
+        # known phases in import order - others after that.
+        for name in PHASES + tuple(sorted(self.sections["phases"])):
+            if name in self.sections["phases"] and name not in phases:
+                phases[name] = self.sections["phases"][name]
+        report = {
+            "format_version": REPORT_FORMAT_VERSION,
+            "name": self.name,
+            "totals": self.totals,
+            "phases": phases,
+            "types": dict(
+                sorted(
+                    self.sections["types"].items(),
+                    key=lambda item: item[1]["self_time"],
+                    reverse=True,
+                )
+            ),
+        }
+        if self.track_allocations:
+            report["alloc_peak"] = self.alloc_peak
+        return report
+
+    def format_summary(self, type_count=10):
+        """Get summary as list of lines."""
+        total = self.totals["time"] or 1e-12
+        lines = [
+            "profile '{}': {:.3f}s  {} verts  {} faces"
+            "".format(
+                self.name, self.totals["time"], self.totals["verts"], self.totals["faces"],
+            )
+        ]
+        report = self.get_report()
+        for name, entry in report["phases"].items():
+            lines.append(
+                "  {:<16} {:>9.3f}s {:>5.1f}%  {:>7} calls"
+                "".format(name, entry["time"], 100 * entry["time"] / total, entry["calls"])
+            )
+        for type_id, entry in list(report["types"].items())[:type_count]:
+            lines.append(
+                "  {:<32} {:>9.3f}s self  {:>7} calls"
+                "".format(type_id, entry["self_time"], entry["calls"])
+            )
+        return lines
+
+    def save_report(self, path):
+        """Write json report."""
+        with open(path, "w") as f:
+            json.dump(self.get_report(), f, indent=4)
+        return path
+
+    def save_speedscope(self, path):
+        """Write recorded sections as speedscope evented profile."""
+        events = []
+        for event_type, frame, at in self.events:
+            events.append(
+                {"type": event_type, "frame": frame, "at": at - self.time_start}
+            )
+        data = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "io_import_fcstd",
+            "name": self.name,
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": name} for name in self.frames]},
+            "profiles": [
+                {
+                    "type": "evented",
+                    "name": self.name,
+                    "unit": "seconds",
+                    "startValue": 0.0,
+                    "endValue": self.time_end - self.time_start,
+                    "events": events,
+                }
+            ],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
+
+    def save(self, directory, export_format="NONE"):
+        """
+        Save json report and optional export into directory.
+
+        returns list of written files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.name or "import")
+        files = [self.save_report(base + ".profile.json")]
+        if export_format == "CPROFILE" and self.cprofile:
+            self.cprofile.dump_stats(base + ".prof")
+            files.append(base + ".prof")
+        elif export_format == "SPEEDSCOPE":
+            files.append(self.save_speedscope(base + ".speedscope.json"))
+        return files
+
+
+def create_profiler(enabled, *, name="", track_allocations=False, export_format="NONE"):
+    """Create profiler - or NullProfiler if not enabled."""
+    if not enabled:
+        return NullProfiler()
+    return ImportProfiler(
+        name=name,
+        track_allocations=track_allocations,
+        use_cprofile=export_format == "CPROFILE",
+        record_events=export_format == "SPEEDSCOPE",
+    )
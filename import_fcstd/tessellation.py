@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Convert FreeCAD shapes to vertex / edge / face lists.
+
+this module only depends on FreeCAD -
+so it can be used inside of Blender and in the tessellation worker processes.
+"""
+
+import math
+
+try:
+    from .weld import VertexWelder, clean_face
+except ImportError:
+    # loaded as plain module by tessellation_worker.py
+    from weld import VertexWelder, clean_face
+
+# estimate_shape_counts tessellates curved faces with this multiple of the tessellation value.
+# the segment count along one curved direction grows with 1 / sqrt(tessellation value).
+# so the triangle count of single curved faces (planes with curved edges, cylinders, cones)
+# is scaled by sqrt of it - and of doubly curved faces (curved in both directions)
+# by the coarseness itself.
+ESTIMATE_COARSENESS = 4.0
+
+
+def create_geometry_data(weld_tolerance=0.0):
+    """
+    Create blank geometry data structure.
+
+    func_data has the same keys - so it can be used directly.
+    """
+    verts = []
+    geometry = {
+        "verts": verts,
+        "welder": VertexWelder(weld_tolerance, verts=verts),
+        "edges": [],
+        "faces": [],
+        # face to material relationship
+        "matindex": [],
+    }
+    return geometry
+
+
+def add_faces(geometry, faces, vert_indices=None):
+    """
+    Add faces - returns the count of faces added.
+
+    faces collapsed by the vertex welding are dropped.
+    """
+    count = 0
+    for f in faces:
+        if vert_indices is not None:
+            f = [vert_indices[vi] for vi in f]
+        f = clean_face(f)
+        if f:
+            geometry["faces"].append(f)
+            count += 1
+    return count
+
+
+def add_edge(geometry, edge):
+    """Add edge - if it did not collapse by the vertex welding."""
+    if edge[0] != edge[-1]:
+        geometry["edges"].append(edge)
+
+
+def hascurves(shape):
+    """Check if shape has curves."""
+    import Part
+
+    for e in shape.Edges:
+        if not isinstance(e.Curve, (Part.Line, Part.LineSegment)):
+            return True
+    return False
+
+
+def handle_shape_edge(geometry, edge):
+    """Handle edges that are not part of a face."""
+    welder = geometry["welder"]
+    if hascurves(edge):
+        # TODO use tessellation value
+        dv = edge.discretize(9)
+        dv_indices = welder.add_vectors(dv)
+        for i in range(len(dv_indices) - 1):
+            add_edge(geometry, [dv_indices[i], dv_indices[i + 1]])
+    else:
+        e = []
+        for vert in edge.Vertexes:
+            # TODO discretize non-linear edges
+            e.append(welder.add_vertex(vert))
+        add_edge(geometry, e)
+
+
+def is_polygon_face(face):
+    """Check if face can be written as one polygon (planar, straight edges, no holes)."""
+    import Part
+
+    return not (
+        (len(face.Wires) > 1)
+        or (not isinstance(face.Surface, Part.Plane))
+        or hascurves(face)
+    )
+
+
+def convert_face_to_polygon(geometry, face, faceedges, tessellation):
+    """Convert face to polygons."""
+    welder = geometry["welder"]
+    if not is_polygon_face(face):
+        # face has holes or is curved, so we need to triangulate it
+        rawdata = face.tessellate(tessellation)
+        # map tessellation indices to welded vertex indices
+        vert_indices = welder.add_vectors(rawdata[0])
+        # matindex keeps one entry per FreeCAD face - even if it collapsed.
+        geometry["matindex"].append(add_faces(geometry, rawdata[1], vert_indices))
+    else:
+        f = []
+        ov = face.OuterWire.OrderedVertexes
+        for v in ov:
+            f.append(welder.add_vertex(v))
+        # FreeCAD doesn't care about geometry["verts"] order.
+        # Make sure our loop goes clockwise
+        c = face.CenterOfMass
+        v1 = ov[0].Point.sub(c)
+        v2 = ov[1].Point.sub(c)
+        n = face.normalAt(0, 0)
+        if (v1.cross(v2)).getAngle(n) > 1.57:
+            # inverting geometry["verts"] order
+            # if the direction is counterclockwise
+            f.reverse()
+        geometry["matindex"].append(add_faces(geometry, [f]))
+    for e in face.Edges:
+        faceedges.add(e.hashCode())
+
+
+def handle_shape_faces(geometry, shape, faceedges, tessellation, triangulate=False):
+    """Convert faces to polygons."""
+    if triangulate:
+        # triangulate and make faces
+        rawdata = shape.tessellate(tessellation)
+        vert_indices = geometry["welder"].add_vectors(rawdata[0])
+        add_faces(geometry, rawdata[1], vert_indices)
+        for face in shape.Faces:
+            for e in face.Edges:
+                faceedges.add(e.hashCode())
+    else:
+        # write FreeCAD faces as polygons when possible
+        for face in shape.Faces:
+            convert_face_to_polygon(geometry, face, faceedges, tessellation)
+
+
+def convert_shape(geometry, shape, tessellation, triangulate=False):
+    """Convert shape to verts, edges and faces."""
+    # a placeholder to store edges that belong to a face
+    faceedges = set()
+    if shape.Faces:
+        handle_shape_faces(geometry, shape, faceedges, tessellation, triangulate)
+    # Treat remaining edges (that are not in faces)
+    for edge in shape.Edges:
+        if not (edge.hashCode() in faceedges):
+            handle_shape_edge(geometry, edge)
+    return geometry
+
+
+def get_estimate_factor(face):
+    """Get factor from the coarse to the real triangle count of face."""
+    import Part
+
+    single_curved = (Part.Plane, Part.Cylinder, Part.Cone, Part.SurfaceOfExtrusion)
+    if isinstance(face.Surface, single_curved):
+        return math.sqrt(ESTIMATE_COARSENESS)
+    return ESTIMATE_COARSENESS
+
+
+def estimate_shape_counts(shape, tessellation, triangulate=False):
+    """
+    Estimate the mesh counts of convert_shape without converting the shape.
+
+    polygon faces are counted exactly.
+    all other faces are tessellated coarse (see ESTIMATE_COARSENESS)
+    and the triangle count is extrapolated to the tessellation value.
+    the extrapolation follows the asymptotic deflection rule and is not calibrated.
+    for large faces it should be well within a factor of two.
+    the coarse tessellation of small faces hits the minimal segment counts -
+    so these are over-estimated.
+    returns a dict with verts, faces, triangles and loops.
+    """
+    faces = 0
+    triangles = 0
+    loops = 0
+    curved_triangles = 0
+    for face in shape.Faces:
+        if is_polygon_face(face):
+            corners = len(face.OuterWire.Vertexes)
+            triangles += corners - 2
+            if triangulate:
+                faces += corners - 2
+                loops += 3 * (corners - 2)
+            else:
+                faces += 1
+                loops += corners
+        else:
+            rawdata = face.tessellate(tessellation * ESTIMATE_COARSENESS)
+            count = int(len(rawdata[1]) * get_estimate_factor(face))
+            curved_triangles += count
+    faces += curved_triangles
+    triangles += curved_triangles
+    loops += 3 * curved_triangles
+    # a closed triangle mesh has about half as many vertices as triangles.
+    verts = len(shape.Vertexes) + curved_triangles // 2
+    return {"verts": verts, "faces": faces, "triangles": triangles, "loops": loops}
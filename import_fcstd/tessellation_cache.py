@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Persistent tessellation cache."""
+
+import hashlib
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from .log import logger
+
+
+# increase if the stored mesh_data layout or the conversion changes.
+CACHE_FORMAT_VERSION = 1
+
+# default size limit of the cache folder in bytes
+DEFAULT_MAX_SIZE = 1024 * 2 ** 20
+
+MESH_DATA_KEYS = (
+    "verts",
+    "edges",
+    "loop_vertex_indices",
+    "loop_totals",
+    "matindex",
+)
+
+
+def get_default_cache_dir():
+    """Get user cache directory for this addon."""
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "io_import_fcstd", "tessellation")
+
+
+def get_geometry_settings(config, triangulate=False):
+    """Collect all settings that influence the tessellation result."""
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "tessellation": config["tessellation"],
+        "weld_tolerance": config["weld_tolerance"],
+        "triangulate": triangulate,
+    }
+
+
+def shape_content_hash(shape):
+    """
+    Create stable content hash for shape.
+
+    `shape.hashCode()` changes on every file opening -
+    so we hash the BREP representation of the shape.
+    """
+    return brep_content_hash(shape.exportBrepToString())
+
+
+def brep_content_hash(brep):
+    """Create content hash for BREP string."""
+    return hashlib.sha1(brep.encode("utf-8")).hexdigest()
+
+
+def combine_key(content_hash, settings):
+    """Combine content hash with settings to one key."""
+    h = hashlib.sha1(content_hash.encode("utf-8"))
+    h.update(repr(sorted(settings.items())).encode("utf-8"))
+    return h.hexdigest()
+
+
+def shape_fingerprint(shape, settings):
+    """Create stable hash for shape and geometry settings."""
+    return combine_key(shape_content_hash(shape), settings)
+
+
+class TessellationCache(object):
+    """
+    Store tessellated mesh_data on disk.
+
+    every entry is a numpy `.npz` file named after the shape fingerprint.
+    with max_size (in bytes) `prune` removes the least recently used entries
+    until the cache fits - loading an entry marks it as used.
+    """
+
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE):
+        """Init."""
+        super(TessellationCache, self).__init__()
+        if not cache_dir:
+            cache_dir = get_default_cache_dir()
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # entries written since the last prune
+        self.saved = 0
+
+    def get_path(self, key):
+        """Get file path for cache key."""
+        return os.path.join(self.cache_dir, key[:2], key + ".npz")
+
+    def contains(self, key):
+        """Check if key is cached."""
+        return os.path.exists(self.get_path(key))
+
+    def load(self, key):
+        """Load mesh_data for key - or None if not cached."""
+        path = self.get_path(key)
+        mesh_data = None
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    mesh_data = {name: data[name] for name in MESH_DATA_KEYS}
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("tessellation cache: ignore broken entry '%s': %s", path, e)
+                mesh_data = None
+        if mesh_data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            try:
+                # mark as recently used for prune
+                os.utime(path)
+            except OSError:
+                pass
+        return mesh_data
+
+    def save(self, key, mesh_data):
+        """Save mesh_data for key."""
+        path = self.get_path(key)
+        path_temp = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # write to temp file and move in place -
+            # so a concurrent reader never sees half written files.
+            fd, path_temp = tempfile.mkstemp(
+                suffix=".npz", dir=os.path.dirname(path)
+            )
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **{name: mesh_data[name] for name in MESH_DATA_KEYS})
+            os.replace(path_temp, path)
+            self.saved += 1
+        except OSError as e:
+            logger.warning("tessellation cache: unable to write '%s': %s", path, e)
+        finally:
+            # only left if writing or moving failed
+            if path_temp and os.path.exists(path_temp):
+                try:
+                    os.unlink(path_temp)
+                except OSError:
+                    pass
+
+    def get_entries(self):
+        """Get list of (mtime, size, path) of all cache files."""
+        entries = []
+        for root, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if not filename.endswith(".npz"):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def remove_files(self, paths):
+        """Remove cache files - returns the count of removed files."""
+        removed = 0
+        for path in paths:
+            try:
+                os.unlink(path)
+                removed += 1
+            except OSError as e:
+                logger.warning("tessellation cache: unable to remove '%s': %s", path, e)
+        return removed
+
+    def prune(self):
+        """Remove least recently used entries until the cache fits max_size."""
+        self.saved = 0
+        if not self.max_size:
+            return 0
+        entries = self.get_entries()
+        total = sum(size for _, size, _ in entries)
+        paths = []
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            paths.append(path)
+            total -= size
+        removed = self.remove_files(paths)
+        if removed:
+            logger.info("tessellation cache: pruned %s entries.", removed)
+        return removed
+
+    def clear(self):
+        """Remove all entries - returns the count of removed files."""
+        return self.remove_files([path for _, _, path in self.get_entries()])
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Pool of tessellation worker processes."""
+
+import atexit
+import itertools
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Listener, wait
+
+import numpy as np
+
+from . import log
+from . import worker_protocol
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "tessellation_worker.py")
+
+
+class TessellationPool(object):
+    """
+    Tessellate shapes in separate processes.
+
+    each worker is a python process running `tessellation_worker.py`
+    that imports FreeCAD on its own.
+    workers connect back to a local listener -
+    jobs and results are exchanged as binary messages (see worker_protocol).
+
+    the executable can be Blenders own python (default)
+    or FreeCADs `freecadcmd` - then the workers run with FreeCADs python
+    and Blender does not need to load a matching FreeCAD library for tessellation.
+    """
+
+    def __init__(
+        self,
+        worker_count,
+        *,
+        executable=None,
+        sys_path=None,
+        connect_timeout=60.0,
+        report=None,
+    ):
+        """Init."""
+        super(TessellationPool, self).__init__()
+        self.worker_count = worker_count
+        self.executable = executable or sys.executable
+        if sys_path is None:
+            sys_path = sys.path
+        self.sys_path = sys_path
+        self.connect_timeout = connect_timeout
+        self.report = report
+        self.listener = None
+        self.processes = []
+        self.connections = []
+
+    def print_report(self, mode, data):
+        """Report or print."""
+        if self.report:
+            self.report(mode, data)
+        else:
+            log.logger.log(log.get_level(mode), "%s", data)
+
+    def matches(self, worker_count, executable=None):
+        """Check if pool was started with the given settings."""
+        return self.worker_count == worker_count and self.executable == (
+            executable or sys.executable
+        )
+
+    def is_alive(self):
+        """Check if all workers are connected and running."""
+        return (
+            self.listener is not None
+            and len(self.connections) == self.worker_count
+            and all(p.poll() is None for p in self.processes)
+        )
+
+    def get_worker_command(self):
+        """Command line to start one worker."""
+        return [self.executable, WORKER_SCRIPT]
+
+    def get_worker_env(self):
+        """Environment for the worker processes."""
+        host, port = self.listener.address
+        env = dict(os.environ)
+        env[worker_protocol.ENV_ADDRESS] = "{}:{}".format(host, port)
+        env[worker_protocol.ENV_AUTHKEY] = self.authkey.hex()
+        env[worker_protocol.ENV_SYS_PATH] = os.pathsep.join(self.sys_path)
+        return env
+
+    def start(self):
+        """Start worker processes and wait for them to connect."""
+        self.authkey = secrets.token_bytes(32)
+        self.listener = Listener(("127.0.0.1", 0), authkey=self.authkey)
+        env = self.get_worker_env()
+        for _ in range(self.worker_count):
+            self.processes.append(
+                subprocess.Popen(self.get_worker_command(), env=env)
+            )
+
+        # accept in a thread - so we can watch for crashed workers.
+        def accept_all():
+            for _ in range(self.worker_count):
+                try:
+                    self.connections.append(self.listener.accept())
+                except (OSError, EOFError):
+                    break
+
+        accept_thread = threading.Thread(target=accept_all, daemon=True)
+        accept_thread.start()
+        deadline = time.monotonic() + self.connect_timeout
+        while accept_thread.is_alive() and time.monotonic() < deadline:
+            running = [p for p in self.processes if p.poll() is None]
+            if len(running) <= len(self.connections):
+                break
+            accept_thread.join(0.1)
+        if len(self.connections) < self.worker_count:
+            self.print_report(
+                {"WARNING"},
+                "only {} of {} tessellation workers started."
+                "".format(len(self.connections), self.worker_count),
+            )
+        return len(self.connections)
+
+    def map(self, jobs, tessellation, weld_tolerance, triangulate=False):
+        """
+        Tessellate all jobs.
+
+        jobs is a list of (key, brep) tuples.
+        yields (key, mesh_data) for every successful job -
+        failed jobs are reported and skipped.
+        """
+        pending = list(reversed(jobs))
+        busy = {}
+        # unique over the whole map - re-queued jobs get a new id.
+        job_ids = itertools.count()
+
+        def send_next(conn):
+            if pending:
+                job_id = next(job_ids)
+                key, brep = pending.pop()
+                try:
+                    conn.send_bytes(
+                        worker_protocol.encode_job(
+                            job_id, brep, tessellation, weld_tolerance, triangulate
+                        )
+                    )
+                except OSError:
+                    # worker is gone - let the others handle the job.
+                    pending.append((key, brep))
+                    self.connections.remove(conn)
+                else:
+                    busy[conn] = (job_id, key)
+
+        for conn in list(self.connections):
+            send_next(conn)
+        while busy:
+            for conn in wait(list(busy.keys())):
+                job_id, key = busy.pop(conn)
+                try:
+                    data = conn.recv_bytes()
+                except (EOFError, OSError):
+                    self.print_report(
+                        {"WARNING"}, "tessellation worker died at '{}'.".format(key)
+                    )
+                    self.connections.remove(conn)
+                    continue
+                message_type, _, _ = worker_protocol.read_header(data)
+                if message_type == worker_protocol.MSG_RESULT:
+                    _, mesh_data = worker_protocol.decode_result(
+                        data, np.frombuffer
+                    )
+                    yield key, mesh_data
+                else:
+                    _, message = worker_protocol.decode_error(data)
+                    self.print_report(
+                        {"WARNING"},
+                        "tessellation of '{}' failed: {}".format(key, message),
+                    )
+                send_next(conn)
+        if pending:
+            self.print_report(
+                {"WARNING"},
+                "no tessellation worker left - {} of {} jobs not done "
+                "(they are tessellated in Blender)."
+                "".format(len(pending), len(jobs)),
+            )
+
+    def close(self):
+        """Shutdown all workers."""
+        for conn in self.connections:
+            try:
+                conn.send_bytes(worker_protocol.encode_shutdown())
+                conn.close()
+            except OSError:
+                pass
+        self.connections = []
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = []
+        if self.listener:
+            self.listener.close()
+            self.listener = None
+
+    def __enter__(self):
+        """Start pool."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Shutdown pool."""
+        self.close()
+
+
+# ##########################################
+# shared pool
+# keeps the workers (and their loaded FreeCAD modules) warm between imports.
+
+_shared_pool = None
+
+
+def get_shared_pool(worker_count, *, executable=None, sys_path=None, report=None):
+    """Get running shared pool - (re)start it if needed."""
+    global _shared_pool
+    pool = _shared_pool
+    if pool is not None and not (
+        pool.matches(worker_count, executable) and pool.is_alive()
+    ):
+        pool.close()
+        pool = None
+    if pool is None:
+        pool = TessellationPool(
+            worker_count, executable=executable, sys_path=sys_path, report=report
+        )
+        pool.start()
+        _shared_pool = pool
+    pool.report = report
+    return pool
+
+
+def shutdown_shared_pool():
+    """Shutdown shared pool if running."""
+    global _shared_pool
+    if _shared_pool is not None:
+        _shared_pool.close()
+        _shared_pool = None
+
+
+atexit.register(shutdown_shared_pool)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tessellation worker process.
+
+started by tessellation_pool.TessellationPool.
+connects back to the importer, receives shapes as BREP strings
+and answers with the flat vertex / edge / face / matindex arrays.
+see worker_protocol for the message format.
+"""
+
+import os
+import sys
+import traceback
+from multiprocessing.connection import Client
+
+# this file is run as script - so make the sibling modules importable.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import worker_protocol  # noqa: E402
+import tessellation  # noqa: E402
+
+
+def prepare_sys_path():
+    """Add paths handed over by the importer (FreeCAD lib & co)."""
+    for path in os.environ.get(worker_protocol.ENV_SYS_PATH, "").split(os.pathsep):
+        if path and path not in sys.path:
+            sys.path.append(path)
+
+
+def handle_job(data):
+    """Tessellate one shape."""
+    import Part
+
+    job = worker_protocol.decode_job(data)
+    shape = Part.Shape()
+    shape.importBrepFromString(job["brep"])
+    geometry = tessellation.create_geometry_data(job["weld_tolerance"])
+    tessellation.convert_shape(
+        geometry, shape, job["tessellation"], triangulate=job["triangulate"]
+    )
+    return worker_protocol.encode_result(job["job_id"], geometry)
+
+
+def main():
+    """Serve jobs until shutdown."""
+    prepare_sys_path()
+    host, port = os.environ[worker_protocol.ENV_ADDRESS].rsplit(":", 1)
+    authkey = bytes.fromhex(os.environ[worker_protocol.ENV_AUTHKEY])
+    conn = Client((host, int(port)), authkey=authkey)
+    try:
+        # load FreeCAD before the first job arrives.
+        import FreeCAD  # noqa: F401
+        import Part  # noqa: F401
+
+        while True:
+            try:
+                data = conn.recv_bytes()
+            except EOFError:
+                break
+            message_type, job_id, _ = worker_protocol.read_header(data)
+            if message_type == worker_protocol.MSG_SHUTDOWN:
+                break
+            try:
+                conn.send_bytes(handle_job(data))
+            except Exception:
+                conn.send_bytes(
+                    worker_protocol.encode_error(job_id, traceback.format_exc())
+                )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
+    # when running inside of freecadcmd
+    # leave directly instead of returning to its command loop.
+    sys.stdout.flush()
+    os._exit(0)
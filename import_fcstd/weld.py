@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Vertex welding."""
+
+
+def clean_face(indices):
+    """
+    Remove the collapsed corners of a welded face.
+
+    welding can map neighbouring corners to the same vertex.
+    returns the face without repeated consecutive indices -
+    or None if it is degenerate (less than 3 unique corners
+    or a corner used twice).
+    """
+    face = [
+        index for position, index in enumerate(indices) if index != indices[position - 1]
+    ]
+    if len(face) < 3 or len(set(face)) != len(face):
+        return None
+    return face
+
+
+class VertexWelder(object):
+    """
+    Collect unique vertices with constant time lookup.
+
+    vertices are keyed by their coordinates.
+    with a tolerance > 0 the coordinates are quantized to a grid of
+    that size - so all vertices that fall into the same grid cell
+    are merged into one.
+    (two close vertices on different sides of a cell border stay apart.)
+    faces can collapse by this - see clean_face.
+    with tolerance == 0 only exactly equal coordinates are merged.
+    """
+
+    def __init__(self, tolerance=0.0, verts=None):
+        """Init."""
+        super(VertexWelder, self).__init__()
+        self.tolerance = tolerance
+        self.inverse_tolerance = None
+        if tolerance and tolerance > 0:
+            self.inverse_tolerance = 1.0 / tolerance
+        # the welder appends to this list -
+        # so it can be shared with func_data["verts"]
+        if verts is None:
+            verts = []
+        self.verts = verts
+        self.lookup = {}
+        for index, (x, y, z) in enumerate(self.verts):
+            self.lookup.setdefault(self.get_key(x, y, z), index)
+
+    def get_key(self, x, y, z):
+        """Get lookup key for coordinates."""
+        inverse_tolerance = self.inverse_tolerance
+        if inverse_tolerance:
+            return (
+                round(x * inverse_tolerance),
+                round(y * inverse_tolerance),
+                round(z * inverse_tolerance),
+            )
+        return (x, y, z)
+
+    def add(self, x, y, z):
+        """Add vertex and return its index."""
+        key = self.get_key(x, y, z)
+        index = self.lookup.get(key)
+        if index is None:
+            index = len(self.verts)
+            self.lookup[key] = index
+            self.verts.append([x, y, z])
+        return index
+
+    def add_vector(self, v):
+        """Add FreeCAD Vector (lowercase x, y, z) and return its index."""
+        return self.add(v.x, v.y, v.z)
+
+    def add_vertex(self, vert):
+        """Add FreeCAD Vertex (uppercase X, Y, Z) and return its index."""
+        return self.add(vert.X, vert.Y, vert.Z)
+
+    def add_vectors(self, vectors):
+        """Add list of FreeCAD Vectors and return list of the new indices."""
+        add = self.add
+        return [add(v.x, v.y, v.z) for v in vectors]
+
+    def __len__(self):
+        """Count of unique vertices."""
+        return len(self.verts)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Binary message format between importer and tessellation workers.
+
+every message is one `bytes` object
+(send with `Connection.send_bytes`)
+that starts with a fixed header:
+    magic (4 bytes) | message type (uint32) | job id (uint32)
+
+job:
+    header | tessellation (float64) | weld_tolerance (float64)
+    | triangulate (uint8) | brep (utf-8)
+result:
+    header | 5 x count (uint32)
+    | verts (float64 x 3) | edges (int32 x 2)
+    | loop_vertex_indices (int32) | loop_totals (int32) | matindex (int32)
+error:
+    header | message (utf-8)
+shutdown:
+    header
+
+this module only uses the python standard library -
+so it can be used inside of Blender and in the worker processes.
+"""
+
+import array
+import struct
+import sys
+
+MAGIC = b"FCTW"
+
+MSG_JOB = 1
+MSG_RESULT = 2
+MSG_ERROR = 3
+MSG_SHUTDOWN = 4
+
+HEADER = struct.Struct("<4sII")
+JOB = struct.Struct("<ddB")
+RESULT_COUNTS = struct.Struct("<5I")
+
+ENV_ADDRESS = "IO_IMPORT_FCSTD_WORKER_ADDRESS"
+ENV_AUTHKEY = "IO_IMPORT_FCSTD_WORKER_AUTHKEY"
+ENV_SYS_PATH = "IO_IMPORT_FCSTD_WORKER_SYS_PATH"
+
+
+class ProtocolError(Exception):
+    """Invalid message received."""
+
+
+def _to_little_endian(values):
+    """Array as little endian bytes."""
+    if sys.byteorder != "little":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def read_header(data):
+    """Read message header - returns (message_type, job_id, payload_offset)."""
+    if len(data) < HEADER.size:
+        raise ProtocolError("message too short ({} bytes)".format(len(data)))
+    magic, message_type, job_id = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ProtocolError("invalid magic {!r}".format(magic))
+    return message_type, job_id, HEADER.size
+
+
+def encode_job(job_id, brep, tessellation, weld_tolerance, triangulate=False):
+    """Encode tessellation job."""
+    return b"".join(
+        (
+            HEADER.pack(MAGIC, MSG_JOB, job_id),
+            JOB.pack(tessellation, weld_tolerance, bool(triangulate)),
+            brep.encode("utf-8"),
+        )
+    )
+
+
+def decode_job(data):
+    """Decode tessellation job - returns dict."""
+    message_type, job_id, offset = read_header(data)
+    if message_type != MSG_JOB:
+        raise ProtocolError("expected job - got type {}".format(message_type))
+    tessellation, weld_tolerance, triangulate = JOB.unpack_from(data, offset)
+    offset += JOB.size
+    return {
+        "job_id": job_id,
+        "tessellation": tessellation,
+        "weld_tolerance": weld_tolerance,
+        "triangulate": bool(triangulate),
+        "brep": bytes(data[offset:]).decode("utf-8"),
+    }
+
+
+def encode_result(job_id, geometry):
+    """
+    Encode geometry lists (see tessellation.create_geometry_data) as result.
+
+    only uses the `array` module - so the worker does not need numpy.
+    """
+    verts = array.array("d")
+    for v in geometry["verts"]:
+        verts.extend(v)
+    edges = array.array("i")
+    for e in geometry["edges"]:
+        edges.extend(e)
+    loop_vertex_indices = array.array("i")
+    loop_totals = array.array("i")
+    for f in geometry["faces"]:
+        loop_vertex_indices.extend(f)
+        loop_totals.append(len(f))
+    matindex = array.array("i", geometry["matindex"])
+    return b"".join(
+        (
+            HEADER.pack(MAGIC, MSG_RESULT, job_id),
+            RESULT_COUNTS.pack(
+                len(verts) // 3,
+                len(edges) // 2,
+                len(loop_vertex_indices),
+                len(loop_totals),
+                len(matindex),
+            ),
+            _to_little_endian(verts),
+            _to_little_endian(edges),
+            _to_little_endian(loop_vertex_indices),
+            _to_little_endian(loop_totals),
+            _to_little_endian(matindex),
+        )
+    )
+
+
+def decode_result(data, frombuffer):
+    """
+    Decode result into mesh_data dict.
+
+    `frombuffer(data, dtype, count, offset)` creates the arrays
+    (in Blender this is `numpy.frombuffer` - so no data is copied).
+    returns (job_id, mesh_data)
+    """
+    message_type, job_id, offset = read_header(data)
+    if message_type != MSG_RESULT:
+        raise ProtocolError("expected result - got type {}".format(message_type))
+    (
+        verts_count,
+        edges_count,
+        loops_count,
+        faces_count,
+        matindex_count,
+    ) = RESULT_COUNTS.unpack_from(data, offset)
+    offset += RESULT_COUNTS.size
+    mesh_data = {}
+    for name, dtype, count, width in (
+        ("verts", "<f8", verts_count * 3, 8),
+        ("edges", "<i4", edges_count * 2, 4),
+        ("loop_vertex_indices", "<i4", loops_count, 4),
+        ("loop_totals", "<i4", faces_count, 4),
+        ("matindex", "<i4", matindex_count, 4),
+    ):
+        mesh_data[name] = frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += count * width
+    if offset != len(data):
+        raise ProtocolError(
+            "result size mismatch ({} != {})".format(offset, len(data))
+        )
+    mesh_data["verts"] = mesh_data["verts"].reshape(-1, 3)
+    mesh_data["edges"] = mesh_data["edges"].reshape(-1, 2)
+    return job_id, mesh_data
+
+
+def encode_error(job_id, message):
+    """Encode error message."""
+    return HEADER.pack(MAGIC, MSG_ERROR, job_id) + str(message).encode("utf-8")
+
+
+def decode_error(data):
+    """Decode error message - returns (job_id, message)."""
+    message_type, job_id, offset = read_header(data)
+    return job_id, bytes(data[offset:]).decode("utf-8", errors="replace")
+
+
+def encode_shutdown():
+    """Encode shutdown message."""
+    return HEADER.pack(MAGIC, MSG_SHUTDOWN, 0)